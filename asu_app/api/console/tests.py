@@ -1,3 +1,62 @@
+from django.conf import settings
+from django.core.cache import cache
 from django.test import TestCase
+from rest_framework.test import APIRequestFactory, force_authenticate
 
-# Create your tests here.
+from api.console.views import DeviceViewSet
+from api.groups.models import Group, Speciality
+from api.subjects.models import Subject
+from api.users.models import User, UserRole, UsersSubjects
+from asu_app.custom_permissions import ConsolePermissions
+
+
+class ConsolePermissionsTestCase(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.factory = APIRequestFactory()
+        speciality = Speciality.objects.create(name='АСОИ')
+        self.group = Group.objects.create(name='АСОИ-211', speciality=speciality)
+        self.subject = Subject.objects.create(
+            pk=settings.SYSTEM_ADMINISTRATION_SUBJECT_ID, name='Системное администрирование',
+        )
+        self.subject.allowed_specialities.add(speciality)
+
+    def make_user(self, username, role, **fields):
+        return User.objects.create(username=username, first_name='Имя', last_name='Фамилия', role=role, **fields)
+
+    def has_console_access(self, user):
+        request = self.factory.post('/api/connect/')
+        request.user = user
+        return ConsolePermissions().has_permission(request, None)
+
+    def list_devices(self, user):
+        request = self.factory.get('/api/devices/')
+        force_authenticate(request, user=user)
+        return DeviceViewSet.as_view({'get': 'list'})(request).status_code
+
+    def test_student_and_teacher_access_follows_the_subject(self):
+        student = self.make_user('student', UserRole.STUDENT, group=self.group)
+        teacher = self.make_user('teacher', UserRole.TEACHER)
+        other_teacher = self.make_user('other', UserRole.TEACHER)
+        UsersSubjects.objects.create(user=teacher, subject=self.subject)
+
+        self.assertTrue(self.has_console_access(student))
+        self.assertTrue(self.has_console_access(teacher))
+        self.assertFalse(self.has_console_access(other_teacher))
+        self.assertEqual(self.list_devices(student), 200)
+        self.assertEqual(self.list_devices(other_teacher), 403)
+
+    def test_superuser_status_alone_does_not_grant_console(self):
+        # Как и до кеширования областей доступа: администраторов пропускает IsAdminUser (is_staff),
+        # а суперпользователь без is_staff получает консоль только по роли
+        superuser = self.make_user('root', UserRole.TEACHER, is_superuser=True)
+        self.assertFalse(self.has_console_access(superuser))
+        self.assertEqual(self.list_devices(superuser), 403)
+
+        superuser.is_staff = True
+        superuser.save()
+        self.assertEqual(self.list_devices(superuser), 200)
+
+        UsersSubjects.objects.create(user=superuser, subject=self.subject)
+        self.assertTrue(self.has_console_access(superuser))
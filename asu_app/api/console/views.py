@@ -82,6 +82,7 @@ class DeviceViewSet(viewsets.ModelViewSet):
     permission_classes = [IsAuthenticated, IsAdminUser | ReadOnlyIfAllowed]
     queryset = Devices.objects.all()
     serializer_class = DeviceSerializer
+    pagination_class = None  # Небольшой справочник — отдаётся целиком
 
 
 # ViewSet для модели MainCommands: включает поиск по подкомандам
@@ -89,6 +90,7 @@ class CommandViewSet(viewsets.ModelViewSet):
     permission_classes = [IsAuthenticated, IsAdminUser | ReadOnlyIfAllowed]
     queryset = MainCommands.objects.all()
     serializer_class = CommandSerializer
+    pagination_class = None  # Небольшой справочник — отдаётся целиком
     filter_backends = [filters.SearchFilter]
     search_fields = ['command_name', 'subcommands__subcommand_name']
 
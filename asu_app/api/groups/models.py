@@ -23,7 +23,7 @@ class Group(models.Model):
 
     # Метод возвращает URL для генерации отчёта по данной группе
     def get_report_url(self):
-        return reverse('group_report', kwargs={'group_id': self.id})
+        return reverse('api:group_report', kwargs={'group_id': self.id})
 
     # Человекочитаемое представление объекта (например, в админке)
     def __str__(self):
@@ -23,6 +23,7 @@ class GroupViewSet(viewsets.ModelViewSet):
     # Базовый запрос — выбираем группы с привязанной специальностью
     queryset = Group.objects.all().select_related('speciality').distinct()
     serializer_class = GroupSerializer
+    pagination_class = None  # Небольшой справочник — отдаётся целиком
 
     # Переопределяем queryset, чтобы фильтровать данные в зависимости от роли пользователя
     def get_queryset(self):
@@ -45,3 +46,4 @@ class SpecialityViewSet(viewsets.ModelViewSet):
     permission_classes = [IsAuthenticated, IsAdminUser | ReadOnly]
     queryset = Speciality.objects.all()
     serializer_class = SpecialitySerializer
+    pagination_class = None  # Небольшой справочник — отдаётся целиком
@@ -1,8 +1,9 @@
 # Импорт стандартной админки Django
 from django.contrib import admin
+from django.db.models import Prefetch  # Варианты ответов загружаются вместе с вопросами
 
 # Импорт моделей текущего приложения
-from api.simple_tests.models import Test, TestsResult, Question, AnswerOption
+from api.simple_tests.models import Test, TestsResult, Question, AnswerOption, TestAttempt, TestSubmission
 
 # Импорт моделей из другого приложения — предметы, лекции и лабораторные работы
 from api.subjects.models import Lab, Lecture
@@ -11,10 +12,25 @@ from api.subjects.models import Lab, Lecture
 import nested_admin
 
 
+# Формы вариантов ответа берут варианты, загруженные вместе с вопросами (см. QuestionInline.get_queryset),
+# а не запрашивают их отдельно для каждого вопроса. При сохранении формы работают как обычно
+class AnswerOptionFormSet(nested_admin.NestedInlineFormSet):
+    def get_queryset(self):
+        prefetched = getattr(self.instance, '_prefetched_objects_cache', {}).get('answers')
+        if self.data or prefetched is None:
+            return super().get_queryset()
+        return prefetched
+
+
 # Inline-форма для вариантов ответов (AnswerOption), отображается внутри вопроса
 class AnswerOptionInline(nested_admin.NestedStackedInline):
     model = AnswerOption  # Модель, которую отображаем
     extra = 2             # Количество пустых полей по умолчанию
+    formset = AnswerOptionFormSet
+
+    # Заголовок варианта (__str__) включает текст вопроса — загружаем вопрос тем же запросом
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related('question')
 
 
 # Inline-форма для вопросов, которая включает вложенные варианты ответов
@@ -23,22 +39,29 @@ class QuestionInline(nested_admin.NestedStackedInline):
     extra = 1                         # Один пустой вопрос по умолчанию
     inlines = [AnswerOptionInline]   # Вопрос включает варианты ответов
 
+    # Заголовок вопроса (__str__) включает название теста; варианты ответов всех вопросов — одним запросом
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related('test').prefetch_related(
+            Prefetch('answers', queryset=AnswerOption.objects.order_by('pk')),
+        )
+
 
 # Основная административная форма для модели Test с вложенными вопросами и вариантами ответов
 class TestAdmin(nested_admin.NestedModelAdmin):
     inlines = [QuestionInline]
+    list_display = ('name', 'lab', 'lecture', 'start_date', 'end_date')
+    list_select_related = ('lab__semester__subject', 'lecture__semester__subject')  # Для подписей в списке
+    search_fields = ('name',)
+    list_per_page = 50
 
-    # Ограничение списка лабораторных и лекций при выборе, если пользователь не суперпользователь
+    # Подписи лабораторных и лекций включают семестр и предмет — загружаем их тем же запросом.
+    # Преподавателю список ограничивается его дисциплинами
     def formfield_for_foreignkey(self, db_field, request, **kwargs):
-        # Ограничиваем список лабораторных работ по дисциплинам преподавателя
-        if db_field.name == "lab" and not request.user.is_superuser:
-            kwargs["queryset"] = Lab.objects.filter(
-                semester__subject__in=request.user.teacher_subjects.all())
-
-        # Ограничиваем список лекций по дисциплинам преподавателя
-        if db_field.name == "lecture" and not request.user.is_superuser:
-            kwargs["queryset"] = Lecture.objects.filter(
-                semester__subject__in=request.user.teacher_subjects.all())
+        if db_field.name in ("lab", "lecture"):
+            queryset = (Lab if db_field.name == "lab" else Lecture).objects.select_related('semester__subject')
+            if not request.user.is_superuser:
+                queryset = queryset.filter(semester__subject__in=request.user.teacher_subjects.all())
+            kwargs["queryset"] = queryset
 
         # Возвращаем обновлённое поле формы
         return super().formfield_for_foreignkey(db_field, request, **kwargs)
@@ -47,8 +70,50 @@ class TestAdmin(nested_admin.NestedModelAdmin):
 # Регистрируем модель Test с кастомным отображением через TestAdmin
 admin.site.register(Test, TestAdmin)
 
-# Регистрируем модель результатов тестов — простое отображение
-admin.site.register(TestsResult)
 
-# Регистрируем модель вопросов — также без кастомизации
-admin.site.register(Question)
+# Результаты тестов: студент и тест выбираются по id, а не из списка всех пользователей и тестов
+class TestsResultAdmin(admin.ModelAdmin):
+    list_display = ('student', 'test', 'mark', 'completion_date')
+    list_select_related = ('student', 'test')
+    raw_id_fields = ('student', 'test')
+    search_fields = ('student__last_name', 'test__name')
+    list_per_page = 50
+
+
+admin.site.register(TestsResult, TestsResultAdmin)
+
+
+# Вопросы: подпись вопроса включает название теста
+class QuestionAdmin(admin.ModelAdmin):
+    list_display = ('question', 'test')
+    list_select_related = ('test',)
+    raw_id_fields = ('test',)
+    search_fields = ('question', 'test__name')
+    list_per_page = 50
+
+
+admin.site.register(Question, QuestionAdmin)
+
+
+# Попытки прохождения — например, чтобы удалить зависшую попытку студента
+class TestAttemptAdmin(admin.ModelAdmin):
+    list_display = ('student', 'test', 'status', 'started_at', 'deadline')
+    list_filter = ('status',)
+    list_select_related = ('student', 'test')
+    raw_id_fields = ('student', 'test', 'result')
+    list_per_page = 50
+
+
+admin.site.register(TestAttempt, TestAttemptAdmin)
+
+
+# Ответы, принятые без проверки, — например, чтобы найти не прошедшие проверку
+class TestSubmissionAdmin(admin.ModelAdmin):
+    list_display = ('student', 'test', 'status', 'submitted_at')
+    list_filter = ('status',)
+    list_select_related = ('student', 'test')
+    raw_id_fields = ('student', 'test', 'attempt', 'result')
+    list_per_page = 50
+
+
+admin.site.register(TestSubmission, TestSubmissionAdmin)
@@ -0,0 +1,143 @@
+import numpy as np
+from django.core.cache import cache
+from django.db.models import Count, Max
+
+from api.simple_tests.answer_keys import get_answer_key
+from api.simple_tests.content import CONTENT_TIMEOUT, content_version
+from api.simple_tests.models import AnswerSelection, Question, TestsResult
+
+
+
+def _rounded(value):
+    # NaN (нет разброса или данных) отдаётся как null
+    return None if np.isnan(value) else round(float(value), 4)
+
+
+def analyze_test(test_id):
+    """
+    Анализ вопросов теста по сохранённым ответам студентов.
+
+    Для каждого вопроса: трудность (средняя доля набранного веса, 1 — все ответили верно),
+    дискриминативность (точечно-бисериальная корреляция балла за вопрос с суммой баллов
+    за остальные вопросы) и доля выбора каждого варианта ответа среди ответивших.
+    Для теста в целом — альфа Кронбаха. Балл за вопрос считается так же, как при проверке
+    (см. grading.py): сумма весов выбранных вариантов, не меньше нуля, делённая на вес верных.
+    """
+    answer_key = get_answer_key(test_id)
+    questions = answer_key.questions
+    k = len(questions)
+
+    # Варианты ответов всех вопросов одним списком: id варианта -> индекс, по индексу — вопрос и вес
+    column_index = {question.id: column for column, question in enumerate(questions)}
+    option_index = {}
+    option_question, option_weight = [], []
+    for column, question in enumerate(questions):
+        for option in question.options:
+            option_index[option.id] = len(option_question)
+            option_question.append(column)
+            option_weight.append(option.weight)
+    option_question = np.array(option_question, dtype=np.int64)
+    option_weight = np.array(option_weight, dtype=np.float64)
+    max_weight = np.array([question.answers_max_weight for question in questions], dtype=np.float64)
+
+    selections = [
+        (result_id, column_index[question_id], options)
+        for result_id, question_id, options in (
+            AnswerSelection.objects
+            .filter(test_result__test_id=test_id)
+            .values_list('test_result_id', 'question_id', 'options')
+            .iterator(chunk_size=5000)
+        )
+        if question_id in column_index
+    ]
+
+    # Студенты, сохранившие результат без единого ответа, тоже участвуют (с нулевыми баллами)
+    all_result_ids = np.array(
+        TestsResult.objects.filter(test_id=test_id).order_by('id').values_list('id', flat=True), dtype=np.int64,
+    )
+    n = len(all_result_ids)
+    rows = np.searchsorted(
+        all_result_ids, np.fromiter((selection[0] for selection in selections), dtype=np.int64, count=len(selections)),
+    )
+    columns = np.fromiter((selection[1] for selection in selections), dtype=np.int64, count=len(selections))
+
+    # Выбранные варианты — по элементу на каждый id из списков; варианты, которых в тесте больше нет, не учитываются
+    counts = np.fromiter((len(selection[2]) for selection in selections), dtype=np.int64, count=len(selections))
+    options = np.fromiter(
+        (option_index.get(option_id, -1) for selection in selections for option_id in selection[2]),
+        dtype=np.int64, count=int(counts.sum()),
+    )
+    option_rows = np.repeat(rows, counts)
+    known = options >= 0
+    options, option_rows = options[known], option_rows[known]
+
+    # Матрица баллов n × k: студенты × вопросы. Вопрос считается отвеченным, если есть строка ответа
+    answered = np.zeros((n, k), dtype=bool)
+    answered[rows, columns] = True
+    cell = option_rows * k + option_question[options]
+    raw = np.bincount(cell, weights=option_weight[options], minlength=n * k).reshape(n, k)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        scores = np.where(max_weight > 0, np.clip(raw, 0, None) / max_weight, 0.0)
+
+    totals = scores.sum(axis=1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        difficulty = scores.mean(axis=0) if n else np.full(k, np.nan)
+
+        # Корреляция балла за вопрос с суммой за остальные вопросы — по всем столбцам сразу
+        rest = totals[:, None] - scores
+        scores_centered = scores - scores.mean(axis=0)
+        rest_centered = rest - rest.mean(axis=0)
+        discrimination = (scores_centered * rest_centered).sum(axis=0) / np.sqrt(
+            (scores_centered ** 2).sum(axis=0) * (rest_centered ** 2).sum(axis=0)
+        )
+
+        if k > 1 and n > 1:
+            alpha = k / (k - 1) * (1 - scores.var(axis=0, ddof=1).sum() / totals.var(ddof=1))
+        else:
+            alpha = np.nan
+
+        answered_count = answered.sum(axis=0)
+        chosen = np.bincount(options, minlength=len(option_question))
+        selection_rate = chosen / answered_count[option_question]
+
+    texts = dict(Question.objects.filter(test_id=test_id).values_list('id', 'question'))
+    analysis_questions = []
+    position = 0
+    for column, question in enumerate(questions):
+        analysis_questions.append({
+            'id': question.id,
+            'question': texts.get(question.id, ''),
+            'answered': int(answered_count[column]),
+            'difficulty': _rounded(difficulty[column]),
+            'discrimination': _rounded(discrimination[column]),
+            'options': [
+                {
+                    'answer': option.answer,
+                    'is_right': option.is_right,
+                    'selection_rate': _rounded(selection_rate[position + number]),
+                }
+                for number, option in enumerate(question.options)
+            ],
+        })
+        position += len(question.options)
+
+    return {
+        'test': test_id,
+        'results_count': n,
+        'cronbach_alpha': _rounded(alpha),
+        'questions': analysis_questions,
+    }
+
+
+def get_test_analysis(test_id):
+    """
+    Анализ из кеша. Ключ включает последний результат по тесту и версию содержимого теста,
+    поэтому новый результат или правка теста приводят к пересчёту.
+    """
+    latest = TestsResult.objects.filter(test_id=test_id).aggregate(last_id=Max('id'), count=Count('id'))
+    key = f'test_analysis_{test_id}_{latest["last_id"]}_{latest["count"]}_{content_version(test_id)}'
+    analysis = cache.get(key)
+    if analysis is None:
+        analysis = analyze_test(test_id)
+        cache.set(key, analysis, CONTENT_TIMEOUT)
+    return analysis
@@ -0,0 +1,45 @@
+from collections import namedtuple
+
+from django.core.cache import cache
+
+from api.simple_tests.content import CONTENT_TIMEOUT, content_version  # Версия содержимого теста
+from api.simple_tests.models import Test
+
+
+# Скомпилированный ключ ответов: неизменяемые кортежи без ORM-объектов, хранятся в кеше
+AnswerKey = namedtuple('AnswerKey', ['test_id', 'is_outer', 'questions'])
+QuestionKey = namedtuple('QuestionKey', ['id', 'weight', 'answers_max_weight', 'options'])
+OptionKey = namedtuple('OptionKey', ['id', 'answer', 'weight', 'is_right'])
+
+# Меняется вместе со структурой кортежей: ключи прежнего формата из кеша не читаются
+ANSWER_KEY_FORMAT = 2
+
+
+
+def compile_answer_key(test_id):
+    """
+    Собирает ключ ответов теста из базы: вопросы с весами, варианты ответов
+    и заранее посчитанный суммарный вес верных вариантов каждого вопроса.
+    """
+    test = Test.objects.prefetch_related('questions__answers').get(pk=test_id)
+    questions = []
+    for question in test.questions.all():
+        options = tuple(
+            OptionKey(answer.id, answer.answer, answer.weight, answer.is_right) for answer in question.answers.all()
+        )
+        answers_max_weight = sum(option.weight for option in options if option.is_right)
+        questions.append(QuestionKey(question.id, question.weight, answers_max_weight, options))
+    return AnswerKey(test.id, test.is_outer, tuple(questions))
+
+
+def get_answer_key(test_id):
+    """
+    Ключ ответов теста из кеша; собирается заново после любого изменения теста,
+    его вопросов или вариантов ответов (см. api/simple_tests/signals.py).
+    """
+    key = f'answer_key_{ANSWER_KEY_FORMAT}_{test_id}_{content_version(test_id)}'
+    answer_key = cache.get(key)
+    if answer_key is None:
+        answer_key = compile_answer_key(test_id)
+        cache.set(key, answer_key, CONTENT_TIMEOUT)
+    return answer_key
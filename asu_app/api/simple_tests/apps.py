@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class SimpleTestsConfig(AppConfig):
     name = 'api.simple_tests'
     verbose_name = 'Управление тестами'
+
+    def ready(self):
+        from api.simple_tests import signals  # noqa: F401 — подключаем сброс кешей содержимого тестов
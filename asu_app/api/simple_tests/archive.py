@@ -0,0 +1,63 @@
+import datetime
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from api.simple_tests.gradebook import rebuild_gradebook, recount_suspended
+from api.simple_tests.models import (
+    AnswerSelection, ArchivedAnswerSelection, ArchivedTestsResult, TestsResult,
+)
+
+
+ARCHIVE_BATCH_SIZE = 1000  # Сколько результатов переносится в одной транзакции
+
+
+
+def academic_year_start(year):
+    # Начало учебного года year/year+1 по местному времени
+    return timezone.make_aware(datetime.datetime(year, settings.ACADEMIC_YEAR_START_MONTH, 1))
+
+
+def archive_results(before, batch_size=ARCHIVE_BATCH_SIZE):
+    """
+    Переносит результаты тестов, завершённые раньше before, вместе с ответами в архивные таблицы.
+    Каждая порция переносится одной транзакцией. Журнал групп строится по оперативным результатам
+    и после переноса пересобирается один раз (пересчёт на удаление каждого результата отключён).
+    Возвращает число перенесённых результатов.
+    """
+    archived = 0
+    with recount_suspended():
+        while True:
+            with transaction.atomic():
+                results = list(
+                    TestsResult.objects
+                    .filter(completion_date__lt=before)
+                    .order_by('id')
+                    .values_list('id', 'student_id', 'test_id', 'mark', 'completion_date')[:batch_size]
+                )
+                if not results:
+                    break
+                result_ids = [result[0] for result in results]
+
+                ArchivedTestsResult.objects.bulk_create([
+                    ArchivedTestsResult(
+                        id=result_id, student_id=student_id, test_id=test_id, mark=mark, completion_date=completion_date,
+                    )
+                    for result_id, student_id, test_id, mark, completion_date in results
+                ])
+                ArchivedAnswerSelection.objects.bulk_create(
+                    [
+                        ArchivedAnswerSelection(test_result_id=result_id, question_id=question_id, options=options)
+                        for result_id, question_id, options in AnswerSelection.objects.filter(
+                            test_result_id__in=result_ids,
+                        ).values_list('test_result_id', 'question_id', 'options').iterator()
+                    ],
+                    batch_size=batch_size,
+                )
+                TestsResult.objects.filter(id__in=result_ids).delete()
+            archived += len(results)
+
+    if archived:
+        rebuild_gradebook()
+    return archived
@@ -0,0 +1,88 @@
+import datetime
+
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from api.simple_tests.models import AttemptStatus, TestAttempt
+
+
+
+def used_attempts(test_id, student):
+    # Число завершённых попыток — COUNT по индексу (test, student, status)
+    return TestAttempt.objects.filter(
+        test_id=test_id, student=student, status=AttemptStatus.SUBMITTED,
+    ).count()
+
+
+def active_attempt(test_id, student):
+    # Текущая незавершённая попытка студента (не больше одной, см. unique_active_test_attempt)
+    return TestAttempt.objects.filter(
+        test_id=test_id, student=student, status=AttemptStatus.IN_PROGRESS,
+    ).first()
+
+
+def start_attempt(test_id, student, timer):
+    """
+    Начинает попытку с ограничением времени timer минут.
+    Если параллельный запрос того же студента успел начать попытку раньше — возвращает её.
+    """
+    started_at = timezone.now()
+    try:
+        with transaction.atomic():
+            return TestAttempt.objects.create(
+                test_id=test_id,
+                student=student,
+                started_at=started_at,
+                deadline=started_at + datetime.timedelta(minutes=timer),
+            )
+    except IntegrityError:
+        return active_attempt(test_id, student)
+
+
+def remaining_seconds(attempt):
+    # Оставшееся время попытки (отрицательное — время вышло)
+    return int((attempt.deadline - timezone.now()).total_seconds())
+
+
+def finish_attempt(test_id, student, result):
+    """
+    Завершает текущую попытку, привязывая к ней результат. Вызывается в транзакции сохранения результата.
+    Если попытка не начиналась (тест открыт до появления попыток), она записывается задним числом.
+    """
+    finished = TestAttempt.objects.filter(
+        test_id=test_id, student=student, status=AttemptStatus.IN_PROGRESS,
+    ).update(status=AttemptStatus.SUBMITTED, result=result)
+    if not finished:
+        _record_attempt(test_id, student.pk, result)
+
+
+def close_attempt(test_id, student):
+    """
+    Завершает текущую попытку без результата — ответы приняты, но ещё не проверены (см. submissions.py).
+    Возвращает id попытки или None, если попытка не начиналась.
+    """
+    attempt_id = TestAttempt.objects.filter(
+        test_id=test_id, student=student, status=AttemptStatus.IN_PROGRESS,
+    ).values_list('id', flat=True).first()
+    if attempt_id is not None:
+        TestAttempt.objects.filter(pk=attempt_id).update(status=AttemptStatus.SUBMITTED)
+    return attempt_id
+
+
+def attach_result(attempt_id, test_id, student_id, result):
+    # Привязывает результат проверки к попытке, завершённой при приёме ответов
+    if attempt_id is None or not TestAttempt.objects.filter(pk=attempt_id).update(result=result):
+        _record_attempt(test_id, student_id, result)
+
+
+def _record_attempt(test_id, student_id, result):
+    # Попытка задним числом — для ответов, отправленных без начатой попытки
+    finished_at = timezone.now()
+    TestAttempt.objects.create(
+        test_id=test_id,
+        student_id=student_id,
+        started_at=finished_at,
+        deadline=finished_at,
+        status=AttemptStatus.SUBMITTED,
+        result=result,
+    )
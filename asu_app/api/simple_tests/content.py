@@ -0,0 +1,85 @@
+import time  # Начальное значение версии содержимого
+from collections import namedtuple
+
+from django.core.cache import cache
+
+from api.simple_tests.models import Test
+from api.simple_tests.serializers import TestDetailSerializer
+
+
+# Закешированное содержимое теста: поля для проверок доступности и готовый ответ TestDetailSerializer
+TestPayload = namedtuple('TestPayload', ['test_id', 'start_date', 'end_date', 'attempts', 'timer', 'data'])
+
+CONTENT_TIMEOUT = 60 * 60 * 24  # Данные меняются только вместе с версией, TTL лишь освобождает место
+BUILD_LOCK_TIMEOUT = 30  # Сколько секунд блокировка сборки считается действующей
+
+
+
+def _version_key(test_id):
+    # Префикс указан в L2_ONLY кеша по умолчанию: увеличение версии сразу видят все воркеры
+    return f'test_content_version_{test_id}'
+
+
+def content_version(test_id):
+    """
+    Версия содержимого теста (сам тест, вопросы, варианты ответов) — часть ключей
+    всех закешированных по тесту данных.
+    """
+    key = _version_key(test_id)
+    version = cache.get(key)
+    if version is None:
+        # Если версию вытеснили из кеша, новая не должна совпасть ни с одной из прежних
+        cache.add(key, time.time_ns(), None)
+        version = cache.get(key)
+    return version
+
+
+def invalidate_test_content(test_id):
+    # Новая версия делает недействительными все закешированные данные теста
+    content_version(test_id)
+    try:
+        cache.incr(_version_key(test_id))
+    except ValueError:
+        # Версию успели вытеснить из кеша между чтением и увеличением
+        cache.set(_version_key(test_id), time.time_ns(), None)
+
+
+
+def _build_payload(test_id):
+    test = Test.objects.prefetch_related('questions__answers').get(pk=test_id)
+    return TestPayload(
+        test.id, test.start_date, test.end_date, test.attempts, test.timer,
+        TestDetailSerializer(test).data,
+    )
+
+
+def _latest_key(test_id):
+    # Последнее собранное содержимое теста любой версии — отдаётся, пока собирается новая
+    return f'test_payload_{test_id}_latest'
+
+
+def get_test_payload(test_id):
+    """
+    Содержимое теста для прохождения из кеша. При промахе данные собирает один воркер, остальные
+    не ждут его: до готовности новой версии они отдают предыдущую. Если предыдущей нет (тест
+    ещё ни разу не собирался или её вытеснили), воркер собирает данные сам.
+    """
+    key = f'test_payload_{test_id}_{content_version(test_id)}'
+    payload = cache.get(key)
+    if payload is not None:
+        return payload
+
+    lock_key = f'{key}_building'
+    locked = cache.add(lock_key, True, BUILD_LOCK_TIMEOUT)
+    if not locked:
+        payload = cache.get(_latest_key(test_id))
+        if payload is not None:
+            return payload
+
+    try:
+        payload = _build_payload(test_id)
+        cache.set_many({key: payload, _latest_key(test_id): payload}, CONTENT_TIMEOUT)
+    finally:
+        if locked:
+            cache.delete(lock_key)
+    return payload
@@ -0,0 +1,128 @@
+import threading  # Воркер может обслуживать запросы в нескольких потоках
+import time  # Время сохранения ответов сравнивается между воркерами
+
+from django.conf import settings
+from django.db import close_old_connections, connection, transaction
+
+from api.simple_tests.models import AttemptStatus, TestAttempt
+
+
+SAVED_AT = 'saved_at'  # Ключ черновика в базе: время сохранения каждого ответа
+
+
+
+def draft_answers(data):
+    # Ответы на вопросы из тела запроса (ключи question_<id>); остальные ключи не сохраняются
+    return {key: value for key, value in data.items() if key.startswith('question_')}
+
+
+class DraftBuffer:
+    """
+    Черновики ответов начатых попыток в памяти процесса с отложенной записью в базу.
+
+    Автосохранение дополняет буфер воркера под блокировкой и не обращается ни к базе, ни к общему кешу
+    (по умолчанию он тоже хранится в базе). Буфер записывается в TestAttempt.draft фоновым таймером
+    не позже чем через flush_interval секунд после первого несохранённого ответа: на попытку —
+    SELECT ... FOR UPDATE и один UPDATE. Ответы разных воркеров сливаются, для одного вопроса
+    остаётся ответ, сохранённый последним. Ответ, сохранённый через другой воркер, виден после
+    его сброса; при отправке теста ответы из запроса важнее черновика.
+    """
+
+    def __init__(self, flush_interval, clock=time.time, timer=threading.Timer):
+        self._flush_interval = flush_interval
+        self._clock = clock
+        self._timer_factory = timer
+        self._timer = None  # Таймер отложенного сброса, пока буфер не пуст
+        self._lock = threading.Lock()
+        self._pending = {}  # attempt_id -> {ключ ответа: (ответ, время сохранения)}
+
+    def save(self, attempt, answers):
+        """
+        Дополняет черновик попытки: ответы на одни и те же вопросы заменяются последними.
+        Возвращает черновик целиком.
+        """
+        moment = self._clock()
+        with self._lock:
+            self._pending.setdefault(attempt.id, {}).update(
+                (name, (value, moment)) for name, value in answers.items()
+            )
+            self._schedule_flush()
+        return self.load(attempt)
+
+    def load(self, attempt):
+        # Черновик из базы, дополненный ответами из буфера этого воркера, сохранёнными позже
+        draft = draft_answers(attempt.draft)
+        saved_at = attempt.draft.get(SAVED_AT, {})
+        with self._lock:
+            pending = dict(self._pending.get(attempt.id, {}))
+        for name, (value, moment) in pending.items():
+            if moment >= saved_at.get(name, 0):
+                draft[name] = value
+        return draft
+
+    def discard(self, attempt_id):
+        # Ответы отправлены — несохранённая часть черновика больше не нужна
+        with self._lock:
+            self._pending.pop(attempt_id, None)
+
+    def flush(self):
+        """
+        Немедленно записывает буфер в базу.
+        """
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            batch, self._pending = self._pending, {}
+
+        for attempt_id, answers in batch.items():
+            self._write(attempt_id, answers)
+
+    def _flush_in_background(self):
+        # Поток таймера открывает собственное соединение с базой — закрываем его после записи
+        close_old_connections()
+        try:
+            self.flush()
+        finally:
+            connection.close()
+
+    def _schedule_flush(self):
+        # Вызывается под блокировкой: один таймер на буфер, сброс — через flush_interval после первого ответа
+        if self._timer is None:
+            self._timer = self._timer_factory(self._flush_interval, self._flush_in_background)
+            self._timer.daemon = True  # Таймер не должен задерживать остановку воркера
+            self._timer.start()
+
+    @staticmethod
+    def _write(attempt_id, answers):
+        with transaction.atomic():
+            attempt = (
+                TestAttempt.objects.select_for_update()
+                .filter(pk=attempt_id, status=AttemptStatus.IN_PROGRESS)
+                .only('draft')
+                .first()
+            )
+            if attempt is None:
+                return  # Попытка уже завершена
+            draft, saved_at = dict(attempt.draft), dict(attempt.draft.get(SAVED_AT, {}))
+            for name, (value, moment) in answers.items():
+                if moment >= saved_at.get(name, 0):
+                    draft[name], saved_at[name] = value, moment
+            draft[SAVED_AT] = saved_at
+            TestAttempt.objects.filter(pk=attempt_id).update(draft=draft)
+
+
+# Один буфер на процесс: общий для всех потоков воркера
+buffer = DraftBuffer(flush_interval=settings.TEST_DRAFT_FLUSH_INTERVAL)
+
+
+def load_draft(attempt):
+    return buffer.load(attempt)
+
+
+def save_draft(attempt, answers):
+    return buffer.save(attempt, answers)
+
+
+def discard_draft(attempt):
+    buffer.discard(attempt.id)
@@ -0,0 +1,121 @@
+import csv
+import datetime
+from collections import defaultdict
+
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+
+from api.simple_tests.models import AnswerOption, AnswerSelection
+from api.simple_tests.xlsx import XLSX_CONTENT_TYPE, stream_xlsx
+
+
+EXPORT_CHUNK_SIZE = 2000  # Сколько строк читается из базы за один раз
+
+# Колонки выгрузки: путь к полю и заголовок
+RESULT_COLUMNS = (
+    ('id', 'Результат'),
+    ('completion_date', 'Дата завершения'),
+    ('student__last_name', 'Фамилия'),
+    ('student__first_name', 'Имя'),
+    ('student__group__name', 'Группа'),
+    ('test__name', 'Тест'),
+    ('mark', 'Оценка'),
+)
+
+# Ответы выгружаются по строке на каждый вариант ответа вопроса: колонки ответа на вопрос и колонки варианта
+ANSWER_COLUMNS = (
+    ('test_result_id', 'Результат'),
+    ('test_result__completion_date', 'Дата завершения'),
+    ('test_result__student__last_name', 'Фамилия'),
+    ('test_result__student__first_name', 'Имя'),
+    ('test_result__student__group__name', 'Группа'),
+    ('test_result__test__name', 'Тест'),
+    ('question__question', 'Вопрос'),
+)
+OPTION_TITLES = ('Вариант ответа', 'Верный', 'Выбран')
+
+
+
+class Echo:
+    # Псевдофайл для csv.writer: вместо записи возвращает готовую строку
+    def write(self, value):
+        return value
+
+
+def local_value(value):
+    # Время — местное и без часового пояса (XLSX не хранит пояс)
+    return timezone.localtime(value).replace(tzinfo=None) if isinstance(value, datetime.datetime) else value
+
+
+def export_values(queryset, fields):
+    """
+    Строки выгрузки. Читаются из базы порциями по EXPORT_CHUNK_SIZE как кортежи значений,
+    без создания объектов моделей, — память не зависит от их количества.
+    """
+    rows = queryset.values_list(*fields).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+    for row in rows:
+        yield [local_value(value) for value in row]
+
+
+def export_rows(queryset, columns):
+    # Заголовок и строки выгрузки
+    yield [title for _, title in columns]
+    yield from export_values(queryset, [field for field, _ in columns])
+
+
+def answer_rows(results, selection_model):
+    """
+    Заголовок и строки выгрузки ответов: по строке на каждый вариант ответа вопроса в версии,
+    действовавшей на момент прохождения. Версии вариантов тестов выгружаемых результатов читаются
+    один раз и держатся в памяти.
+    """
+    options = defaultdict(list)
+    test_options = AnswerOption.versions.filter(question__test__in=results.values('test_id')).order_by('id')
+    for question_id, *option in test_options.values_list(
+        'question_id', 'id', 'answer', 'is_right', 'valid_from', 'valid_to',
+    ):
+        options[question_id].append([local_value(value) for value in option])
+
+    selections = selection_model.objects.filter(test_result__in=results.values('id')).order_by('test_result_id', 'id')
+    fields = [field for field, _ in ANSWER_COLUMNS] + ['question_id', 'options', 'test_result__completion_date']
+    yield [title for _, title in ANSWER_COLUMNS] + list(OPTION_TITLES)
+    for *row, question_id, checked, completed in export_values(selections, fields):
+        for option_id, answer, is_right, valid_from, valid_to in options[question_id]:
+            if (valid_from is None or valid_from <= completed) and (valid_to is None or valid_to > completed):
+                yield row + [answer, is_right, option_id in checked]
+
+
+def csv_response(rows, filename):
+    writer = csv.writer(Echo())
+
+    def stream():
+        yield '\ufeff'  # BOM — чтобы Excel распознал UTF-8
+        for row in rows:
+            yield writer.writerow(row)
+
+    response = StreamingHttpResponse(stream(), content_type='text/csv; charset=utf-8')
+    response['Content-Disposition'] = f'attachment; filename="{filename}.csv"'
+    return response
+
+
+def xlsx_response(rows, filename):
+    # Архив XLSX собирается по мере чтения строк и отдаётся порциями, как и CSV
+    response = StreamingHttpResponse(stream_xlsx(rows, EXPORT_CHUNK_SIZE), content_type=XLSX_CONTENT_TYPE)
+    response['Content-Disposition'] = f'attachment; filename="{filename}.xlsx"'
+    return response
+
+
+def export_results(results, with_answers=False, file_type='csv', selection_model=AnswerSelection):
+    """
+    Выгрузка результатов тестов (или, с with_answers, ответов по каждому варианту) в CSV или XLSX.
+    results — уже ограниченный правами пользователя queryset результатов; для архивных результатов
+    selection_model — ArchivedAnswerSelection.
+    """
+    if with_answers:
+        rows, filename = answer_rows(results, selection_model), 'answer_results'
+    else:
+        rows, filename = export_rows(results.order_by('id'), RESULT_COLUMNS), 'test_results'
+
+    if file_type == 'xlsx':
+        return xlsx_response(rows, filename)
+    return csv_response(rows, filename)
@@ -0,0 +1,122 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.db import IntegrityError, models, transaction
+from django.db.models import Case, F, Value, When
+from django.db.models.functions import Coalesce
+
+from api.simple_tests.models import GradebookEntry, Test, TestsResult
+from api.users.models import User
+
+
+# Путь от теста до предмета: через лабораторную или через лекцию
+TEST_SUBJECT = Coalesce('lab__semester__subject_id', 'lecture__semester__subject_id')
+
+# Пересчёт записей на удаление результатов отложен вызывающим кодом (только в его потоке)
+_recount_suspended = ContextVar('gradebook_recount_suspended', default=False)
+
+
+
+def test_subject_id(test_id):
+    return Test.objects.filter(pk=test_id).values_list(TEST_SUBJECT, flat=True).first()
+
+
+def record_result(result):
+    """
+    Учитывает новый результат в журнале: одно UPDATE существующей записи
+    или, для первого результата студента по тесту, одно INSERT.
+    """
+    mark = Value(result.mark, output_field=models.DecimalField(max_digits=4, decimal_places=2))
+    entries = GradebookEntry.objects.filter(student_id=result.student_id, test_id=result.test_id)
+    changes = {
+        # CASE, а не GREATEST: в SQLite MAX() сравнивает число с параметром-строкой как текст
+        'best_mark': Case(When(best_mark__lt=mark, then=mark), default=F('best_mark')),
+        'last_mark': result.mark,
+        'results_count': F('results_count') + 1,
+        'last_result': result,
+    }
+    if entries.update(**changes):
+        return
+
+    try:
+        with transaction.atomic():
+            GradebookEntry.objects.create(
+                student_id=result.student_id,
+                test_id=result.test_id,
+                group_id=User.objects.filter(pk=result.student_id).values_list('group_id', flat=True).first(),
+                subject_id=test_subject_id(result.test_id),
+                best_mark=result.mark,
+                last_mark=result.mark,
+                results_count=1,
+                last_result=result,
+            )
+    except IntegrityError:
+        # Параллельно сохранённый результат того же студента успел создать запись
+        entries.update(**changes)
+
+
+@contextmanager
+def recount_suspended():
+    """
+    Отключает пересчёт журнала на удаление результатов в текущем потоке: массовое удаление
+    пересобирает журнал один раз в конце. Остальные потоки и запросы пересчитывают как обычно.
+    """
+    token = _recount_suspended.set(True)
+    try:
+        yield
+    finally:
+        _recount_suspended.reset(token)
+
+
+def recount_entry(student_id, test_id):
+    """
+    Пересчитывает запись журнала по оставшимся результатам (после удаления результата).
+    Записи не создаёт: тест или студент могут удаляться в этой же транзакции.
+    """
+    if _recount_suspended.get():
+        return
+    results = TestsResult.objects.filter(student_id=student_id, test_id=test_id)
+    last = results.order_by('-id').first()  # completion_date может совпадать — порядок сохранения по id
+    entries = GradebookEntry.objects.filter(student_id=student_id, test_id=test_id)
+    if last is None:
+        entries.delete()
+        return
+
+    entries.update(
+        best_mark=results.aggregate(best=models.Max('mark'))['best'],
+        last_mark=last.mark,
+        results_count=results.count(),
+        last_result=last,
+    )
+
+
+def rebuild_gradebook():
+    """
+    Пересобирает журнал целиком из результатов тестов. Возвращает число записей.
+    """
+    entries = {}
+    results = (
+        TestsResult.objects
+        .order_by('id')
+        .values_list(
+            'id', 'student_id', 'test_id', 'mark', 'student__group_id',
+            Coalesce('test__lab__semester__subject_id', 'test__lecture__semester__subject_id'),
+        )
+    )
+    for result_id, student_id, test_id, mark, group_id, subject_id in results.iterator():
+        entry = entries.get((student_id, test_id))
+        if entry is None:
+            entries[(student_id, test_id)] = GradebookEntry(
+                student_id=student_id, test_id=test_id, group_id=group_id, subject_id=subject_id,
+                best_mark=mark, last_mark=mark, results_count=1, last_result_id=result_id,
+            )
+            continue
+        entry.best_mark = max(entry.best_mark, mark)
+        entry.last_mark = mark
+        entry.results_count += 1
+        entry.last_result_id = result_id
+
+    with transaction.atomic():
+        GradebookEntry.objects.all().delete()
+        GradebookEntry.objects.bulk_create(entries.values(), batch_size=1000)
+    return len(entries)
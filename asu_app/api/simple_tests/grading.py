@@ -0,0 +1,67 @@
+from django.db import transaction
+
+from api.simple_tests.attempts import finish_attempt
+from api.simple_tests.models import AnswerSelection, TestsResult
+
+
+
+def grade_answers(answer_key, submitted):
+    """
+    Считает оценку по ответам студента без обращений к базе.
+    answer_key — скомпилированный ключ ответов (см. answer_keys.py); submitted(question_id) —
+    множество выбранных текстов ответов на вопрос. Возвращает оценку и несохранённые AnswerSelection
+    (id выбранных вариантов) по каждому вопросу, на который студент ответил.
+    """
+    max_weight = 0
+    result_weight = 0
+    selections = []
+
+    for question in answer_key.questions:
+        max_weight += question.weight
+        answers = submitted(question.id)
+        if not answers:
+            continue
+
+        # Подсчёт веса выбранных ответов (у неправильных вес отрицательный)
+        answers_result_weight = 0
+        checked = []
+        for option in question.options:
+            if option.answer in answers:
+                answers_result_weight += option.weight
+                checked.append(option.id)
+
+        # Ответ на вопрос — одна строка со списком выбранных вариантов
+        selections.append(AnswerSelection(question_id=question.id, options=checked))
+
+        # Обнуляем отрицательные значения
+        if answers_result_weight < 0:
+            answers_result_weight = 0
+
+        # Учитываем вес вопроса при подсчёте итогов
+        result_weight += question.weight * (answers_result_weight / question.answers_max_weight)
+
+    result_mark = round((result_weight / max_weight) * 10, 2) if max_weight else 0
+    mark = -1 if answer_key.is_outer else result_mark
+    return mark, selections
+
+
+def submitted_answers(data):
+    # Выбранные студентом тексты ответов на вопрос из тела запроса (ключи question_<id>)
+    return lambda question_id: set(data.get(f'question_{question_id}') or ())
+
+
+def submit_test(answer_key, student, data):
+    """
+    Проверяет ответы студента (data — тело запроса с ключами question_<id>) и сохраняет результат:
+    одна транзакция, один INSERT результата, один пакетный INSERT ответов и завершение попытки.
+    """
+    mark, selections = grade_answers(answer_key, submitted_answers(data))
+
+    with transaction.atomic():
+        result = TestsResult.objects.create(student=student, test_id=answer_key.test_id, mark=mark)
+        for selection in selections:
+            selection.test_result = result
+        AnswerSelection.objects.bulk_create(selections)
+        finish_attempt(answer_key.test_id, student, result)
+
+    return result
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from api.simple_tests.archive import ARCHIVE_BATCH_SIZE, academic_year_start, archive_results
+
+
+class Command(BaseCommand):
+    help = 'Переносит результаты тестов прошлых учебных лет в архивные таблицы ' \
+           '(доступны в API по параметру ?archive=1). Запускается оператором, например раз в год ' \
+           'после начала учебного года (make archive-results YEAR=...)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--year', type=int, required=True,
+            help='Первый учебный год, который остаётся в оперативных таблицах (например, 2024 для 2024/2025)',
+        )
+        parser.add_argument('--batch-size', type=int, default=ARCHIVE_BATCH_SIZE, help='Результатов в одной транзакции')
+
+    def handle(self, *args, **options):
+        year = options['year']
+        archived = archive_results(academic_year_start(year), options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Перенесено в архив результатов до {year}/{year + 1} учебного года: {archived}'
+        ))
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from api.simple_tests.models import AttemptStatus, TestAttempt, TestsResult
+
+
+class Command(BaseCommand):
+    help = 'Создаёт завершённые попытки (TestAttempt) для результатов тестов, сохранённых до их появления'
+
+    def handle(self, *args, **options):
+        results = TestsResult.objects.filter(attempt__isnull=True).only('id', 'test_id', 'student_id', 'completion_date')
+        created = TestAttempt.objects.bulk_create(
+            [
+                TestAttempt(
+                    test_id=result.test_id,
+                    student_id=result.student_id,
+                    started_at=result.completion_date,
+                    deadline=result.completion_date,
+                    status=AttemptStatus.SUBMITTED,
+                    result=result,
+                )
+                for result in results.iterator()
+            ],
+            batch_size=1000,
+        )
+        self.stdout.write(self.style.SUCCESS(f'Создано попыток: {len(created)}'))
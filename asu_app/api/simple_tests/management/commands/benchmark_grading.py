@@ -0,0 +1,91 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from api.simple_tests.answer_keys import get_answer_key
+from api.simple_tests.grading import submit_test
+from api.simple_tests.submissions import grade_pending, ingest_submission
+from api.simple_tests.models import AnswerOption, Question, Test
+from api.users.models import User, UserRole
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = 'Замеряет пропускную способность сохранения результатов теста (отправок в секунду). ' \
+           'Все созданные данные откатываются.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--questions', type=int, default=40, help='Вопросов в тесте')
+        parser.add_argument('--options', type=int, default=4, help='Вариантов ответа на вопрос')
+        parser.add_argument('--submissions', type=int, default=200, help='Количество отправок')
+        parser.add_argument(
+            '--ingest', action='store_true',
+            help='Приём без проверки (как в конце экзамена): отдельно замеряются приём ответов и их проверка воркером',
+        )
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                self.run(options['questions'], options['options'], options['submissions'], options['ingest'])
+                raise Rollback
+        except Rollback:
+            pass
+
+    def run(self, questions_count, options_count, submissions, ingest):
+        test = Test.objects.create(name=f'benchmark_grading_{time.time_ns()}', attempts=submissions, timer=60)
+        # Вопросы — по одному: не все СУБД возвращают первичные ключи из bulk_create
+        questions = [
+            Question.objects.create(test=test, question=f'Вопрос {number}') for number in range(questions_count)
+        ]
+        AnswerOption.objects.bulk_create([
+            AnswerOption(question=question, answer=f'Ответ {number}', is_right=number == 0)
+            for question in questions for number in range(options_count)
+        ])
+        student = User.objects.create(
+            username=f'benchmark_{time.time_ns()}', first_name='-', last_name='-', role=UserRole.STUDENT,
+        )
+        # Студент отвечает на все вопросы, выбирая первый вариант
+        data = {f'question_{question.id}': ['Ответ 0'] for question in questions}
+
+        title = f'{questions_count} вопросов × {options_count} вариантов, {submissions} отправок'
+        if ingest:
+            self.run_ingest(title, test, student, data, submissions)
+            return
+
+        with CaptureQueriesContext(connection) as queries:
+            started = time.perf_counter()
+            for _ in range(submissions):
+                # Как в TestViewSet.update: ключ ответов берётся из кеша на каждую отправку
+                submit_test(get_answer_key(test.pk), student, data)
+            elapsed = time.perf_counter() - started
+
+        self.stdout.write(f'{title}: {self.rate(submissions, elapsed, queries)}')
+
+    def run_ingest(self, title, test, student, data, submissions):
+        # Приём: то, что выполняется в запросе студента
+        with CaptureQueriesContext(connection) as queries:
+            started = time.perf_counter()
+            for _ in range(submissions):
+                ingest_submission(get_answer_key(test.pk).test_id, student, data)
+            elapsed = time.perf_counter() - started
+        self.stdout.write(f'{title}, приём: {self.rate(submissions, elapsed, queries)}')
+
+        # Проверка: то, что выполняет воркер grade_submissions после волны отправок
+        with CaptureQueriesContext(connection) as queries:
+            started = time.perf_counter()
+            while grade_pending():
+                pass
+            elapsed = time.perf_counter() - started
+        self.stdout.write(f'{title}, проверка воркером: {self.rate(submissions, elapsed, queries)}')
+
+    @staticmethod
+    def rate(submissions, elapsed, queries):
+        return (
+            f'{submissions / elapsed:.1f} отправок/с, '
+            f'{elapsed / submissions * 1000:.2f} мс и {len(queries) / submissions:.1f} запросов на отправку'
+        )
@@ -0,0 +1,93 @@
+import datetime
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Max, Min
+
+from api.simple_tests.models import AnswerOption, AnswerResult, AnswerSelection
+
+
+class Command(BaseCommand):
+    help = 'Однократный перенос ответов из прежнего формата (AnswerResult — строка на каждый вариант ответа) ' \
+           'в AnswerSelection (строка на вопрос со списком id выбранных вариантов). Перенесённые строки ' \
+           'удаляются в той же транзакции, поэтому повторный запуск переносит только оставшееся'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500, help='Результатов тестов в одной транзакции')
+
+    def handle(self, *args, **options):
+        if not AnswerResult.objects.exists():
+            self.stdout.write(self.style.SUCCESS('Ответов в прежнем формате нет'))
+            return
+
+        option_ids = self.option_ids()
+        result_ids = list(
+            AnswerResult.objects.order_by('test_result_id').values_list('test_result_id', flat=True).distinct()
+        )
+        batch_size = options['batch_size']
+        for start in range(0, len(result_ids), batch_size):
+            self.convert(result_ids[start:start + batch_size], option_ids)
+
+        self.stdout.write(self.style.SUCCESS(f'Перенесено результатов: {len(result_ids)}'))
+
+    def option_ids(self):
+        """
+        Соответствие (вопрос, текст варианта) → id версии варианта. Тексты, которых среди вариантов
+        вопроса уже нет (вариант изменили или удалили после прохождения), сохраняются закрытыми версиями
+        AnswerOption, действовавшими с первого до последнего результата с этим текстом.
+        """
+        option_ids = {
+            (question_id, answer): option_id
+            for option_id, question_id, answer in AnswerOption.objects.values_list('id', 'question_id', 'answer')
+        }
+
+        missing = {}
+        legacy = (
+            AnswerResult.objects
+            .values('question_id', 'answer_text', 'is_right')
+            .annotate(first=Min('test_result__completion_date'), last=Max('test_result__completion_date'))
+            .order_by()
+        )
+        for row in legacy.iterator():
+            key = (row['question_id'], row['answer_text'])
+            if key in option_ids:
+                continue
+            is_right, first, last = missing.get(key, (False, row['first'], row['last']))
+            missing[key] = (is_right or row['is_right'], min(first, row['first']), max(last, row['last']))
+
+        with transaction.atomic():
+            for (question_id, answer), (is_right, first, last) in missing.items():
+                option = AnswerOption(
+                    question_id=question_id, answer=answer, is_right=is_right,
+                    valid_from=first, valid_to=last + datetime.timedelta(microseconds=1),
+                )
+                option.save()
+                option_ids[question_id, answer] = option.id
+        if missing:
+            self.stdout.write(self.style.WARNING(f'Восстановлено изменённых или удалённых вариантов: {len(missing)}'))
+        return option_ids
+
+    @staticmethod
+    def convert(result_ids, option_ids):
+        with transaction.atomic():
+            rows = (
+                AnswerResult.objects
+                .filter(test_result_id__in=result_ids)
+                .order_by('id')
+                .values_list('test_result_id', 'question_id', 'answer_text', 'is_checked')
+            )
+
+            selections = {}
+            for result_id, question_id, answer_text, is_checked in rows.iterator():
+                checked = selections.setdefault((result_id, question_id), [])
+                if is_checked:
+                    checked.append(option_ids[question_id, answer_text])
+
+            AnswerSelection.objects.bulk_create(
+                [
+                    AnswerSelection(test_result_id=result_id, question_id=question_id, options=checked)
+                    for (result_id, question_id), checked in selections.items()
+                ],
+                batch_size=1000,
+            )
+            AnswerResult.objects.filter(test_result_id__in=result_ids).delete()
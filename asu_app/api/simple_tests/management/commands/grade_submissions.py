@@ -0,0 +1,27 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from api.simple_tests.submissions import GRADE_BATCH_SIZE, POLL_INTERVAL, grade_pending
+
+
+class Command(BaseCommand):
+    help = 'Фоновый воркер: проверяет ответы на тесты, принятые без проверки (TestSubmission). ' \
+           'Можно запускать несколько воркеров одновременно'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Проверить накопившуюся очередь и завершиться')
+        parser.add_argument('--batch-size', type=int, default=GRADE_BATCH_SIZE, help='Ответов в одной транзакции')
+
+    def handle(self, *args, **options):
+        graded = 0
+        while True:
+            count = grade_pending(options['batch_size'])
+            graded += count
+            if count:
+                continue
+            if options['once']:
+                break
+            time.sleep(POLL_INTERVAL)
+
+        self.stdout.write(self.style.SUCCESS(f'Проверено ответов: {graded}'))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from api.simple_tests.gradebook import rebuild_gradebook
+
+
+class Command(BaseCommand):
+    help = 'Пересобирает сводную таблицу журнала (GradebookEntry) из результатов тестов'
+
+    def handle(self, *args, **options):
+        entries = rebuild_gradebook()
+        self.stdout.write(self.style.SUCCESS(f'Журнал пересобран: {entries} записей'))
@@ -1,6 +1,9 @@
-from datetime import datetime
-from django.db import models
-from api.subjects.models import Lab, Lecture
+from django.core.exceptions import ValidationError
+from django.db import models, transaction
+from django.db.models import Q
+from django.utils import timezone
+from api.groups.models import Group
+from api.subjects.models import Lab, Lecture, Subject
 from django.conf import settings
 from django.shortcuts import reverse
 
@@ -133,8 +136,28 @@ class Question(models.Model):
         verbose_name_plural = 'Вопросы'
 
 
-# Варианты ответов к вопросу
+class AnswerOptionQuerySet(models.QuerySet):
+    def as_of(self, moment):
+        # Версии вариантов, действовавшие в момент moment (дата или выражение, например подзапрос даты результата)
+        return self.filter(
+            Q(valid_from__isnull=True) | Q(valid_from__lte=moment),
+            Q(valid_to__isnull=True) | Q(valid_to__gt=moment),
+        )
+
+
+class CurrentAnswerOptionManager(models.Manager.from_queryset(AnswerOptionQuerySet)):
+    # Действующие версии: их видят прохождение теста, ключи ответов, админка и question.answers
+    def get_queryset(self):
+        return super().get_queryset().filter(valid_to__isnull=True)
+
+
+# Варианты ответов к вопросу. Ответы студентов ссылаются на id вариантов (AnswerSelection.options), поэтому
+# варианты хранятся версиями: изменение текста, верности или веса закрывает прежнюю версию (valid_to)
+# и создаёт новую, удаление только закрывает версию. Результат показывается с версиями, действовавшими
+# на момент его завершения (AnswerOption.versions.as_of)
 class AnswerOption(models.Model):
+    VERSIONED_FIELDS = ('answer', 'is_right', 'weight')
+
     question = models.ForeignKey(
         Question,
         on_delete=models.CASCADE,
@@ -153,13 +176,56 @@ class AnswerOption(models.Model):
         default=1
     )
 
+    # Пустое начало — версия действует с момента создания вопроса (в том числе варианты, созданные до версий)
+    valid_from = models.DateTimeField(null=True, blank=True, editable=False, verbose_name='Действует с')
+    valid_to = models.DateTimeField(null=True, blank=True, editable=False, verbose_name='Действует до')
+
+    objects = CurrentAnswerOptionManager()
+    versions = AnswerOptionQuerySet.as_manager()  # Все версии, включая закрытые
+
     def __str__(self):
         return 'Вариант ответа к вопросу "{}"'.format(self.question.question)
 
+    def validate_unique(self, exclude=None):
+        # Уникальность текста среди действующих вариантов вопроса (условное ограничение формы не проверяют)
+        super().validate_unique(exclude)
+        if self.question_id is None or 'answer' in (exclude or ()):
+            return
+        if AnswerOption.objects.filter(question_id=self.question_id, answer=self.answer).exclude(pk=self.pk).exists():
+            raise ValidationError({'answer': 'Такой вариант ответа у вопроса уже есть.'})
+
+    def save(self, *args, **kwargs):
+        if self.pk is None or self.valid_to is not None:
+            return super().save(*args, **kwargs)
+
+        previous = AnswerOption.versions.filter(pk=self.pk).values(*self.VERSIONED_FIELDS).first()
+        if previous is None or all(previous[field] == getattr(self, field) for field in self.VERSIONED_FIELDS):
+            return super().save(*args, **kwargs)
+
+        # Изменение содержимого — новая версия; прежняя остаётся для уже сохранённых ответов
+        now = timezone.now()
+        with transaction.atomic():
+            AnswerOption.versions.filter(pk=self.pk).update(valid_to=now)
+            self.pk, self.valid_from = None, now
+            self._state.adding = True
+            super().save(using=kwargs.get('using'))
+
+    def delete(self, using=None, keep_parents=False):
+        # Вариант, на который могли ответить, закрывается, а не удаляется.
+        # Удаление вопроса или теста удаляет все версии каскадом
+        self.valid_to = timezone.now()
+        self.save(update_fields=['valid_to'], using=using)
+        return 1, {self._meta.label: 1}
+
     class Meta:
         verbose_name = 'Вариант ответа'
         verbose_name_plural = 'Варианты ответов'
-        unique_together = ('answer', 'question')  # Запрещаем одинаковые тексты ответов для одного вопроса
+        constraints = [
+            # Запрещаем одинаковые тексты действующих вариантов ответа одного вопроса
+            models.UniqueConstraint(
+                fields=['answer', 'question'], condition=Q(valid_to__isnull=True), name='unique_current_answer_option',
+            ),
+        ]
 
 
 # Результат прохождения теста конкретным студентом
@@ -185,7 +251,7 @@ class TestsResult(models.Model):
     )
 
     completion_date = models.DateTimeField(
-        default=datetime.now(),
+        default=timezone.now,  # По дате завершения выбираются версии вариантов ответа (AnswerOption.versions)
         verbose_name='Дата завершения'
     )
 
@@ -198,7 +264,9 @@ class TestsResult(models.Model):
         verbose_name_plural = 'Результаты тестов'
 
 
-# Результаты ответов на каждый вопрос в тесте
+# Результаты ответов на каждый вопрос в тесте — прежний формат хранения: строка на каждый вариант ответа
+# с копией его текста. Новые ответы сохраняются в AnswerSelection, старые переносятся туда командой
+# convert_answer_results (перенесённые строки удаляются)
 class AnswerResult(models.Model):
     test_result = models.ForeignKey(
         TestsResult,
@@ -225,3 +293,305 @@ class AnswerResult(models.Model):
     class Meta:
         verbose_name = 'Результат варианта ответа'
         verbose_name_plural = 'Результат вариантов ответов'
+
+
+# Ответ студента на вопрос: одна строка на вопрос со списком id выбранных вариантов ответа.
+# Текст и верность вариантов берутся из версий AnswerOption на момент прохождения, а не копируются
+class AnswerSelection(models.Model):
+    test_result = models.ForeignKey(
+        TestsResult,
+        on_delete=models.CASCADE,
+        related_name='selections',
+        verbose_name='Результат теста'
+    )
+
+    question = models.ForeignKey(
+        Question,
+        on_delete=models.CASCADE,
+        related_name='selections',
+        verbose_name='Вопрос'
+    )
+
+    options = models.JSONField(default=list, blank=True, verbose_name='Выбранные варианты ответов (id)')
+
+    def __str__(self):
+        return 'Ответ на вопрос "{}"'.format(self.question.question)
+
+    class Meta:
+        verbose_name = 'Ответ на вопрос'
+        verbose_name_plural = 'Ответы на вопросы'
+        constraints = [
+            models.UniqueConstraint(fields=['test_result', 'question'], name='unique_answer_selection'),
+        ]
+
+
+# Состояния попытки прохождения теста
+class AttemptStatus:
+    IN_PROGRESS = 'in_progress'
+    SUBMITTED = 'submitted'
+
+    CHOICES = (
+        (IN_PROGRESS, 'Выполняется'),
+        (SUBMITTED, 'Завершена'),
+    )
+
+
+# Попытка прохождения теста: начинается при открытии теста студентом и завершается отправкой ответов.
+# Хранится в базе, поэтому оставшееся время одинаково на любом воркере и переживает перезапуск
+class TestAttempt(models.Model):
+    test = models.ForeignKey(
+        Test,
+        on_delete=models.CASCADE,
+        related_name='test_attempts',
+        verbose_name='Тест'
+    )
+
+    student = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='test_attempts',
+        verbose_name='Студент'
+    )
+
+    started_at = models.DateTimeField(default=timezone.now, verbose_name='Начало')
+    deadline = models.DateTimeField(verbose_name='Время окончания')
+
+    status = models.CharField(
+        max_length=20,
+        choices=AttemptStatus.CHOICES,
+        default=AttemptStatus.IN_PROGRESS,
+        verbose_name='Состояние'
+    )
+
+    result = models.OneToOneField(
+        TestsResult,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='attempt',
+        verbose_name='Результат'
+    )
+
+    # Автосохранённые ответы (ключи question_<id>); последние — в памяти воркеров, см. api/simple_tests/drafts.py
+    draft = models.JSONField(default=dict, blank=True, verbose_name='Черновик ответов')
+
+    def __str__(self):
+        return 'Попытка студента "{}" по тесту "{}"'.format(self.student, self.test.name)
+
+    class Meta:
+        verbose_name = 'Попытка прохождения теста'
+        verbose_name_plural = 'Попытки прохождения тестов'
+        indexes = [
+            # Подсчёт попыток и поиск текущей — по одному индексу
+            models.Index(fields=['test', 'student', 'status'], name='test_attempt_student_idx'),
+        ]
+        constraints = [
+            # Не больше одной незавершённой попытки у студента на тест
+            models.UniqueConstraint(
+                fields=['test', 'student'],
+                condition=models.Q(status=AttemptStatus.IN_PROGRESS),
+                name='unique_active_test_attempt',
+            ),
+        ]
+
+
+# Состояния принятых ответов, ожидающих проверки
+class SubmissionStatus:
+    PENDING = 'pending'
+    GRADED = 'graded'
+    FAILED = 'failed'
+
+    CHOICES = (
+        (PENDING, 'Ожидает проверки'),
+        (GRADED, 'Проверено'),
+        (FAILED, 'Ошибка проверки'),
+    )
+
+
+# Ответы студента, принятые без проверки: сохраняются как есть одной вставкой,
+# проверяются фоновым воркером grade_submissions (см. api/simple_tests/submissions.py)
+class TestSubmission(models.Model):
+    test = models.ForeignKey(
+        Test,
+        on_delete=models.CASCADE,
+        related_name='submissions',
+        verbose_name='Тест'
+    )
+
+    student = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='test_submissions',
+        verbose_name='Студент'
+    )
+
+    answers = models.JSONField(verbose_name='Ответы (как в запросе)')
+    submitted_at = models.DateTimeField(default=timezone.now, verbose_name='Время отправки')
+
+    status = models.CharField(
+        max_length=20,
+        choices=SubmissionStatus.CHOICES,
+        default=SubmissionStatus.PENDING,
+        verbose_name='Состояние'
+    )
+
+    # Попытка, завершённая при приёме ответов; результат привязывается к ней после проверки
+    attempt = models.ForeignKey(
+        TestAttempt,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='+',
+        verbose_name='Попытка'
+    )
+
+    result = models.OneToOneField(
+        TestsResult,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='submission',
+        verbose_name='Результат'
+    )
+
+    error = models.TextField(blank=True, verbose_name='Ошибка проверки')
+
+    def __str__(self):
+        return 'Ответы студента "{}" по тесту "{}"'.format(self.student, self.test.name)
+
+    def get_absolute_url(self):
+        return reverse('api:testsubmission-detail', kwargs={'pk': self.pk})
+
+    class Meta:
+        verbose_name = 'Принятые ответы'
+        verbose_name_plural = 'Принятые ответы'
+        indexes = [
+            # Очередь воркера: ожидающие проверки в порядке поступления
+            models.Index(fields=['status', 'id'], name='test_submission_queue_idx'),
+        ]
+
+
+# Сводка для журнала группы: лучшая и последняя оценка студента по тесту.
+# Обновляется при каждом сохранении результата (см. api/simple_tests/gradebook.py),
+# поэтому журнал читается одним запросом по индексу, без просмотра всех результатов
+class GradebookEntry(models.Model):
+    student = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='gradebook_entries',
+        verbose_name='Студент'
+    )
+
+    test = models.ForeignKey(
+        Test,
+        on_delete=models.CASCADE,
+        related_name='gradebook_entries',
+        verbose_name='Тест'
+    )
+
+    # Группа студента и предмет теста — копии для выборки журнала по индексу
+    group = models.ForeignKey(
+        Group,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='gradebook_entries',
+        verbose_name='Группа'
+    )
+
+    subject = models.ForeignKey(
+        Subject,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='gradebook_entries',
+        verbose_name='Предмет'
+    )
+
+    best_mark = models.DecimalField(max_digits=4, decimal_places=2, verbose_name='Лучшая оценка')
+    last_mark = models.DecimalField(max_digits=4, decimal_places=2, verbose_name='Последняя оценка')
+    results_count = models.PositiveIntegerField(default=0, verbose_name='Количество результатов')
+
+    last_result = models.ForeignKey(
+        TestsResult,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='+',
+        verbose_name='Последний результат'
+    )
+
+    def __str__(self):
+        return 'Журнал: студент "{}", тест "{}"'.format(self.student, self.test.name)
+
+    class Meta:
+        verbose_name = 'Запись журнала'
+        verbose_name_plural = 'Записи журнала'
+        constraints = [
+            models.UniqueConstraint(fields=['student', 'test'], name='unique_gradebook_entry'),
+        ]
+        indexes = [
+            models.Index(fields=['group', 'subject'], name='gradebook_group_subject_idx'),
+        ]
+
+
+# Архив результатов прошлых учебных лет (см. api/simple_tests/archive.py): те же поля и те же id,
+# что у TestsResult, но в отдельной таблице, поэтому оперативные таблицы остаются небольшими
+class ArchivedTestsResult(models.Model):
+    id = models.IntegerField(primary_key=True, verbose_name='ID исходного результата')
+
+    student = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='archived_test_results',
+        verbose_name='Студент'
+    )
+
+    test = models.ForeignKey(
+        Test,
+        on_delete=models.CASCADE,
+        related_name='archived_results',
+        verbose_name='Тест'
+    )
+
+    mark = models.DecimalField(
+        max_digits=4,
+        decimal_places=2,
+        verbose_name='Оценка'
+    )
+
+    completion_date = models.DateTimeField(verbose_name='Дата завершения')
+
+    def __str__(self):
+        return 'Архив: студент "{}" завершил тест "{}" с оценкой "{}"'.format(
+            self.student, self.test.name, self.mark)
+
+    class Meta:
+        verbose_name = 'Архивный результат теста'
+        verbose_name_plural = 'Архивные результаты тестов'
+
+
+# Ответы архивного результата — в том же формате, что AnswerSelection
+class ArchivedAnswerSelection(models.Model):
+    test_result = models.ForeignKey(
+        ArchivedTestsResult,
+        on_delete=models.CASCADE,
+        related_name='selections',
+        verbose_name='Результат теста'
+    )
+
+    question = models.ForeignKey(
+        Question,
+        on_delete=models.CASCADE,
+        related_name='archived_selections',
+        verbose_name='Вопрос'
+    )
+
+    options = models.JSONField(default=list, blank=True, verbose_name='Выбранные варианты ответов (id)')
+
+    class Meta:
+        verbose_name = 'Архивный ответ на вопрос'
+        verbose_name_plural = 'Архивные ответы на вопросы'
+        constraints = [
+            models.UniqueConstraint(fields=['test_result', 'question'], name='unique_archived_answer_selection'),
+        ]
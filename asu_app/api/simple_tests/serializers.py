@@ -1,5 +1,6 @@
 from rest_framework import serializers
-from api.simple_tests.models import Test, Question, AnswerOption, TestsResult, AnswerResult
+from api.simple_tests.models import Test, Question, AnswerOption, TestsResult, TestSubmission
+from asu_app.media import SignedImageField
 
 
 # Простой сериализатор для базовой информации о тесте
@@ -59,23 +60,28 @@ class TestResultSerializer(serializers.ModelSerializer):
             return instance.student.group.name
 
 
-# Сериализатор для одного варианта ответа с информацией, был ли выбран и был ли верным
-class AnswerResultSerializer(serializers.ModelSerializer):
-    answer = serializers.CharField(read_only=True, source="answer_text")  # Переименование поля
-
-    class Meta:
-        model = AnswerResult
-        fields = ('is_right', 'is_checked', 'answer', 'id')
-
-
 # Сериализатор для вопроса с результатами по каждому варианту ответа
 class QuestionResultSerializer(serializers.ModelSerializer):
-    answers_res = AnswerResultSerializer(read_only=True, many=True)
+    image = SignedImageField(read_only=True)
+    answers_res = serializers.SerializerMethodField()
 
     class Meta:
         model = Question
         fields = ('question', 'image', 'answers_res', 'id')
 
+    # Каждый вариант ответа с информацией, был ли выбран и был ли верным.
+    # Ответ этого результата на вопрос подгружается в result_selections, а в answers — версии вариантов
+    # на момент прохождения (см. TestResultViewSet.retrieve)
+    @staticmethod
+    def get_answers_res(instance):
+        if not instance.result_selections:
+            return []  # На вопрос не ответили
+        checked = set(instance.result_selections[0].options)
+        return [
+            {'is_right': answer.is_right, 'is_checked': answer.id in checked, 'answer': answer.answer, 'id': answer.id}
+            for answer in instance.answers.all()
+        ]
+
 
 # Сериализатор для теста, включающего результаты по каждому вопросу
 class TestForResultSerializer(serializers.ModelSerializer):
@@ -93,3 +99,13 @@ class TestResultDetailSerializer(serializers.ModelSerializer):
     class Meta:
         model = TestsResult
         fields = '__all__'
+
+
+# Ответы, принятые без проверки: состояние проверки и, когда она завершена, результат
+class TestSubmissionSerializer(serializers.ModelSerializer):
+    result = TestResultSerializer(read_only=True)
+    url = serializers.CharField(source='get_absolute_url', read_only=True)  # Адрес для опроса состояния
+
+    class Meta:
+        model = TestSubmission
+        fields = ('id', 'test', 'status', 'submitted_at', 'result', 'url')
@@ -0,0 +1,59 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from api.simple_tests.content import invalidate_test_content
+from api.simple_tests.gradebook import record_result, recount_entry, test_subject_id
+from api.simple_tests.models import AnswerOption, GradebookEntry, Question, Test, TestsResult
+from api.users.models import User
+
+
+# Сброс закешированного содержимого тестов: ключей ответов и данных для прохождения
+# (см. api/simple_tests/content.py)
+
+
+
+@receiver([post_save, post_delete], sender=Test)
+def test_changed(sender, instance, **kwargs):
+    invalidate_test_content(instance.pk)
+
+
+@receiver([post_save, post_delete], sender=Question)
+def question_changed(sender, instance, **kwargs):
+    invalidate_test_content(instance.test_id)
+
+
+@receiver([post_save, post_delete], sender=AnswerOption)
+def answer_option_changed(sender, instance, **kwargs):
+    # Вопрос мог уже удалиться каскадом вместе с тестом — тогда сбрасывать нечего
+    test_id = Question.objects.filter(pk=instance.question_id).values_list('test_id', flat=True).first()
+    if test_id is not None:
+        invalidate_test_content(test_id)
+
+
+
+# Поддержка сводной таблицы журнала (см. api/simple_tests/gradebook.py)
+
+@receiver(post_save, sender=TestsResult)
+def result_saved(sender, instance, created, **kwargs):
+    if created:
+        record_result(instance)
+
+
+@receiver(post_delete, sender=TestsResult)
+def result_deleted(sender, instance, **kwargs):
+    recount_entry(instance.student_id, instance.test_id)
+
+
+# Студента перевели в другую группу — его записи переходят в журнал новой группы
+@receiver(post_save, sender=User)
+def student_group_changed(sender, instance, update_fields=None, **kwargs):
+    if update_fields is not None and 'group' not in update_fields:
+        return  # Например, обновление last_login при входе
+    GradebookEntry.objects.filter(student=instance).exclude(group_id=instance.group_id).update(group_id=instance.group_id)
+
+
+# Тест перенесли к другой лабораторной или лекции — записи переходят к её предмету
+@receiver(post_save, sender=Test)
+def test_subject_changed(sender, instance, created, **kwargs):
+    if not created:
+        GradebookEntry.objects.filter(test=instance).update(subject_id=test_subject_id(instance.pk))
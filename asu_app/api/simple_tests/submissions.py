@@ -0,0 +1,74 @@
+from django.conf import settings
+from django.db import transaction
+
+from api.simple_tests.answer_keys import get_answer_key
+from api.simple_tests.attempts import attach_result, close_attempt
+from api.simple_tests.grading import grade_answers, submitted_answers
+from api.simple_tests.models import AnswerSelection, SubmissionStatus, TestsResult, TestSubmission
+
+
+GRADE_BATCH_SIZE = 50  # Сколько принятых ответов воркер проверяет в одной транзакции
+POLL_INTERVAL = 0.5  # Пауза воркера при пустой очереди
+
+
+
+def wants_async(request):
+    # Ответы принимаются без проверки для всех (TEST_SUBMISSIONS_ASYNC) или по заголовку Prefer: respond-async
+    return settings.TEST_SUBMISSIONS_ASYNC or 'respond-async' in request.headers.get('Prefer', '')
+
+
+def ingest_submission(test_id, student, data):
+    """
+    Принимает ответы студента без проверки: одна вставка ответов как есть и завершение текущей попытки,
+    чтобы тест нельзя было продолжить. Оценку выставит воркер grade_submissions.
+    """
+    # QueryDict (форма) приводится к словарю с теми же значениями, что возвращает data.get()
+    answers = data.dict() if hasattr(data, 'dict') else data
+    with transaction.atomic():
+        attempt_id = close_attempt(test_id, student)
+        return TestSubmission.objects.create(test_id=test_id, student=student, answers=answers, attempt_id=attempt_id)
+
+
+def grade_submission(submission):
+    # Проверка принятых ответов так же, как при отправке в запросе (см. grading.submit_test)
+    answer_key = get_answer_key(submission.test_id)
+    mark, selections = grade_answers(answer_key, submitted_answers(submission.answers))
+
+    result = TestsResult.objects.create(
+        student_id=submission.student_id,
+        test_id=submission.test_id,
+        mark=mark,
+        completion_date=submission.submitted_at,
+    )
+    for selection in selections:
+        selection.test_result = result
+    AnswerSelection.objects.bulk_create(selections)
+    attach_result(submission.attempt_id, submission.test_id, submission.student_id, result)
+
+    submission.status = SubmissionStatus.GRADED
+    submission.result = result
+    submission.save(update_fields=['status', 'result'])
+    return result
+
+
+def grade_pending(limit=GRADE_BATCH_SIZE):
+    """
+    Проверяет порцию ожидающих ответов в порядке поступления. Строки блокируются с SKIP LOCKED,
+    поэтому параллельные воркеры берут разные порции. Возвращает число обработанных ответов.
+    """
+    with transaction.atomic():
+        submissions = list(
+            TestSubmission.objects
+            .select_for_update(skip_locked=True)
+            .filter(status=SubmissionStatus.PENDING)
+            .order_by('id')[:limit]
+        )
+        for submission in submissions:
+            try:
+                with transaction.atomic():
+                    grade_submission(submission)
+            except Exception as error:  # Ответы, которые не удаётся проверить, не должны останавливать очередь
+                submission.status = SubmissionStatus.FAILED
+                submission.error = repr(error)
+                submission.save(update_fields=['status', 'error'])
+    return len(submissions)
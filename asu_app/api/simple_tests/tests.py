@@ -1,3 +1,833 @@
+import csv
+import datetime
+import io
+import time
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth.models import Permission
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+
+from api.simple_tests import content, drafts
+from api.simple_tests.answer_keys import get_answer_key
+from api.simple_tests.attempts import start_attempt
+from api.simple_tests.drafts import draft_answers
+from api.simple_tests.gradebook import rebuild_gradebook, recount_suspended
+from api.simple_tests.grading import submit_test
+from api.simple_tests.submissions import grade_pending
+from api.simple_tests.models import (
+    AnswerOption, AnswerResult, AnswerSelection, ArchivedAnswerSelection, ArchivedTestsResult, AttemptStatus,
+    GradebookEntry, Question, SubmissionStatus, Test, TestAttempt, TestsResult, TestSubmission,
+)
+from api.groups.models import Group, Speciality
+from api.subjects.models import Lab, Semester, Subject
+from api.users.models import User, UserRole
+from asu_app.testing import ConstantQueriesMixin, FakeTimer
+
+
+class TestResultDetailQueriesTestCase(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.test = Test.objects.create(name='Сети: тест 1', attempts=3, timer=10)
+        self.student = User.objects.create(
+            username='student', first_name='Иван', last_name='Иванов', role=UserRole.STUDENT,
+        )
+        self.other_student = User.objects.create(
+            username='other', first_name='Пётр', last_name='Петров', role=UserRole.STUDENT,
+        )
+        self.token = Token.objects.create(user=self.student)
+        self.result = TestsResult.objects.create(student=self.student, test=self.test, mark=10)
+        self.other_result = TestsResult.objects.create(student=self.other_student, test=self.test, mark=5)
+
+    def add_questions(self, count):
+        for number in range(count):
+            question = Question.objects.create(question=f'Вопрос {number}', test=self.test)
+            right = AnswerOption.objects.create(question=question, answer='Да', is_right=True)
+            wrong = AnswerOption.objects.create(question=question, answer='Нет', is_right=False)
+            # Ответы обоих студентов — в деталях результата должны остаться только свои
+            AnswerSelection.objects.create(test_result=self.result, question=question, options=[right.id])
+            AnswerSelection.objects.create(test_result=self.other_result, question=question, options=[wrong.id])
+
+    def get_result(self, result):
+        return self.client.get(f'/api/tests-results/{result.id}/', HTTP_AUTHORIZATION=f'Token {self.token.key}')
+
+    def test_query_budget_does_not_depend_on_question_count(self):
+        self.add_questions(2)
+        self.get_result(self.result)  # Прогрев кешей (отметка присутствия)
+
+        # Токен, результат с тестом, вопросы, ответы этого результата, варианты ответов
+        with self.assertNumQueries(5):
+            response = self.get_result(self.result)
+        self.assertEqual(len(response.json()['test']['questions']), 2)
+
+        self.add_questions(10)
+        with self.assertNumQueries(5):
+            response = self.get_result(self.result)
+
+        questions = response.json()['test']['questions']
+        self.assertEqual(len(questions), 12)
+        self.assertEqual(
+            [answer for question in questions for answer in question['answers_res'] if answer['is_checked']],
+            [
+                {'is_right': True, 'is_checked': True, 'answer': 'Да', 'id': option_id}
+                for option_id in AnswerOption.objects.filter(answer='Да').order_by('id').values_list('id', flat=True)
+            ],
+        )
+
+    def test_other_students_results_are_hidden(self):
+        self.assertEqual(self.get_result(self.other_result).status_code, 404)
+
+    def test_legacy_answers_are_converted(self):
+        question = Question.objects.create(question='Вопрос', test=self.test)
+        options = [AnswerOption.objects.create(question=question, answer=text) for text in ('Да', 'Нет', 'Может быть')]
+        for option in options:
+            AnswerResult.objects.create(
+                test_result=self.result, question=question, answer_text=option.answer, is_checked=option.answer != 'Нет',
+            )
+        # Вариант изменили после прохождения: прежний текст есть только в строке AnswerResult
+        AnswerResult.objects.create(test_result=self.result, question=question, answer_text='Удалён', is_checked=True)
+        legacy = list(AnswerResult.objects.order_by('id').values_list('answer_text', 'is_right', 'is_checked'))
+
+        call_command('convert_answer_results', stdout=io.StringIO())
+
+        self.assertFalse(AnswerResult.objects.exists())
+        selection = AnswerSelection.objects.get(test_result=self.result, question=question)
+        recovered = AnswerOption.versions.get(answer='Удалён')
+        self.assertEqual(selection.options, [options[0].id, options[2].id, recovered.id])
+        # Восстановленная версия не попадает в тест, но показывается в результате как прежде
+        self.assertNotIn(recovered, question.answers.all())
+        answers = self.get_result(self.result).json()['test']['questions'][0]['answers_res']
+        self.assertEqual([(answer['answer'], answer['is_right'], answer['is_checked']) for answer in answers], legacy)
+
+    def test_result_keeps_option_versions(self):
+        question = Question.objects.create(question='Вопрос', test=self.test)
+        right = AnswerOption.objects.create(question=question, answer='Да', is_right=True)
+        wrong = AnswerOption.objects.create(question=question, answer='Нет')
+        AnswerSelection.objects.create(test_result=self.result, question=question, options=[right.id])
+
+        # Изменение создаёт новую версию, удаление закрывает версию — результат показывается как при ответе
+        right.answer = 'Верно'
+        right.save()
+        wrong.delete()
+        self.assertNotEqual(right.id, AnswerSelection.objects.get(test_result=self.result).options[0])
+        self.assertEqual(list(question.answers.values_list('answer', flat=True)), ['Верно'])
+
+        answers = self.get_result(self.result).json()['test']['questions'][0]['answers_res']
+        self.assertEqual([(answer['answer'], answer['is_checked']) for answer in answers], [('Да', True), ('Нет', False)])
+
+
+class SubmitTestTestCase(TestCase):
+
+    def setUp(self):
+        cache.clear()  # Ключи ответов кешируются между тестами
+        self.test = Test.objects.create(name='Сети: тест 1', attempts=3, timer=10)
+        self.questions = []
+        for number in range(5):
+            question = Question.objects.create(question=f'Вопрос {number}', test=self.test)
+            AnswerOption.objects.create(question=question, answer='Да', is_right=True)
+            AnswerOption.objects.create(question=question, answer='Нет', is_right=False, weight=-1)
+            self.questions.append(question)
+        self.student = User.objects.create(
+            username='student', first_name='Иван', last_name='Иванов', role=UserRole.STUDENT,
+        )
+
+    def test_answers_are_saved_with_one_insert(self):
+        # Верно отвечены 3 вопроса из 5, на последний ответа нет
+        data = {f'question_{question.id}': ['Да'] for question in self.questions[:3]}
+        data[f'question_{self.questions[3].id}'] = ['Нет']
+        answer_key = get_answer_key(self.test.pk)
+        start_attempt(self.test.pk, self.student, self.test.timer)
+
+        with CaptureQueriesContext(connection) as queries:
+            result = submit_test(answer_key, self.student, data)
+
+        content_tables = (Question._meta.db_table, AnswerOption._meta.db_table)
+        statements = [query['sql'] for query in queries]
+        self.assertFalse([sql for sql in statements if any(table in sql for table in content_tables)])
+        answer_inserts = [
+            sql for sql in statements if sql.startswith(f'INSERT INTO "{AnswerSelection._meta.db_table}"')
+        ]
+        self.assertEqual(len(answer_inserts), 1)  # Все ответы одним пакетом
+        self.assertEqual(result.attempt.status, AttemptStatus.SUBMITTED)
+        self.assertEqual(float(result.mark), 6.0)
+        # Строка на каждый отвеченный вопрос, а не на каждый вариант ответа
+        selections = {selection.question_id: selection.options for selection in result.selections.all()}
+        self.assertEqual(len(selections), 4)
+        self.assertEqual(selections[self.questions[3].id], [self.questions[3].answers.get(answer='Нет').id])
+
+    def test_answers_keep_options_as_answered(self):
+        question = self.questions[0]
+        right, wrong = question.answers.order_by('id')
+        result = submit_test(get_answer_key(self.test.pk), self.student, {f'question_{question.id}': ['Да']})
+
+        # Вариант ответа изменили после прохождения: результат показывается как при ответе
+        option = AnswerOption.objects.get(pk=right.pk)
+        option.answer, option.is_right = 'Изменён', False
+        option.save()
+        token = Token.objects.create(user=self.student)
+        response = self.client.get(f'/api/tests-results/{result.id}/', HTTP_AUTHORIZATION=f'Token {token.key}')
+        answers = next(item for item in response.json()['test']['questions'] if item['id'] == question.id)
+        self.assertEqual(answers['answers_res'], [
+            {'is_right': True, 'is_checked': True, 'answer': 'Да', 'id': right.id},
+            {'is_right': False, 'is_checked': False, 'answer': 'Нет', 'id': wrong.id},
+        ])
+
+    def test_answer_key_follows_content_changes(self):
+        get_answer_key(self.test.pk)
+        with CaptureQueriesContext(connection) as queries:
+            answer_key = get_answer_key(self.test.pk)
+        # Из общего кеша (в тестах — таблица в базе) читается только версия содержимого
+        self.assertEqual(len(queries), 1)
+        self.assertIn('test_content_version', queries[0]['sql'])
+        self.assertEqual(answer_key.questions[0].answers_max_weight, 1)
+
+        option = self.questions[0].answers.get(answer='Нет')
+        option.is_right = True
+        option.weight = 2
+        option.save()
+        self.assertEqual(get_answer_key(self.test.pk).questions[0].answers_max_weight, 3)
+
+        self.questions[4].delete()
+        self.assertEqual(len(get_answer_key(self.test.pk).questions), 4)
+
+
+class TestPayloadCacheTestCase(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        now = datetime.datetime.now(datetime.timezone.utc)
+        self.test = Test.objects.create(
+            name='Сети: тест 1', attempts=3, timer=10,
+            start_date=now - datetime.timedelta(days=1), end_date=now + datetime.timedelta(days=1),
+        )
+        question = Question.objects.create(question='Вопрос', test=self.test)
+        self.option = AnswerOption.objects.create(question=question, answer='Да', is_right=True)
+        student = User.objects.create(
+            username='student', first_name='Иван', last_name='Иванов', role=UserRole.STUDENT,
+        )
+        self.token = Token.objects.create(user=student)
+
+    def get_test(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(f'/api/tests/{self.test.id}/', HTTP_AUTHORIZATION=f'Token {self.token.key}')
+        self.assertEqual(response.status_code, 200)
+        content_tables = (Question._meta.db_table, AnswerOption._meta.db_table)
+        content_queries = [query for query in queries if any(table in query['sql'] for table in content_tables)]
+        return response.json(), content_queries
+
+    def test_payload_is_shared_and_follows_edits(self):
+        self.get_test()
+        data, content_queries = self.get_test()
+        self.assertEqual(content_queries, [])
+        self.assertEqual(data['questions'][0]['answers'][0]['answer'], 'Да')
+        self.assertIn('estimated_time', data)
+
+        self.option.answer = 'Верно'
+        self.option.save()
+        data, _ = self.get_test()
+        self.assertEqual(data['questions'][0]['answers'][0]['answer'], 'Верно')
+
+    def test_image_links_are_signed_per_request(self):
+        Question.objects.filter(test=self.test).update(image='question_pictures/схема.png')
+        data, _ = self.get_test()
+        image = data['questions'][0]['image']
+        self.assertTrue(image.startswith('/media/question_pictures/'))
+        self.assertIn('signature=', image)
+
+        # Содержимое теста берётся из кеша, а подпись — новая, когда срок прежней подходит к концу
+        with mock.patch('asu_app.media.time.time', return_value=time.time() + settings.MEDIA_URL_MAX_AGE):
+            data, _ = self.get_test()
+        self.assertNotEqual(data['questions'][0]['image'], image)
+
+    def test_concurrent_miss_serves_previous_version_without_waiting(self):
+        previous, _ = self.get_test()
+        self.option.answer = 'Верно'
+        self.option.save()
+        version = content.content_version(self.test.id)
+        cache.add(f'test_payload_{self.test.id}_{version}_building', True)  # Новую версию собирает другой воркер
+
+        with mock.patch.object(content, '_build_payload') as build, mock.patch('time.sleep') as sleep:
+            data, _ = self.get_test()
+        build.assert_not_called()
+        sleep.assert_not_called()
+        self.assertEqual(data['questions'], previous['questions'])
+
+    def test_concurrent_miss_without_previous_version_builds_locally(self):
+        version = content.content_version(self.test.id)
+        cache.add(f'test_payload_{self.test.id}_{version}_building', True)
+
+        with mock.patch('time.sleep') as sleep:
+            data, _ = self.get_test()
+        sleep.assert_not_called()
+        self.assertEqual(data['questions'][0]['answers'][0]['answer'], 'Да')
+
+
+class TestAttemptTestCase(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        now = datetime.datetime.now(datetime.timezone.utc)
+        self.test = Test.objects.create(
+            name='Сети: тест 1', attempts=2, timer=10,
+            start_date=now - datetime.timedelta(days=1), end_date=now + datetime.timedelta(days=1),
+        )
+        question = Question.objects.create(question='Вопрос', test=self.test)
+        AnswerOption.objects.create(question=question, answer='Да', is_right=True)
+        self.question = question
+        self.student = User.objects.create(
+            username='student', first_name='Иван', last_name='Иванов', role=UserRole.STUDENT,
+        )
+        self.token = Token.objects.create(user=self.student)
+
+    def open_test(self):
+        return self.client.get(f'/api/tests/{self.test.id}/', HTTP_AUTHORIZATION=f'Token {self.token.key}')
+
+    def submit_test(self):
+        return self.client.put(
+            f'/api/tests/{self.test.id}/', {f'question_{self.question.id}': ['Да']},
+            content_type='application/json', HTTP_AUTHORIZATION=f'Token {self.token.key}',
+        )
+
+    def test_reopening_continues_the_same_attempt(self):
+        estimated_time = self.open_test().json()['estimated_time']
+        self.assertTrue(590 <= estimated_time <= 600)
+
+        # Время идёт от начала попытки, а не от последнего открытия
+        TestAttempt.objects.update(deadline=timezone.now() + datetime.timedelta(minutes=3))
+        cache.clear()  # Локальные кеши воркера не влияют на оставшееся время
+        self.assertTrue(170 <= self.open_test().json()['estimated_time'] <= 180)
+        self.assertEqual(TestAttempt.objects.count(), 1)
+
+    def test_attempts_are_counted_by_submissions(self):
+        for _ in range(2):
+            self.assertEqual(self.open_test().status_code, 200)
+            self.assertEqual(self.submit_test().status_code, 200)
+
+        self.assertEqual(TestAttempt.objects.filter(status=AttemptStatus.SUBMITTED).count(), 2)
+        self.assertEqual(self.open_test().status_code, 400)
+
+
+class GradebookTestCase(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.group = Group.objects.create(name='АСОИ-211', speciality=Speciality.objects.create(name='АСОИ'))
+        self.subject = Subject.objects.create(name='Сети')
+        lab = Lab.objects.create(
+            name='Лаба 1', semester=Semester.objects.create(name='1', subject=self.subject), file='labs/lab.pdf',
+        )
+        self.tests = [
+            Test.objects.create(name=f'Сети: тест {number}', lab=lab, attempts=3, timer=10) for number in range(2)
+        ]
+        self.students = [
+            User.objects.create(
+                username=f'student{number}', first_name='Иван', last_name=f'Иванов{number}',
+                role=UserRole.STUDENT, group=self.group,
+            )
+            for number in range(2)
+        ]
+        self.teacher = User.objects.create(
+            username='teacher', first_name='Пётр', last_name='Петров', role=UserRole.TEACHER,
+        )
+        self.teacher.teacher_subjects.add(self.subject)
+        self.token = Token.objects.create(user=self.teacher)
+
+    def get_report(self, query=''):
+        return self.client.get(
+            f'{self.group.get_report_url()}{query}', HTTP_AUTHORIZATION=f'Token {self.token.key}',
+        )
+
+    def test_entries_follow_results(self):
+        student, test = self.students[0], self.tests[0]
+        first = TestsResult.objects.create(student=student, test=test, mark=6)
+        TestsResult.objects.create(student=student, test=test, mark=9)
+        last = TestsResult.objects.create(student=student, test=test, mark=7)
+
+        entry = GradebookEntry.objects.get(student=student, test=test)
+        self.assertEqual((entry.best_mark, entry.last_mark, entry.results_count), (9, 7, 3))
+        self.assertEqual((entry.group_id, entry.subject_id), (self.group.id, self.subject.id))
+
+        last.delete()
+        entry.refresh_from_db()
+        self.assertEqual((entry.best_mark, entry.last_mark, entry.results_count), (9, 9, 2))
+
+        first.delete()
+        TestsResult.objects.filter(student=student).delete()
+        self.assertFalse(GradebookEntry.objects.exists())
+
+    def test_rebuild_matches_incremental_updates(self):
+        for mark in (6, 9, 7):
+            TestsResult.objects.create(student=self.students[1], test=self.tests[1], mark=mark)
+        expected = list(GradebookEntry.objects.values('student', 'test', 'best_mark', 'last_mark', 'results_count'))
+
+        self.assertEqual(rebuild_gradebook(), 1)
+        self.assertEqual(
+            list(GradebookEntry.objects.values('student', 'test', 'best_mark', 'last_mark', 'results_count')),
+            expected,
+        )
+
+    def test_report_is_read_with_constant_queries(self):
+        TestsResult.objects.create(student=self.students[0], test=self.tests[0], mark=8)
+        self.get_report()  # Прогрев кешей (область доступа, отметка присутствия)
+
+        with CaptureQueriesContext(connection) as few:
+            self.get_report()
+        for student in self.students:
+            for test in self.tests:
+                TestsResult.objects.create(student=student, test=test, mark=5)
+        with CaptureQueriesContext(connection) as many:
+            response = self.get_report(f'?subject={self.subject.id}')
+
+        self.assertEqual(len(few), len(many))
+        report = response.json()
+        self.assertEqual([test['id'] for test in report['tests']], [test.id for test in self.tests])
+        marks = report['students'][0]['marks'][str(self.tests[0].id)]
+        self.assertEqual((marks['best'], marks['last'], marks['results_count']), ('8.00', '5.00', 2))
+
+    def test_students_cannot_read_reports(self):
+        self.token = Token.objects.create(user=self.students[0])
+        self.assertEqual(self.get_report().status_code, 403)
+
+
+class ResultsExportTestCase(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.subject = Subject.objects.create(name='Сети')
+        lab = Lab.objects.create(
+            name='Лаба 1', semester=Semester.objects.create(name='1', subject=self.subject), file='labs/lab.pdf',
+        )
+        test = Test.objects.create(name='Сети: тест 1', lab=lab, attempts=3, timer=10)
+        other_test = Test.objects.create(name='Чужой тест', attempts=3, timer=10)
+        question = Question.objects.create(question='Вопрос', test=test)
+        option = AnswerOption.objects.create(question=question, answer='Да')
+        student = User.objects.create(
+            username='student', first_name='Иван', last_name='Иванов', role=UserRole.STUDENT,
+        )
+        for number in range(3):
+            result = TestsResult.objects.create(student=student, test=test, mark=number)
+            AnswerSelection.objects.create(test_result=result, question=question, options=[option.id])
+        TestsResult.objects.create(student=student, test=other_test, mark=10)
+
+        teacher = User.objects.create(username='teacher', first_name='Пётр', last_name='Петров', role=UserRole.TEACHER)
+        teacher.teacher_subjects.add(self.subject)
+        self.token = Token.objects.create(user=teacher)
+
+    def export(self, query):
+        response = self.client.get(
+            f'/api/tests-results/export/{query}', HTTP_AUTHORIZATION=f'Token {self.token.key}',
+        )
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def read_csv(self, response):
+        self.assertTrue(response.streaming)
+        content = b''.join(response.streaming_content).decode('utf-8-sig')
+        return list(csv.reader(io.StringIO(content)))
+
+    def test_csv_export_is_streamed_and_scoped(self):
+        rows = self.read_csv(self.export('?type=csv'))
+        self.assertEqual(rows[0][0], 'Результат')
+        # Результат по тесту чужого предмета в выгрузку не попадает
+        self.assertEqual([row[-1] for row in rows[1:]], ['0.00', '1.00', '2.00'])
+
+        rows = self.read_csv(self.export('?answers=1'))
+        self.assertEqual(len(rows), 4)
+        self.assertEqual(rows[1][-4:], ['Вопрос', 'Да', 'False', 'True'])
+
+    def test_xlsx_export(self):
+        from openpyxl import load_workbook
+
+        response = self.export('?type=xlsx')
+        self.assertTrue(response.streaming)
+        sheet = load_workbook(io.BytesIO(b''.join(response.streaming_content))).active
+        rows = list(sheet.values)
+        self.assertEqual(len(rows), 4)
+        self.assertEqual(rows[0][0], 'Результат')
+        self.assertIsInstance(rows[1][1], datetime.datetime)  # Дата завершения — ячейка с датой, а не текст
+        self.assertEqual([row[-1] for row in rows[1:]], [0, 1, 2])
+
+        sheet = load_workbook(io.BytesIO(b''.join(self.export('?type=xlsx&answers=1').streaming_content))).active
+        self.assertEqual(list(sheet.values)[1][-4:], ('Вопрос', 'Да', False, True))
+
+
+class TestAnalysisTestCase(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.subject = Subject.objects.create(name='Сети')
+        lab = Lab.objects.create(
+            name='Лаба 1', semester=Semester.objects.create(name='1', subject=self.subject), file='labs/lab.pdf',
+        )
+        self.test = Test.objects.create(name='Сети: тест 1', lab=lab, attempts=3, timer=10)
+        self.questions = []
+        for number in range(2):
+            question = Question.objects.create(question=f'Вопрос {number}', test=self.test)
+            AnswerOption.objects.create(question=question, answer='Да', is_right=True)
+            AnswerOption.objects.create(question=question, answer='Нет', is_right=False, weight=-1)
+            self.questions.append(question)
+
+        # Ответы студентов на два вопроса; последний студент на второй вопрос не ответил
+        answer_key = get_answer_key(self.test.pk)
+        for number, answers in enumerate((('Да', 'Да'), ('Да', 'Нет'), ('Нет', 'Нет'), ('Нет', None))):
+            student = User.objects.create(
+                username=f'student{number}', first_name='Иван', last_name=f'Иванов{number}', role=UserRole.STUDENT,
+            )
+            data = {
+                f'question_{question.id}': [answer] for question, answer in zip(self.questions, answers) if answer
+            }
+            submit_test(answer_key, student, data)
+
+        self.teacher = User.objects.create(
+            username='teacher', first_name='Пётр', last_name='Петров', role=UserRole.TEACHER,
+        )
+        self.teacher.teacher_subjects.add(self.subject)
+        self.token = Token.objects.create(user=self.teacher)
+
+    def get_analysis(self):
+        return self.client.get(
+            f'/api/tests/{self.test.id}/analysis/', HTTP_AUTHORIZATION=f'Token {self.token.key}',
+        )
+
+    def test_item_statistics(self):
+        response = self.get_analysis()
+        self.assertEqual(response.status_code, 200)
+        analysis = response.json()
+        self.assertEqual(analysis['results_count'], 4)
+        self.assertAlmostEqual(analysis['cronbach_alpha'], 0.7273)
+
+        first, second = analysis['questions']
+        self.assertEqual((first['difficulty'], second['difficulty']), (0.5, 0.25))
+        self.assertAlmostEqual(first['discrimination'], 0.5774)
+        self.assertAlmostEqual(second['discrimination'], 0.5774)
+        # Доля выбора варианта считается среди ответивших на вопрос
+        self.assertEqual(second['answered'], 3)
+        self.assertEqual([option['selection_rate'] for option in second['options']], [0.3333, 0.6667])
+
+    def test_analysis_is_cached_until_new_result(self):
+        self.get_analysis()
+        with CaptureQueriesContext(connection) as cached:
+            self.get_analysis()
+        self.assertFalse([query for query in cached if AnswerResult._meta.db_table in query['sql']])
+
+        student = User.objects.get(username='student3')
+        submit_test(get_answer_key(self.test.pk), student, {f'question_{self.questions[1].id}': ['Да']})
+        self.assertEqual(self.get_analysis().json()['results_count'], 5)
+
+    def test_students_cannot_read_analysis(self):
+        self.token = Token.objects.create(user=User.objects.get(username='student0'))
+        self.assertEqual(self.get_analysis().status_code, 403)
+
+
+class ResultsArchiveTestCase(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.test = Test.objects.create(name='Сети: тест 1', attempts=3, timer=10)
+        question = Question.objects.create(question='Вопрос', test=self.test)
+        self.option = AnswerOption.objects.create(question=question, answer='Да', is_right=True)
+        self.student = User.objects.create(
+            username='student', first_name='Иван', last_name='Иванов', role=UserRole.STUDENT,
+        )
+        self.token = Token.objects.create(user=self.student)
+        self.old = TestsResult.objects.create(
+            student=self.student, test=self.test, mark=4,
+            completion_date=timezone.make_aware(datetime.datetime(2023, 5, 1)),
+        )
+        AnswerSelection.objects.create(test_result=self.old, question=question, options=[self.option.id])
+        self.new = TestsResult.objects.create(
+            student=self.student, test=self.test, mark=9,
+            completion_date=timezone.make_aware(datetime.datetime(2024, 9, 2)),
+        )
+
+    def get(self, url):
+        response = self.client.get(url, HTTP_AUTHORIZATION=f'Token {self.token.key}')
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_old_results_are_archived_and_readable(self):
+        call_command('archive_test_results', year=2022, stdout=io.StringIO())
+        self.assertEqual(TestsResult.objects.count(), 2)  # Результат 2022/2023 учебного года остаётся
+
+        call_command('archive_test_results', year=2024, stdout=io.StringIO())
+        self.assertEqual(list(TestsResult.objects.values_list('id', flat=True)), [self.new.id])
+        self.assertEqual(ArchivedAnswerSelection.objects.get().test_result_id, self.old.id)
+        self.assertFalse(AnswerSelection.objects.exists())
+        # Журнал строится по оперативным результатам
+        entry = GradebookEntry.objects.get()
+        self.assertEqual((entry.best_mark, entry.results_count), (9, 1))
+
+        self.assertEqual([result['id'] for result in self.get('/api/tests-results/')], [self.new.id])
+        archive = self.get('/api/tests-results/?archive=1')
+        self.assertEqual([(result['id'], result['mark']) for result in archive], [(self.old.id, '4.00')])
+
+        detail = self.get(f'/api/tests-results/{self.old.id}/?archive=1')
+        self.assertEqual(
+            detail['test']['questions'][0]['answers_res'],
+            [{'is_right': True, 'is_checked': True, 'answer': 'Да', 'id': self.option.id}],
+        )
+
+    def test_archive_is_scoped_by_role(self):
+        call_command('archive_test_results', year=2024, stdout=io.StringIO())
+        self.token = Token.objects.create(
+            user=User.objects.create(username='other', first_name='Пётр', last_name='Петров', role=UserRole.STUDENT),
+        )
+        self.assertEqual(self.get('/api/tests-results/?archive=1'), [])
+
+    def test_year_is_required(self):
+        with self.assertRaises(CommandError):
+            call_command('archive_test_results', stdout=io.StringIO())
+        self.assertEqual(TestsResult.objects.count(), 2)
+
+    def test_recount_is_suspended_only_inside_block(self):
+        with recount_suspended():
+            self.new.delete()
+        self.assertEqual(GradebookEntry.objects.get().results_count, 2)  # Пересобирает вызывающий код
+
+        self.old.delete()
+        self.assertFalse(GradebookEntry.objects.exists())
+
+
+class SubmissionIngestTestCase(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.test = Test.objects.create(name='Сети: тест 1', attempts=3, timer=10)
+        self.question = Question.objects.create(question='Вопрос', test=self.test)
+        AnswerOption.objects.create(question=self.question, answer='Да', is_right=True)
+        AnswerOption.objects.create(question=self.question, answer='Нет', is_right=False, weight=-1)
+        self.student = User.objects.create(
+            username='student', first_name='Иван', last_name='Иванов', role=UserRole.STUDENT,
+        )
+        self.token = Token.objects.create(user=self.student)
+
+    def ingest(self, answers):
+        return self.client.put(
+            f'/api/tests/{self.test.id}/', {f'question_{self.question.id}': answers}, content_type='application/json',
+            HTTP_PREFER='respond-async', HTTP_AUTHORIZATION=f'Token {self.token.key}',
+        )
+
+    def poll(self, url):
+        return self.client.get(url, HTTP_AUTHORIZATION=f'Token {self.token.key}')
+
+    def test_submission_is_accepted_then_graded(self):
+        attempt = start_attempt(self.test.pk, self.student, self.test.timer)
+
+        response = self.ingest(['Да'])
+        self.assertEqual(response.status_code, 202)
+        receipt = response.json()
+        self.assertEqual((receipt['status'], receipt['result']), (SubmissionStatus.PENDING, None))
+        self.assertEqual(response['Location'], receipt['url'])
+        self.assertFalse(TestsResult.objects.exists())
+        # Попытка завершается сразу — продолжить тест после отправки нельзя
+        attempt.refresh_from_db()
+        self.assertEqual(attempt.status, AttemptStatus.SUBMITTED)
+
+        call_command('grade_submissions', once=True, stdout=io.StringIO())
+
+        submission = self.poll(receipt['url']).json()
+        self.assertEqual(submission['status'], SubmissionStatus.GRADED)
+        self.assertEqual(submission['result']['mark'], '10.00')
+        attempt.refresh_from_db()
+        self.assertEqual(attempt.result_id, submission['result']['id'])
+        self.assertEqual(TestAttempt.objects.count(), 1)
+
+    def test_status_is_returned_without_waiting(self):
+        response = self.ingest(['Нет'])
+        self.assertEqual(response['Retry-After'], '1')
+        url = response.json()['url']
+
+        # Пока ответы не проверены, запрос не ждёт воркер, а подсказывает, когда спросить снова
+        with mock.patch('time.sleep') as sleep:
+            response = self.poll(url)
+        sleep.assert_not_called()
+        self.assertEqual(response.json()['status'], SubmissionStatus.PENDING)
+        self.assertEqual(response['Retry-After'], '1')
+
+        grade_pending()
+        response = self.poll(url)
+        submission = response.json()
+        self.assertEqual((submission['status'], submission['result']['mark']), (SubmissionStatus.GRADED, '0.00'))
+        self.assertFalse(response.has_header('Retry-After'))
+
+        self.token = Token.objects.create(
+            user=User.objects.create(username='other', first_name='Пётр', last_name='Петров', role=UserRole.STUDENT),
+        )
+        self.assertEqual(self.poll(url).status_code, 404)
+
+    def test_broken_submission_does_not_stop_the_queue(self):
+        broken = TestSubmission.objects.create(
+            test=self.test, student=self.student, answers={f'question_{self.question.id}': 5},
+        )
+        self.ingest(['Да'])
+
+        self.assertEqual(grade_pending(), 2)
+        broken.refresh_from_db()
+        self.assertEqual(broken.status, SubmissionStatus.FAILED)
+        self.assertEqual(list(TestsResult.objects.values_list('mark', flat=True)), [10])
+
+
+class DraftAutosaveTestCase(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        FakeTimer.started = []
+        self.test = Test.objects.create(name='Сети: тест 1', attempts=3, timer=10)
+        self.questions = [Question.objects.create(question=f'Вопрос {number}', test=self.test) for number in range(2)]
+        for question in self.questions:
+            AnswerOption.objects.create(question=question, answer='Да', is_right=True)
+            AnswerOption.objects.create(question=question, answer='Нет', is_right=False, weight=-1)
+        self.student = User.objects.create(
+            username='student', first_name='Иван', last_name='Иванов', role=UserRole.STUDENT,
+        )
+        self.token = Token.objects.create(user=self.student)
+        self.attempt = start_attempt(self.test.pk, self.student, self.test.timer)
+        self.now = 0.0
+        self.buffer = self.worker()
+        patcher = mock.patch.object(drafts, 'buffer', self.buffer)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def worker(self):
+        # Буфер отдельного воркера gunicorn
+        return drafts.DraftBuffer(flush_interval=60, clock=lambda: self.now, timer=FakeTimer)
+
+    def answer(self, number, answers):
+        return {f'question_{self.questions[number].id}': answers}
+
+    def save(self, number, answers):
+        return self.client.put(
+            f'/api/tests/{self.test.id}/draft/', self.answer(number, answers),
+            content_type='application/json', HTTP_AUTHORIZATION=f'Token {self.token.key}',
+        )
+
+    def stored_draft(self):
+        self.attempt.refresh_from_db()
+        return draft_answers(self.attempt.draft)
+
+    def test_autosave_does_not_touch_the_database(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.buffer.save(self.attempt, self.answer(0, ['Нет']))
+            self.buffer.save(self.attempt, self.answer(0, ['Да']))
+            draft = self.buffer.save(self.attempt, self.answer(1, ['Нет']))
+        self.assertEqual(queries.captured_queries, [])
+        self.assertEqual(draft, {**self.answer(0, ['Да']), **self.answer(1, ['Нет'])})
+        self.assertEqual(self.stored_draft(), {})
+
+        # Один таймер на буфер; сброс — одна блокировка строки попытки и один UPDATE
+        self.assertEqual([timer.interval for timer in FakeTimer.started], [60])
+        with CaptureQueriesContext(connection) as queries:
+            self.buffer.flush()
+        attempts_table = TestAttempt._meta.db_table
+        self.assertEqual(len([query for query in queries if query['sql'].startswith(f'UPDATE "{attempts_table}"')]), 1)
+        self.assertEqual(self.stored_draft(), draft)
+
+        # Черновик переживает перезапуск воркера в версии, записанной в базу
+        response = self.client.get(f'/api/tests/{self.test.id}/draft/', HTTP_AUTHORIZATION=f'Token {self.token.key}')
+        self.assertEqual(response.json(), draft)
+
+    def test_workers_merge_and_latest_answer_wins(self):
+        other = self.worker()
+        self.buffer.save(self.attempt, self.answer(0, ['Нет']))
+        self.now = 1.0
+        other.save(self.attempt, self.answer(0, ['Да']))
+        other.save(self.attempt, self.answer(1, ['Нет']))
+
+        # Более поздний ответ на вопрос сбрасывается раньше — прежний его не перезаписывает
+        other.flush()
+        self.buffer.flush()
+        self.assertEqual(self.stored_draft(), {**self.answer(0, ['Да']), **self.answer(1, ['Нет'])})
+
+        # Свежий ответ из буфера воркера важнее записанного в базу
+        self.now = 2.0
+        self.buffer.save(self.attempt, self.answer(1, ['Да']))
+        self.attempt.refresh_from_db()
+        self.assertEqual(self.buffer.load(self.attempt), {**self.answer(0, ['Да']), **self.answer(1, ['Да'])})
+
+    def test_submit_consumes_draft(self):
+        self.save(0, ['Да'])
+        self.save(1, ['Нет'])
+
+        # Ответ из запроса важнее черновика
+        response = self.client.put(
+            f'/api/tests/{self.test.id}/?draft=1', self.answer(1, ['Да']),
+            content_type='application/json', HTTP_AUTHORIZATION=f'Token {self.token.key}',
+        )
+        self.assertEqual(response.json()['mark'], '10.00')
+        self.assertEqual(self.save(0, ['Нет']).status_code, 400)  # Попытка завершена
+
+        # Запоздавший сброс другого воркера не пишет черновик в завершённую попытку
+        self.buffer.save(self.attempt, self.answer(0, ['Нет']))
+        self.buffer.flush()
+        self.assertEqual(self.stored_draft(), {})
+
+
+class AdminQueriesTestCase(ConstantQueriesMixin, TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.subject = Subject.objects.create(name='Сети')
+        self.lab = self.create_lab(self.subject, 0)
+        self.test = Test.objects.create(name='Сети: тест 1', lab=self.lab, attempts=3, timer=10)
+        self.admin = User.objects.create(
+            username='admin', first_name='Админ', last_name='Админов', role=UserRole.TEACHER,
+            is_staff=True, is_superuser=True,
+        )
+        self.client.force_login(self.admin)
+
+    @staticmethod
+    def create_lab(subject, number):
+        semester = Semester.objects.create(name=str(number), subject=subject)
+        return Lab.objects.create(name=f'Лаба {number}', semester=semester, file='labs/lab.pdf')
+
+    def add_rows(self, number):
+        # Вопрос к основному тесту, чужой тест со своей лабораторной, результат, попытка и принятые ответы
+        question = Question.objects.create(question=f'Вопрос {number}', test=self.test)
+        AnswerOption.objects.create(question=question, answer='Да', is_right=True)
+        AnswerOption.objects.create(question=question, answer='Нет')
+        lab = self.create_lab(Subject.objects.create(name=f'Предмет {number}'), number)
+        test = Test.objects.create(name=f'Тест {number}', lab=lab, attempts=3, timer=10)
+        student = User.objects.create(
+            username=f'student{number}', first_name='Иван', last_name=f'Иванов{number}', role=UserRole.STUDENT,
+        )
+        result = TestsResult.objects.create(student=student, test=test, mark=5)
+        TestAttempt.objects.create(
+            test=test, student=student, deadline=timezone.now(), status=AttemptStatus.SUBMITTED, result=result,
+        )
+        TestSubmission.objects.create(test=test, student=student, answers={})
+        return result
+
+    def test_changelists(self):
+        self.assertConstantQueries([
+            reverse(f'admin:simple_tests_{model}_changelist')
+            for model in ('test', 'testsresult', 'question', 'testattempt', 'testsubmission')
+        ])
+
+    def test_change_forms(self):
+        result = self.add_rows(0)
+        self.assertConstantQueries([
+            reverse('admin:simple_tests_test_change', args=[self.test.id]),  # Вопросы и варианты — вложенные формы
+            reverse('admin:simple_tests_testsresult_change', args=[result.id]),
+            reverse('admin:simple_tests_question_change', args=[self.test.questions.first().id]),
+            reverse('admin:simple_tests_testattempt_change', args=[result.attempt.id]),
+        ])
+
+    def test_teacher_chooses_only_own_labs(self):
+        self.add_rows(1)
+        teacher = User.objects.create(
+            username='teacher', first_name='Пётр', last_name='Петров', role=UserRole.TEACHER, is_staff=True,
+        )
+        teacher.teacher_subjects.add(self.subject)
+        teacher.user_permissions.add(*Permission.objects.filter(codename__in=['view_test', 'change_test']))
+        self.client.force_login(teacher)
 
-# Create your tests here.
+        response = self.client.get(reverse('admin:simple_tests_test_change', args=[self.test.id]))
+        self.assertEqual(list(response.context['adminform'].form.fields['lab'].queryset), [self.lab])
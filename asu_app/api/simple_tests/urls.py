@@ -5,6 +5,8 @@ from rest_framework import routers
 from api.simple_tests.views import (
     TestViewSet,         # CRUD-операции над тестами
     TestResultViewSet,   # CRUD-операции над результатами тестов
+    GroupReportView,     # Журнал оценок группы
+    TestSubmissionViewSet,  # Состояние проверки ответов, принятых без проверки
 )
 
 # Импорт утилит Django для маршрутизации
@@ -15,8 +17,12 @@ from django.urls import path, include
 router = routers.DefaultRouter()
 router.register(r'tests', TestViewSet)                # /tests/
 router.register(r'tests-results', TestResultViewSet)  # /tests-results/
+router.register(r'tests-submissions', TestSubmissionViewSet)  # /tests-submissions/<id>/
 
 # Объединяем все маршруты в список URL-шаблонов
 urlpatterns = [
     path('', include(router.urls)),  # Подключаем сгенерированные маршруты в корневую точку этого приложения
+
+    # GET /groups/<id>/report/ — журнал оценок группы (см. Group.get_report_url)
+    path('groups/<int:group_id>/report/', GroupReportView.as_view(), name='group_report'),
 ]
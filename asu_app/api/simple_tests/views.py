@@ -1,22 +1,41 @@
 from datetime import datetime
 
 import pytz  # Для работы с timezone-aware временем
-from django.core.cache import cache  # Используется для хранения времени теста
-from django.db.models import Q  # Для сложной фильтрации
+from django.conf import settings
+from django.db.models import Prefetch, Subquery
+from django.shortcuts import get_object_or_404
 from django_filters.rest_framework import DjangoFilterBackend
-from rest_framework import status, viewsets
+from rest_framework import mixins, status, viewsets
+from rest_framework.decorators import action
 from rest_framework.permissions import IsAdminUser, IsAuthenticated
 from rest_framework.response import Response
-
-from api.simple_tests.models import Test, TestsResult, AnswerResult
+from rest_framework.views import APIView
+
+from api.simple_tests.analysis import get_test_analysis
+from api.simple_tests.answer_keys import get_answer_key
+from api.simple_tests.attempts import active_attempt, remaining_seconds, start_attempt, used_attempts
+from api.simple_tests.content import get_test_payload
+from api.simple_tests.drafts import discard_draft, draft_answers, load_draft, save_draft
+from api.simple_tests.export import export_results
+from api.simple_tests.grading import submit_test
+from api.simple_tests.submissions import ingest_submission, wants_async
+from api.groups.models import Group
+from api.simple_tests.models import (
+    Test, TestsResult, AnswerOption, AnswerSelection, ArchivedAnswerSelection, ArchivedTestsResult, GradebookEntry,
+    SubmissionStatus, TestSubmission,
+)
 from api.simple_tests.serializers import (
     TestSerializer,
     TestDetailSerializer,
     TestResultSerializer,
     TestResultDetailSerializer,
+    TestSubmissionSerializer,
 )
-from api.users.models import UserRole
-from asu_app.custom_permissions import ReadOnly
+from api.subjects.access import filter_by_subject_scope
+from api.users.models import User, UserRole
+from asu_app.custom_permissions import ReadOnly, ReadOnlyIfTeacher
+from asu_app.media import sign_media_url
+from asu_app.pagination import PagedByDefaultPagination
 
 
 class TestViewSet(viewsets.ModelViewSet):
@@ -34,8 +53,9 @@ class TestViewSet(viewsets.ModelViewSet):
 
     # Получение теста студентом с проверкой доступности и расчётом оставшегося времени
     def retrieve(self, request, pk=None):
-        test = Test.objects.prefetch_related('questions__answers').get(pk=pk)
-        serializer = TestDetailSerializer(test)
+        # Вопросы и варианты ответов — общие для всех студентов и берутся из кеша,
+        # для каждого студента отдельно считаются только попытки и оставшееся время
+        test = get_test_payload(pk)
 
         # Проверка доступности теста по времени
         now = datetime.now().replace(tzinfo=pytz.UTC)
@@ -45,111 +65,83 @@ class TestViewSet(viewsets.ModelViewSet):
             return Response({'message': 'В данный момент тест недоступен.'},
                             status=status.HTTP_400_BAD_REQUEST)
 
-        # Проверка попыток — если студент уже прошёл все доступные попытки
-        test_results = TestsResult.objects.filter(test=test, student=request.user)
-        if len(test_results) == int(test.attempts):
-            return Response({'message': 'Вы потратили все попытки на выполнение этого теста.'},
-                            status=status.HTTP_400_BAD_REQUEST)
-
-        # Ключи кеша для времени теста и момента начала
-        test_time_key = f'timer_test_{test.id}_{request.user.id}'
-        test_date_key = f'date_test_{test.id}_{request.user.id}'
-
-        # Если студент впервые начинает тест — создаём запись в кеше
-        if not cache.get(test_time_key):
-            cache.set(test_time_key, test.timer * 60, test.timer * 60 * 2)
-            cache.set(test_date_key, datetime.now().timestamp(), test.timer * 60 * 2)
-
-        # Вычисление оставшегося времени
-        estimated_time = int(cache.get(test_time_key) -
-                             (datetime.now().timestamp() - cache.get(test_date_key)))
-
-        data = {'estimated_time': estimated_time}
-        data.update(serializer.data)
+        # Продолжаем начатую попытку или начинаем новую, если студент не потратил все попытки
+        attempt = active_attempt(test.test_id, request.user)
+        if attempt is None:
+            if used_attempts(test.test_id, request.user) >= int(test.attempts):
+                return Response({'message': 'Вы потратили все попытки на выполнение этого теста.'},
+                                status=status.HTTP_400_BAD_REQUEST)
+            attempt = start_attempt(test.test_id, request.user, test.timer)
+
+        # Оставшееся время считается по сроку попытки — одинаково на любом воркере.
+        # Автосохранённые ответы позволяют продолжить попытку, например, после сбоя браузера
+        data = {'estimated_time': remaining_seconds(attempt), 'draft': load_draft(attempt)}
+        data.update(test.data)
+        # Ссылки на картинки подписываются при каждом запросе: содержимое теста кешируется дольше срока подписи
+        data['questions'] = [
+            {**question, 'image': sign_media_url(question['image'])} for question in data['questions']
+        ]
         return Response(data, status=status.HTTP_200_OK)
 
     # Обработка результатов теста (отправка ответов)
     def update(self, request, pk=None):
-        test = Test.objects.prefetch_related('questions__answers').get(pk=pk)
-
-        # Очистка кеша времени
-        test_time_key = f'timer_test_{test.id}_{request.user.id}'
-        test_date_key = f'date_test_{test.id}_{request.user.id}'
-        cache.delete(test_time_key)
-        cache.delete(test_date_key)
-
-        max_weight = 0
-        result_weight = 0
-        answers_results = []
-
-        # Расчёт оценки
-        for question in test.questions.all():
-            max_weight += question.weight
-            answers = set(request.data.get(f'question_{question.id}'))
-            if not answers:
-                continue
-
-            answers_max_weight = 0
-            answers_result_weight = 0
-
-            # Подсчёт веса правильных и неправильных ответов
-            for answer in question.answers.all():
-                if answer.is_right:
-                    answers_max_weight += answer.weight
-                if answer.answer in answers:
-                    answers_result_weight += answer.weight
-
-                # Сохраняем результат по каждому варианту ответа
-                answers_results.append(AnswerResult(
-                    question=question,
-                    is_right=answer.is_right,
-                    is_checked=answer.answer in answers,
-                    answer_text=answer.answer,
-                ))
-
-            # Обнуляем отрицательные значения
-            if answers_result_weight < 0:
-                answers_result_weight = 0
-
-            # Учитываем вес вопроса при подсчёте итогов
-            result_weight += question.weight * (answers_result_weight / answers_max_weight)
-
-        # Вычисляем оценку
-        result_mark = round((result_weight / max_weight) * 10, 2) if max_weight else 0
-        mark = -1 if test.is_outer else result_mark
-
-        # Сохраняем результат теста
-        result = TestsResult.objects.create(student=request.user, test=test, mark=mark)
-
-        # Сохраняем результаты по каждому варианту
-        for answer_result in answers_results:
-            answer_result.test_result = result
-            answer_result.save()
+        # Ключ ответов берётся из кеша — содержимое теста из базы не читается
+        answer_key = get_answer_key(pk)
+
+        # ?draft=1 — отправляется автосохранённый черновик, дополненный ответами из запроса
+        data, attempt = request.data, None
+        if request.query_params.get('draft'):
+            attempt = active_attempt(answer_key.test_id, request.user)
+            if attempt is not None:
+                data = {**load_draft(attempt), **draft_answers(request.data)}
+
+        # Приём без проверки (например, в конце экзамена, когда отвечает вся группа): ответы сохраняются
+        # одной вставкой, оценку выставляет воркер grade_submissions, клиент опрашивает адрес из ответа
+        if wants_async(request):
+            submission = ingest_submission(answer_key.test_id, request.user, data)
+            if attempt is not None:
+                discard_draft(attempt)
+            return Response(TestSubmissionSerializer(submission).data, status=status.HTTP_202_ACCEPTED,
+                            headers={'Location': submission.get_absolute_url(),
+                                     'Retry-After': settings.TEST_SUBMISSION_RETRY_AFTER})
+
+        # Проверка и сохранение ответов одной транзакцией вместе с завершением попытки
+        result = submit_test(answer_key, request.user, data)
+        if attempt is not None:
+            discard_draft(attempt)
 
         serializer = TestResultSerializer(result)
         return Response(serializer.data, status=status.HTTP_200_OK)
 
-    # Ограничение видимости тестов в зависимости от роли пользователя
+    # Автосохранение ответов начатой попытки: PUT /tests/<id>/draft/ дополняет черновик,
+    # GET возвращает его. Черновик копится в памяти воркера и редко пишется в базу (см. api/simple_tests/drafts.py)
+    @action(detail=True, methods=['get', 'put'])
+    def draft(self, request, pk=None):
+        attempt = active_attempt(pk, request.user)
+        if attempt is None:
+            return Response({'message': 'Нет начатой попытки прохождения теста.'},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        if request.method == 'PUT':
+            return Response(save_draft(attempt, draft_answers(request.data)), status=status.HTTP_200_OK)
+        return Response(load_draft(attempt), status=status.HTTP_200_OK)
+
+    # Анализ вопросов теста по результатам студентов: GET /tests/<id>/analysis/
+    # Трудность и дискриминативность вопросов, выбор вариантов ответа, альфа Кронбаха
+    @action(detail=True, methods=['get'], permission_classes=[IsAuthenticated, IsAdminUser | ReadOnlyIfTeacher])
+    def analysis(self, request, pk=None):
+        test = self.get_object()
+        return Response(get_test_analysis(test.id), status=status.HTTP_200_OK)
+
+    # Ограничение видимости тестов в зависимости от роли пользователя:
+    # тест доступен, если доступен предмет его лабораторной или лекции
     def get_queryset(self):
-        if self.request.user.is_superuser:
-            return Test.objects.all().distinct()
-
-        if self.request.user.role == UserRole.STUDENT:
-            return Test.objects.filter(
-                Q(lab__semester__subject__allowed_specialities__groups__in=[self.request.user.group]) |
-                Q(lecture__semester__subject__allowed_specialities__groups__in=[self.request.user.group])
-            ).prefetch_related(
-                'lab__semester__subject__allowed_specialities__groups',
-                'lecture__semester__subject__allowed_specialities__groups'
-            ).distinct()
-
-        return Test.objects.filter(
-            Q(lab__semester__subject__in=self.request.user.teacher_subjects.all()) |
-            Q(lecture__semester__subject__in=self.request.user.teacher_subjects.all())
-        ).prefetch_related(
-            'lab__semester__subject',
-            'lecture__semester__subject'
-        ).distinct()
+        return filter_by_subject_scope(
+            Test.objects.all(),
+            self.request.user,
+            'lab__semester__subject_id',
+            'lecture__semester__subject_id',
+        )
 
 
 class TestResultViewSet(viewsets.ModelViewSet):
@@ -158,31 +150,154 @@ class TestResultViewSet(viewsets.ModelViewSet):
     serializer_class = TestResultSerializer
     filter_backends = [DjangoFilterBackend]
     filterset_fields = ['student', 'student__group', 'test']  # Фильтрация по студенту, группе и тесту
+    pagination_class = PagedByDefaultPagination  # Результатов со временем становится много — только страницами
+
+    # Результаты прошлых учебных лет читаются из архива по ?archive=1 (см. api/simple_tests/archive.py)
+    def is_archive(self):
+        return bool(self.request.query_params.get('archive'))
 
     # Просмотр детального результата теста (включает ответы)
     def retrieve(self, request, pk=None):
-        result = TestsResult.objects.prefetch_related(
-            'student', 'test__questions__answers_results'
-        ).get(pk=pk)
-
-        # Привязываем ответы к каждому вопросу вручную
-        for question in result.test.questions.all():
-            question.answers_res = question.answers_results.filter(test_result__id=pk).all()
+        # Ответы подгружаются одним запросом и только этого результата — сразу в question.result_selections,
+        # варианты ответов всех вопросов — ещё одним, поэтому число запросов не зависит от количества вопросов.
+        # Варианты — в версиях, действовавших на момент завершения теста (см. AnswerOption)
+        completed = Subquery(self.get_queryset().model.objects.filter(pk=pk).values('completion_date'))
+        if self.is_archive():
+            selections, selection_model = 'test__questions__archived_selections', ArchivedAnswerSelection
+        else:
+            selections, selection_model = 'test__questions__selections', AnswerSelection
+        result = get_object_or_404(
+            self.get_queryset().prefetch_related(
+                Prefetch(
+                    selections,
+                    queryset=selection_model.objects.filter(test_result_id=pk),
+                    to_attr='result_selections',
+                ),
+                Prefetch(
+                    'test__questions__answers',
+                    queryset=AnswerOption.versions.as_of(completed).order_by('id'),
+                ),
+            ),
+            pk=pk,
+        )
 
         serializer = TestResultDetailSerializer(result)
         return Response(serializer.data, status=status.HTTP_200_OK)
 
+    # Потоковая выгрузка результатов: GET /tests-results/export/?type=csv|xlsx[&answers=1]
+    # Учитывает те же фильтры и ограничения по ролям, что и список результатов
+    @action(detail=False, methods=['get'])
+    def export(self, request):
+        file_type = request.query_params.get('type', 'csv')
+        if file_type not in ('csv', 'xlsx'):
+            return Response({'message': 'Поддерживаются форматы csv и xlsx.'},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        return export_results(
+            self.filter_queryset(self.get_queryset()),
+            with_answers=bool(request.query_params.get('answers')),
+            file_type=file_type,
+            selection_model=ArchivedAnswerSelection if self.is_archive() else AnswerSelection,
+        )
+
     # Ограничение выборки результатов по ролям
     def get_queryset(self):
+        results = ArchivedTestsResult.objects if self.is_archive() else TestsResult.objects
+
         if self.request.user.is_superuser:
-            return TestsResult.objects.all().select_related('student__group', 'test')
+            return results.all().select_related('student__group', 'test')
 
         if self.request.user.role == UserRole.TEACHER:
-            return TestsResult.objects.filter(
-                Q(test__lab__semester__subject__in=self.request.user.teacher_subjects.all()) |
-                Q(test__lecture__semester__subject__in=self.request.user.teacher_subjects.all())
-            ).select_related('student__group', 'test').distinct()
-
-        return TestsResult.objects.filter(
+            return filter_by_subject_scope(
+                results.select_related('student__group', 'test'),
+                self.request.user,
+                'test__lab__semester__subject_id',
+                'test__lecture__semester__subject_id',
+            )
+
+        return results.filter(
             student=self.request.user
-        ).select_related('student__group', 'test').distinct()
+        ).select_related('student__group', 'test')
+
+
+# Состояние проверки ответов, принятых без проверки: GET /tests-submissions/<id>/.
+# Ответ возвращается сразу; пока ответы не проверены, заголовок Retry-After подсказывает клиенту,
+# когда спросить снова (ожидание в запросе заняло бы синхронный воркер gunicorn)
+class TestSubmissionViewSet(mixins.RetrieveModelMixin, viewsets.GenericViewSet):
+    permission_classes = [IsAuthenticated]
+    queryset = TestSubmission.objects.all()
+    serializer_class = TestSubmissionSerializer
+
+    def retrieve(self, request, pk=None):
+        submission = self.get_object()
+        response = Response(self.get_serializer(submission).data, status=status.HTTP_200_OK)
+        if submission.status == SubmissionStatus.PENDING:
+            response['Retry-After'] = settings.TEST_SUBMISSION_RETRY_AFTER
+        return response
+
+    # Студент видит свои ответы, преподаватель — ответы по тестам своих предметов
+    def get_queryset(self):
+        submissions = TestSubmission.objects.select_related('result__student__group', 'result__test')
+
+        if self.request.user.is_superuser:
+            return submissions
+
+        if self.request.user.role == UserRole.TEACHER:
+            return filter_by_subject_scope(
+                submissions,
+                self.request.user,
+                'test__lab__semester__subject_id',
+                'test__lecture__semester__subject_id',
+            )
+
+        return submissions.filter(student=self.request.user)
+
+
+# Журнал группы: лучшая и последняя оценка каждого студента по каждому тесту.
+# Читается из сводной таблицы GradebookEntry (см. api/simple_tests/gradebook.py);
+# ?subject=<id> ограничивает журнал одним предметом
+class GroupReportView(APIView):
+    permission_classes = [IsAuthenticated, IsAdminUser | ReadOnlyIfTeacher]
+
+    def get(self, request, group_id):
+        group = get_object_or_404(Group, pk=group_id)
+
+        entries = GradebookEntry.objects.filter(group_id=group_id).select_related('test')
+        subject_id = request.query_params.get('subject')
+        if subject_id is not None:
+            if not subject_id.isdigit():
+                return Response({'message': 'Некорректный идентификатор предмета.'},
+                                status=status.HTTP_400_BAD_REQUEST)
+            entries = entries.filter(subject_id=subject_id)
+        # Преподаватель видит только тесты своих предметов
+        entries = filter_by_subject_scope(entries, request.user, 'subject_id')
+
+        tests = {}
+        marks = {}
+        for entry in entries:
+            tests[entry.test_id] = {'id': entry.test_id, 'name': entry.test.name}
+            marks.setdefault(entry.student_id, {})[entry.test_id] = {
+                'best': str(entry.best_mark),
+                'last': str(entry.last_mark),
+                'results_count': entry.results_count,
+                'last_result': entry.last_result_id,
+            }
+
+        students = (
+            User.objects
+            .filter(group_id=group_id, role=UserRole.STUDENT)
+            .order_by('last_name', 'first_name')
+            .only('id', 'first_name', 'last_name')
+        )
+        return Response({
+            'group': {'id': group.id, 'name': group.name},
+            'tests': sorted(tests.values(), key=lambda test: test['id']),
+            'students': [
+                {
+                    'id': student.id,
+                    'name': f'{student.last_name} {student.first_name}',
+                    'marks': marks.get(student.id, {}),
+                }
+                for student in students
+            ],
+        }, status=status.HTTP_200_OK)
@@ -0,0 +1,128 @@
+import time  # Начальное значение версии областей доступа
+
+from django.conf import settings  # Время жизни закешированной области доступа
+from django.core.cache import cache  # Общий кеш (см. CACHES в settings.py)
+from django.db import transaction
+from django.db.models import Q
+
+from api.subjects.models import Subject, SubjectGroupAccess
+from api.users.models import UserRole
+
+
+# Версия всех областей доступа: увеличивается, когда изменение затрагивает сразу многих пользователей
+# (разрешённые специальности предмета, специальность группы и т.п.). Ключ указан в L2_ONLY кеша
+# по умолчанию: увеличение версии сразу видят все воркеры
+SCOPE_VERSION_KEY = 'subject_scope_version'
+
+
+
+def _scope_version():
+    version = cache.get(SCOPE_VERSION_KEY)
+    if version is None:
+        # Если версию вытеснили из кеша, новая не должна совпасть ни с одной из прежних
+        cache.add(SCOPE_VERSION_KEY, time.time_ns(), None)
+        version = cache.get(SCOPE_VERSION_KEY)
+    return version
+
+
+def _scope_key(user_id):
+    return f'subject_scope_{_scope_version()}_{user_id}'
+
+
+def _compute_subject_ids(user):
+    if user.role == UserRole.STUDENT:
+        # Студенту доступны предметы, разрешённые специальности его группы
+        return frozenset(
+            SubjectGroupAccess.objects
+            .filter(group_id=user.group_id)
+            .values_list('subject_id', flat=True)
+        )
+
+    # Преподавателю доступны предметы, которые он ведёт
+    return frozenset(user.teacher_subjects.values_list('id', flat=True))
+
+
+def allowed_subject_ids(user):
+    """
+    Идентификаторы предметов, доступных пользователю (для суперпользователя — None, без ограничений).
+    Вычисляются один раз и хранятся в кеше до изменения связей (см. api/subjects/signals.py).
+    """
+    if user.is_superuser:
+        return None
+    return role_subject_ids(user)
+
+
+def role_subject_ids(user):
+    """
+    Предметы, доступные пользователю по его роли (группа студента, дисциплины преподавателя),
+    без исключения для суперпользователя — для проверок, где статус суперпользователя не учитывается.
+    """
+    key = _scope_key(user.id)
+    subject_ids = cache.get(key)
+    if subject_ids is None:
+        subject_ids = _compute_subject_ids(user)
+        cache.set(key, subject_ids, settings.SUBJECT_SCOPE_TIMEOUT)
+    return subject_ids
+
+
+def filter_by_subject_scope(queryset, user, *subject_lookups):
+    """
+    Ограничивает queryset предметами, доступными пользователю: для студента — подзапросом
+    к таблице доступа его группы, для преподавателя — закешированным списком его предметов.
+    subject_lookups — пути до идентификатора предмета, например 'semester__subject_id';
+    при нескольких путях достаточно совпадения по любому из них.
+    """
+    if user.is_superuser:
+        return queryset
+
+    if user.role == UserRole.STUDENT:
+        # Полусоединение по индексу таблицы доступа: актуально без кеша и не размножает строки
+        subject_ids = SubjectGroupAccess.objects.filter(group_id=user.group_id).values('subject_id')
+    else:
+        subject_ids = allowed_subject_ids(user)
+
+    condition = Q()
+    for lookup in subject_lookups:
+        condition |= Q(**{f'{lookup}__in': subject_ids})
+    return queryset.filter(condition)
+
+
+def invalidate_user_scope(*user_ids):
+    # Сбрасывает области доступа конкретных пользователей
+    cache.delete_many([_scope_key(user_id) for user_id in user_ids])
+
+
+def invalidate_all_scopes():
+    # Делает недействительными области доступа всех пользователей сразу
+    _scope_version()
+    try:
+        cache.incr(SCOPE_VERSION_KEY)
+    except ValueError:
+        # Версию успели вытеснить из кеша между чтением и увеличением
+        cache.set(SCOPE_VERSION_KEY, time.time_ns(), None)
+
+
+
+def rebuild_subject_group_access(subject_ids=None, group_ids=None):
+    """
+    Пересобирает таблицу доступа групп к предметам из связей Subject → Speciality → Group.
+    Без аргументов — целиком; иначе только строки указанных предметов и/или групп.
+    """
+    through = Subject.allowed_specialities.through
+    source = through.objects.filter(speciality__groups__isnull=False)
+    target = SubjectGroupAccess.objects.all()
+    if subject_ids is not None:
+        source = source.filter(subject_id__in=subject_ids)
+        target = target.filter(subject_id__in=subject_ids)
+    if group_ids is not None:
+        source = source.filter(speciality__groups__id__in=group_ids)
+        target = target.filter(group_id__in=group_ids)
+
+    pairs = set(source.values_list('speciality__groups__id', 'subject_id'))
+    with transaction.atomic():
+        target.delete()
+        SubjectGroupAccess.objects.bulk_create(
+            [SubjectGroupAccess(group_id=group_id, subject_id=subject_id) for group_id, subject_id in pairs],
+            ignore_conflicts=True,  # Параллельная пересборка могла успеть вставить те же строки
+        )
+    return len(pairs)
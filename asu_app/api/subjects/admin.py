@@ -2,22 +2,37 @@ from django.contrib import admin
 from api.subjects.models import Lab, Subject, Semester, Folder, File, Lecture
 
 
+# Подписи (__str__) лабораторных, лекций, папок и файлов включают семестр и предмет,
+# поэтому списки и вложенные формы загружают их тем же запросом, а не отдельным на каждую строку
+
+
+# Семестры для выбора: с предметом для подписи; преподавателю — только по его дисциплинам
+def semester_choices(request):
+    semesters = Semester.objects.select_related('subject')
+    if not request.user.is_superuser:
+        semesters = semesters.filter(subject__in=request.user.teacher_subjects.all())
+    return semesters
+
+
 # Вложенная форма для отображения файлов внутри папки
 class FileInline(admin.StackedInline):
     model = File
     extra = 1  # Кол-во пустых строк по умолчанию в админке
 
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related('folder__semester__subject')
+
 
 # Админка для папок с вложенными файлами
 class FolderAdmin(admin.ModelAdmin):
     inlines = [FileInline]
+    list_select_related = ('semester__subject',)
+    list_per_page = 50
 
     # Ограничиваем список семестров преподавателю только теми, где он ведет дисциплины
     def formfield_for_foreignkey(self, db_field, request, **kwargs):
-        if db_field.name == "semester" and not request.user.is_superuser:
-            kwargs["queryset"] = Semester.objects.filter(
-                subject__in=request.user.teacher_subjects.all()
-            )
+        if db_field.name == "semester":
+            kwargs["queryset"] = semester_choices(request)
         return super().formfield_for_foreignkey(db_field, request, **kwargs)
 
 
@@ -26,59 +41,74 @@ class FolderInline(admin.StackedInline):
     model = Folder
     extra = 1
 
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related('semester__subject')
+
 
 # Вложенные формы для лабораторных внутри семестра
 class LabInline(admin.StackedInline):
     model = Lab
     extra = 1
 
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related('semester__subject')
+
 
 # Вложенные формы для лекций внутри семестра
 class LectureInline(admin.StackedInline):
     model = Lecture
     extra = 1
 
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related('semester__subject')
+
 
 # Админка семестра с отображением всех связанных сущностей (лекции, лабораторные, папки)
 class SemesterAdmin(admin.ModelAdmin):
     inlines = [FolderInline, LabInline, LectureInline]
+    list_select_related = ('subject',)
+    list_per_page = 50
 
     # Ограничиваем список предметов — преподаватели видят только свои дисциплины
     def formfield_for_foreignkey(self, db_field, request, **kwargs):
         if db_field.name == "subject" and not request.user.is_superuser:
-            kwargs["queryset"] = Subject.objects.filter(
-                id__in=[subj.id for subj in request.user.teacher_subjects.all()]
-            )
+            kwargs["queryset"] = Subject.objects.filter(id__in=request.user.teacher_subjects.values('id'))
         return super().formfield_for_foreignkey(db_field, request, **kwargs)
 
 
 # Админка для лабораторных с ограничением по семестрам
 class LabAdmin(admin.ModelAdmin):
+    list_select_related = ('semester__subject',)
+    list_per_page = 50
+
     def formfield_for_foreignkey(self, db_field, request, **kwargs):
-        if db_field.name == "semester" and not request.user.is_superuser:
-            kwargs["queryset"] = Semester.objects.filter(
-                subject__in=request.user.teacher_subjects.all()
-            )
+        if db_field.name == "semester":
+            kwargs["queryset"] = semester_choices(request)
         return super().formfield_for_foreignkey(db_field, request, **kwargs)
 
 
 # Админка для лекций с ограничением по семестрам
 class LectureAdmin(admin.ModelAdmin):
+    list_select_related = ('semester__subject',)
+    list_per_page = 50
+
     def formfield_for_foreignkey(self, db_field, request, **kwargs):
-        if db_field.name == "semester" and not request.user.is_superuser:
-            kwargs["queryset"] = Semester.objects.filter(
-                subject__in=request.user.teacher_subjects.all()
-            )
+        if db_field.name == "semester":
+            kwargs["queryset"] = semester_choices(request)
         return super().formfield_for_foreignkey(db_field, request, **kwargs)
 
 
 # Админка для файлов с ограничением по доступным папкам
 class FileAdmin(admin.ModelAdmin):
+    list_select_related = ('folder__semester__subject',)
+    list_per_page = 50
+
     def formfield_for_foreignkey(self, db_field, request, **kwargs):
-        if db_field.name == "folder" and not request.user.is_superuser:
-            kwargs["queryset"] = Folder.objects.filter(
-                semester__subject__in=request.user.teacher_subjects.all()
-            )
+        if db_field.name == "folder":
+            folders = Folder.objects.select_related('semester__subject')
+            if not request.user.is_superuser:
+                folders = folders.filter(semester__subject__in=request.user.teacher_subjects.all())
+            kwargs["queryset"] = folders
         return super().formfield_for_foreignkey(db_field, request, **kwargs)
 
 
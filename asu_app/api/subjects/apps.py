@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class SubjectsConfig(AppConfig):
     name = 'api.subjects'
     verbose_name = 'Работа с учебными дисциплинами'
+
+    def ready(self):
+        from api.subjects import signals  # noqa: F401 — подключаем сброс областей доступа
@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from api.subjects.access import invalidate_all_scopes, rebuild_subject_group_access
+
+
+class Command(BaseCommand):
+    help = 'Пересобирает таблицу доступа групп к предметам (SubjectGroupAccess) из связей специальностей'
+
+    def handle(self, *args, **options):
+        rows = rebuild_subject_group_access()
+        invalidate_all_scopes()
+        self.stdout.write(self.style.SUCCESS(f'Таблица доступа пересобрана: {rows} строк'))
@@ -1,6 +1,6 @@
 from django.db import models
 from django.shortcuts import reverse  # Используется для генерации URL-ов в методах моделей
-from api.groups.models import Speciality  # Импорт модели специальности для связи с предметами
+from api.groups.models import Group, Speciality  # Специальности (связь с предметами) и группы (таблица доступа)
 from django.conf import settings  # Для получения значения из конфигурации (например, ID системной дисциплины)
 
 
@@ -207,3 +207,33 @@ class File(models.Model):
     class Meta:
         verbose_name = 'Файл'
         verbose_name_plural = 'Файлы'
+
+
+# Денормализованная таблица доступа групп к предметам: (группа, предмет) для каждой группы,
+# специальности которой разрешён предмет. Поддерживается сигналами (см. api/subjects/signals.py)
+# и позволяет ограничивать выборки студента одним полусоединением по индексу вместо цепочки
+# Subject → M2M → Speciality → Group.
+class SubjectGroupAccess(models.Model):
+    group = models.ForeignKey(
+        Group,
+        on_delete=models.CASCADE,
+        related_name='subject_access',
+        verbose_name='Группа'
+    )
+    subject = models.ForeignKey(
+        Subject,
+        on_delete=models.CASCADE,
+        related_name='group_access',
+        verbose_name='Предмет'
+    )
+
+    def __str__(self):
+        return f'{self.group} — {self.subject}'
+
+    class Meta:
+        verbose_name = 'Доступ группы к предмету'
+        verbose_name_plural = 'Доступ групп к предметам'
+        constraints = [
+            # Индекс (group, subject) покрывает выборку предметов группы
+            models.UniqueConstraint(fields=['group', 'subject'], name='unique_subject_group_access'),
+        ]
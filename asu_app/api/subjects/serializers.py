@@ -3,6 +3,8 @@ from urllib.parse import urlparse, urlunparse  # Для изменения ча
 from rest_framework import serializers
 from api.subjects.models import Lab, Lecture, Folder, File, Subject, Semester
 from api.groups.serializers import SpecialitySerializer  # Вложенный сериализатор специальностей
+from asu_app.expandable import ExpandableModelSerializer  # Выбор полей (?fields=) и разворачивание связей (?expand=)
+from asu_app.media import sign_media_url  # Подпись ссылок на файлы
 
 
 # Вспомогательная функция — заменяет хост/порт в URL-е файла
@@ -13,32 +15,33 @@ def replace_url(url: str) -> str:
 
 
 # Сериализатор для модели Subject (дисциплина)
-class SubjectSerializer(serializers.ModelSerializer):
-    allowed_specialities = SpecialitySerializer(read_only=True, many=True)  # Сериализация списка специальностей
+class SubjectSerializer(ExpandableModelSerializer):
     allow_console = serializers.ReadOnlyField()  # Флаг (рассчитанное поле)
 
     class Meta:
         model = Subject
         fields = '__all__'  # Все поля модели
+        # Специальности — целиком; идентификаторами, если ?expand= их не перечисляет
+        expandable_fields = {'allowed_specialities': (SpecialitySerializer, {'many': True})}
 
 
 # Сериализатор для модели Semester
-class SemesterSerializer(serializers.ModelSerializer):
-    subject = SubjectSerializer(read_only=True)  # Вложенная сериализация предмета
+class SemesterSerializer(ExpandableModelSerializer):
 
     class Meta:
         model = Semester
         fields = '__all__'
+        expandable_fields = {'subject': (SubjectSerializer, {})}  # ?expand=subject
 
 
 # Сериализатор для лабораторной работы
-class LabSerializer(serializers.ModelSerializer):
-    semester = SemesterSerializer(read_only=True)  # Вложенный семестр
+class LabSerializer(ExpandableModelSerializer):
     file = serializers.SerializerMethodField()  # Поле обрабатывается через кастомную функцию
 
     class Meta:
         model = Lab
         fields = '__all__'
+        expandable_fields = {'semester': (SemesterSerializer, {})}  # ?expand=semester, semester.subject
 
     def get_file(self, obj):
         request = self.context.get('request')  # Получаем запрос из контекста
@@ -47,18 +50,18 @@ class LabSerializer(serializers.ModelSerializer):
             if request:
                 file_url = request.build_absolute_uri(file_url)  # Превращаем путь в абсолютный URL
             file_url = replace_url(file_url)  # Меняем хост/порт
-            return file_url
+            return sign_media_url(file_url)  # Ссылка открывается без заголовка с токеном
         return None
 
 
 # Сериализатор для лекции
-class LectureSerializer(serializers.ModelSerializer):
-    semester = SemesterSerializer(read_only=True)
+class LectureSerializer(ExpandableModelSerializer):
     file = serializers.SerializerMethodField()
 
     class Meta:
         model = Lecture
         fields = '__all__'
+        expandable_fields = {'semester': (SemesterSerializer, {})}
 
     def get_file(self, obj):
         request = self.context.get('request')
@@ -67,27 +70,27 @@ class LectureSerializer(serializers.ModelSerializer):
             if request:
                 file_url = request.build_absolute_uri(file_url)
             file_url = replace_url(file_url)
-            return file_url
+            return sign_media_url(file_url)
         return None
 
 
 # Сериализатор для папки с файлами
-class FolderSerializer(serializers.ModelSerializer):
-    semester = SemesterSerializer(read_only=True)
+class FolderSerializer(ExpandableModelSerializer):
 
     class Meta:
         model = Folder
         fields = '__all__'
+        expandable_fields = {'semester': (SemesterSerializer, {})}
 
 
 # Сериализатор для отдельного файла в папке
-class FileSerializer(serializers.ModelSerializer):
-    folder = FolderSerializer(read_only=True)
+class FileSerializer(ExpandableModelSerializer):
     file = serializers.SerializerMethodField()
 
     class Meta:
         model = File
         fields = '__all__'
+        expandable_fields = {'folder': (FolderSerializer, {})}  # ?expand=folder.semester.subject
 
     def get_file(self, obj):
         request = self.context.get('request')
@@ -96,5 +99,5 @@ class FileSerializer(serializers.ModelSerializer):
             if request:
                 file_url = request.build_absolute_uri(file_url)
             file_url = replace_url(file_url)
-            return file_url
+            return sign_media_url(file_url)
         return None
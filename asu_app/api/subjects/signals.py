@@ -0,0 +1,79 @@
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from api.groups.models import Group, Speciality
+from api.subjects.access import invalidate_all_scopes, invalidate_user_scope, rebuild_subject_group_access
+from api.subjects.models import Subject
+from api.users.models import User, UsersSubjects
+
+
+# Поддержка таблицы доступа групп к предметам и сброс закешированных областей доступа
+# (см. api/subjects/access.py)
+
+M2M_CHANGES = ('post_add', 'post_remove', 'post_clear')
+
+
+
+# Изменились специальности, которым доступен предмет, — затронуты все студенты этих специальностей
+@receiver(m2m_changed, sender=Subject.allowed_specialities.through)
+def allowed_specialities_changed(sender, instance, action, reverse, **kwargs):
+    if action not in M2M_CHANGES:
+        return
+    if reverse:
+        # speciality.allowed_subjects.add(...): пересобираем доступ групп этой специальности
+        rebuild_subject_group_access(group_ids=list(instance.groups.values_list('id', flat=True)))
+    else:
+        rebuild_subject_group_access(subject_ids=[instance.pk])
+    invalidate_all_scopes()
+
+
+# Преподавателю добавили или убрали предметы через user.teacher_subjects / subject.teachers
+@receiver(m2m_changed, sender=UsersSubjects)
+def teacher_subjects_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in M2M_CHANGES:
+        return
+    if not reverse:
+        invalidate_user_scope(instance.pk)
+    elif pk_set:
+        invalidate_user_scope(*pk_set)
+    else:
+        invalidate_all_scopes()  # subject.teachers.clear(): затронутые преподаватели неизвестны
+
+
+# Запись UsersSubjects изменили напрямую (например, инлайном в админке)
+@receiver(post_save, sender=UsersSubjects)
+@receiver(post_delete, sender=UsersSubjects)
+def users_subjects_saved(sender, instance, **kwargs):
+    # Пользователя в записи могли заменить — прежнего владельца не знаем, сбрасываем всех
+    invalidate_all_scopes()
+
+
+# Могла измениться группа пользователя
+@receiver(post_save, sender=User)
+def user_saved(sender, instance, created, **kwargs):
+    if not created:
+        invalidate_user_scope(instance.pk)
+
+
+# Могла измениться специальность группы
+@receiver(post_save, sender=Group)
+def group_saved(sender, instance, created, **kwargs):
+    rebuild_subject_group_access(group_ids=[instance.pk])
+    if not created:
+        invalidate_all_scopes()
+
+
+# Группы удаляемой специальности получат speciality=NULL без сигналов post_save — запоминаем их заранее
+@receiver(pre_delete, sender=Speciality)
+def speciality_deleting(sender, instance, **kwargs):
+    instance.access_group_ids = list(instance.groups.values_list('id', flat=True))
+
+
+# При удалении специальности или предмета связи удаляются без сигналов m2m_changed
+# (строки таблицы доступа удалённого предмета удаляются каскадно)
+@receiver(post_delete, sender=Speciality)
+@receiver(post_delete, sender=Subject)
+def scope_source_deleted(sender, instance, **kwargs):
+    if sender is Speciality:
+        rebuild_subject_group_access(group_ids=getattr(instance, 'access_group_ids', []))
+    invalidate_all_scopes()
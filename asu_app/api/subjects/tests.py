@@ -1,3 +1,345 @@
-from django.test import TestCase
+import os
+import tempfile
+from unittest import mock
+from urllib.parse import parse_qsl, urlencode, urlsplit
 
-# Create your tests here.
+from django.contrib.auth.models import Permission
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.authtoken.models import Token
+
+from api.groups.models import Group, Speciality
+from api.subjects.access import filter_by_subject_scope, rebuild_subject_group_access
+from api.subjects.models import File, Folder, Lab, Lecture, Semester, Subject, SubjectGroupAccess
+from api.users.models import User, UserRole
+from asu_app.testing import ConstantQueriesMixin
+
+
+class SubjectGroupAccessTestCase(TestCase):
+
+    def setUp(self):
+        cache.clear()  # Области доступа кешируются между тестами
+        self.speciality = Speciality.objects.create(name='АСОИ')
+        self.other_speciality = Speciality.objects.create(name='ИИ')
+        self.group = Group.objects.create(name='АСОИ-211', speciality=self.speciality)
+        self.subject = Subject.objects.create(name='Сети')
+        self.other_subject = Subject.objects.create(name='Базы данных')
+        self.student = User.objects.create(
+            username='student', first_name='Иван', last_name='Иванов',
+            role=UserRole.STUDENT, group=self.group,
+        )
+
+    def access_pairs(self):
+        return set(SubjectGroupAccess.objects.values_list('group_id', 'subject_id'))
+
+    def test_allowed_specialities_changes_are_synced(self):
+        self.subject.allowed_specialities.add(self.speciality)
+        self.assertEqual(self.access_pairs(), {(self.group.id, self.subject.id)})
+
+        self.speciality.allowed_subjects.add(self.other_subject)
+        self.assertEqual(
+            self.access_pairs(),
+            {(self.group.id, self.subject.id), (self.group.id, self.other_subject.id)},
+        )
+
+        self.subject.allowed_specialities.remove(self.speciality)
+        self.assertEqual(self.access_pairs(), {(self.group.id, self.other_subject.id)})
+
+        self.speciality.allowed_subjects.clear()
+        self.assertEqual(self.access_pairs(), set())
+
+    def test_group_speciality_changes_are_synced(self):
+        self.subject.allowed_specialities.add(self.speciality)
+        self.other_subject.allowed_specialities.add(self.other_speciality)
+
+        self.group.speciality = self.other_speciality
+        self.group.save()
+        self.assertEqual(self.access_pairs(), {(self.group.id, self.other_subject.id)})
+
+        new_group = Group.objects.create(name='ИИ-211', speciality=self.other_speciality)
+        self.assertIn((new_group.id, self.other_subject.id), self.access_pairs())
+
+    def test_deletes_are_synced(self):
+        self.subject.allowed_specialities.add(self.speciality)
+        self.other_subject.allowed_specialities.add(self.speciality)
+
+        self.other_subject.delete()
+        self.assertEqual(self.access_pairs(), {(self.group.id, self.subject.id)})
+
+        self.speciality.delete()
+        self.assertEqual(self.access_pairs(), set())
+
+    def test_rebuild_matches_relations(self):
+        self.subject.allowed_specialities.add(self.speciality)
+        SubjectGroupAccess.objects.all().delete()
+
+        self.assertEqual(rebuild_subject_group_access(), 1)
+        self.assertEqual(self.access_pairs(), {(self.group.id, self.subject.id)})
+
+
+class StudentScopeQueriesTestCase(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        speciality = Speciality.objects.create(name='АСОИ')
+        self.group = Group.objects.create(name='АСОИ-211', speciality=speciality)
+        # Несколько групп одной специальности — в старом запросе каждая размножала строки
+        for number in range(3):
+            Group.objects.create(name=f'АСОИ-21{number + 2}', speciality=speciality)
+        self.subject = Subject.objects.create(name='Сети')
+        self.subject.allowed_specialities.add(speciality)
+        Subject.objects.create(name='Недоступный предмет')
+
+        self.student = User.objects.create(
+            username='student', first_name='Иван', last_name='Иванов',
+            role=UserRole.STUDENT, group=self.group,
+        )
+        self.token = Token.objects.create(user=self.student)
+
+    def create_labs(self, count):
+        semester = Semester.objects.create(name='1', subject=self.subject)
+        for number in range(count):
+            Lab.objects.create(name=f'Лаба {number}', semester=semester, file='labs/lab.pdf')
+
+    def get_labs(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/labs/', HTTP_AUTHORIZATION=f'Token {self.token.key}')
+        self.assertEqual(response.status_code, 200)
+        return response.json(), len(queries)
+
+    def test_query_count_does_not_depend_on_rows(self):
+        self.create_labs(2)
+        self.get_labs()  # Прогрев кешей (область доступа, отметка присутствия)
+        labs, few_queries = self.get_labs()
+        self.assertEqual(len(labs), 2)
+
+        self.create_labs(10)
+        labs, many_queries = self.get_labs()
+        self.assertEqual(len(labs), 12)
+        self.assertEqual(few_queries, many_queries)
+
+    def test_student_scope_is_a_semi_join_on_the_access_table(self):
+        queryset = filter_by_subject_scope(Semester.objects.all(), self.student, 'subject_id')
+        sql = str(queryset.query)
+        plan = queryset.explain()
+
+        self.assertIn(SubjectGroupAccess._meta.db_table, sql)
+        self.assertIn(SubjectGroupAccess._meta.db_table, plan)
+        # Цепочка через M2M-таблицу специальностей и группы больше не участвует
+        self.assertNotIn(Subject.allowed_specialities.through._meta.db_table, plan)
+        self.assertNotIn(Group._meta.db_table, plan)
+        self.assertNotIn('DISTINCT', sql.upper())
+
+
+class ExpandableSerializersTestCase(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.speciality = Speciality.objects.create(name='АСОИ')
+        self.subject = Subject.objects.create(name='Сети')
+        self.subject.allowed_specialities.add(self.speciality)
+        self.folder = Folder.objects.create(name='Методички', semester=Semester.objects.create(name='1', subject=self.subject))
+        admin = User.objects.create(
+            username='admin', first_name='Пётр', last_name='Петров',
+            role=UserRole.TEACHER, is_staff=True, is_superuser=True,
+        )
+        self.token = Token.objects.create(user=admin)
+
+    def get_files(self, query=''):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(f'/api/files/{query}', HTTP_AUTHORIZATION=f'Token {self.token.key}')
+        self.assertEqual(response.status_code, 200)
+        return response.json(), len(queries)
+
+    def create_files(self, count):
+        for number in range(count):
+            File.objects.create(name=f'Файл {number}', folder=self.folder, file='files/file.pdf')
+
+    def test_relations_are_nested_by_default(self):
+        # Без ?expand= форма ответа прежняя: вся цепочка папка → семестр → предмет → специальности
+        self.create_files(1)
+        files, _ = self.get_files()
+        subject = files[0]['folder']['semester']['subject']
+        self.assertEqual(subject['name'], 'Сети')
+        self.assertEqual(subject['allowed_specialities'], [{'id': self.speciality.id, 'name': 'АСОИ'}])
+
+        files, _ = self.get_files('?fields=id,name')
+        self.assertEqual(set(files[0]), {'id', 'name'})
+
+    def test_empty_expand_returns_ids(self):
+        self.create_files(1)
+        files, _ = self.get_files('?expand=')
+        self.assertEqual(files[0]['folder'], self.folder.id)
+
+    def test_default_query_count_does_not_depend_on_rows(self):
+        self.create_files(2)
+        _, few_queries = self.get_files()
+        _, trimmed_queries = self.get_files('?fields=id,name')
+        self.assertLess(trimmed_queries, few_queries)  # Убранные ?fields= связи не подгружаются
+
+        self.create_files(10)
+        files, many_queries = self.get_files()
+        self.assertEqual(len(files), 12)
+        self.assertEqual(few_queries, many_queries)
+
+    def test_expand_nests_requested_relations(self):
+        self.create_files(1)
+        files, _ = self.get_files('?expand=folder.semester.subject&fields=id,folder.semester')
+        self.assertEqual(set(files[0]), {'id', 'folder'})
+        self.assertEqual(set(files[0]['folder']), {'semester'})
+        subject = files[0]['folder']['semester']['subject']
+        self.assertEqual(subject['name'], 'Сети')
+        self.assertEqual(subject['allowed_specialities'], [self.speciality.id])
+
+    def test_expand_query_count_does_not_depend_on_rows(self):
+        query = '?expand=folder.semester.subject.allowed_specialities'
+        self.create_files(2)
+        _, few_queries = self.get_files(query)
+
+        self.create_files(10)
+        files, many_queries = self.get_files(query)
+        self.assertEqual(len(files), 12)
+        self.assertEqual(few_queries, many_queries)
+
+
+class AdminQueriesTestCase(ConstantQueriesMixin, TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.subject = Subject.objects.create(name='Сети')
+        self.semester = Semester.objects.create(name='1', subject=self.subject)
+        self.folder = Folder.objects.create(name='Папка', semester=self.semester)
+        self.lab = Lab.objects.create(name='Лаба', semester=self.semester, file='labs/lab.pdf')
+        self.file = File.objects.create(name='Файл', folder=self.folder, file='additional_files/file.pdf')
+        self.admin = User.objects.create(
+            username='admin', first_name='Админ', last_name='Админов', role=UserRole.TEACHER,
+            is_staff=True, is_superuser=True,
+        )
+        self.client.force_login(self.admin)
+
+    def add_rows(self, number):
+        # Строки во вложенных формах основного семестра и папки и ещё один предмет с семестром для списков выбора
+        Folder.objects.create(name=f'Папка {number}', semester=self.semester)
+        Lab.objects.create(name=f'Лаба {number}', semester=self.semester, file='labs/lab.pdf')
+        Lecture.objects.create(name=f'Лекция {number}', semester=self.semester, file='lectures/lecture.pdf')
+        File.objects.create(name=f'Файл {number}', folder=self.folder, file='additional_files/file.pdf')
+        semester = Semester.objects.create(name=str(number), subject=Subject.objects.create(name=f'Предмет {number}'))
+        Folder.objects.create(name=f'Папка {number}', semester=semester)
+
+    def test_changelists(self):
+        self.assertConstantQueries([
+            reverse(f'admin:subjects_{model}_changelist') for model in ('semester', 'lab', 'lecture', 'folder', 'file')
+        ])
+
+    def test_change_forms(self):
+        self.assertConstantQueries([
+            reverse('admin:subjects_semester_change', args=[self.semester.id]),  # Папки, лабораторные и лекции
+            reverse('admin:subjects_folder_change', args=[self.folder.id]),  # Файлы
+            reverse('admin:subjects_lab_change', args=[self.lab.id]),  # Выбор семестра
+            reverse('admin:subjects_file_change', args=[self.file.id]),  # Выбор папки
+        ])
+
+    def test_teacher_chooses_only_own_semesters(self):
+        self.add_rows(1)
+        teacher = User.objects.create(
+            username='teacher', first_name='Пётр', last_name='Петров', role=UserRole.TEACHER, is_staff=True,
+        )
+        teacher.teacher_subjects.add(self.subject)
+        teacher.user_permissions.add(*Permission.objects.filter(codename__in=['view_lab', 'change_lab']))
+        self.client.force_login(teacher)
+
+        response = self.client.get(reverse('admin:subjects_lab_change', args=[self.lab.id]))
+        self.assertEqual(list(response.context['adminform'].form.fields['semester'].queryset), [self.semester])
+
+
+class ProtectedMediaTestCase(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        media_root = tempfile.TemporaryDirectory()
+        self.addCleanup(media_root.cleanup)
+        self.media_settings = override_settings(MEDIA_ROOT=media_root.name, MEDIA_ACCEL_REDIRECT=True)
+        self.media_settings.enable()
+        self.addCleanup(self.media_settings.disable)
+
+        os.makedirs(os.path.join(media_root.name, 'labs'))
+        with open(os.path.join(media_root.name, 'labs', 'лаба 1.pdf'), 'wb') as file:
+            file.write(b'%PDF-1.4')
+
+        speciality = Speciality.objects.create(name='АСОИ')
+        group = Group.objects.create(name='АСОИ-211', speciality=speciality)
+        self.subject = Subject.objects.create(name='Сети')
+        self.subject.allowed_specialities.add(speciality)
+        semester = Semester.objects.create(name='1', subject=self.subject)
+        Lab.objects.create(name='Лаба 1', semester=semester, file='labs/лаба 1.pdf')
+
+        self.student = User.objects.create(
+            username='student', first_name='Иван', last_name='Иванов',
+            role=UserRole.STUDENT, group=group,
+        )
+        other_group = Group.objects.create(name='ИИ-211', speciality=Speciality.objects.create(name='ИИ'))
+        self.outsider = User.objects.create(
+            username='outsider', first_name='Пётр', last_name='Петров',
+            role=UserRole.STUDENT, group=other_group,
+        )
+
+    def get(self, user, path):
+        token = Token.objects.get_or_create(user=user)[0]
+        return self.client.get(f'/media/{path}', HTTP_AUTHORIZATION=f'Token {token.key}', HTTP_ACCEPT='application/pdf')
+
+    def test_allowed_file_is_offloaded_to_nginx(self):
+        response = self.get(self.student, 'labs/лаба 1.pdf')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.content, b'')
+        self.assertEqual(response['X-Accel-Redirect'], '/protected-media/labs/%D0%BB%D0%B0%D0%B1%D0%B0%201.pdf')
+        self.assertEqual(response['Content-Type'], 'application/pdf')
+        self.assertIn('private', response['Cache-Control'])
+        self.assertIn('max-age=', response['Cache-Control'])
+
+    def test_access_follows_subject_scope(self):
+        self.assertEqual(self.get(self.outsider, 'labs/лаба 1.pdf').status_code, 404)
+        self.assertEqual(self.client.get('/media/labs/лаба 1.pdf').status_code, 401)
+        # Файлы вне известных каталогов и пути за пределами MEDIA_ROOT не отдаются
+        self.assertEqual(self.get(self.student, 'other/лаба 1.pdf').status_code, 404)
+        self.assertEqual(self.get(self.student, 'labs/../../settings.py').status_code, 404)
+
+    def signed_url(self):
+        # Ссылка на файл в том виде, в каком её получает интерфейс
+        token = Token.objects.get_or_create(user=self.student)[0]
+        labs = self.client.get('/api/labs/', HTTP_AUTHORIZATION=f'Token {token.key}').json()
+        url = urlsplit(labs[0]['file'])
+        return f'{url.path}?{url.query}'
+
+    def test_signed_url_opens_without_authorization(self):
+        url = self.signed_url()
+
+        # <a href> и <img src> не отправляют заголовок с токеном
+        response = self.client.get(url, HTTP_ACCEPT='application/pdf')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['X-Accel-Redirect'], '/protected-media/labs/%D0%BB%D0%B0%D0%B1%D0%B0%201.pdf')
+        # В пределах окна ссылка не меняется — браузер берёт файл из своего кеша
+        self.assertEqual(self.signed_url(), url)
+
+    def test_signature_is_bound_to_file_and_expiry(self):
+        url = self.signed_url()
+        path, query = url.split('?')
+        params = dict(parse_qsl(query))
+
+        self.assertEqual(self.client.get(path.replace('labs/', 'lectures/') + '?' + query).status_code, 401)
+        tampered = urlencode({**params, 'expires': int(params['expires']) + 1})
+        self.assertEqual(self.client.get(f'{path}?{tampered}').status_code, 401)
+        with mock.patch('asu_app.media.time.time', return_value=int(params['expires']) + 1):
+            self.assertEqual(self.client.get(url).status_code, 401)
+
+    def test_served_by_django_without_nginx(self):
+        with override_settings(MEDIA_ACCEL_REDIRECT=False):
+            response = self.get(self.student, 'labs/лаба 1.pdf')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('X-Accel-Redirect', response)
+        self.assertEqual(b''.join(response.streaming_content), b'%PDF-1.4')
+        self.assertIn('Last-Modified', response)
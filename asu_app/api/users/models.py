@@ -6,6 +6,7 @@ from django.contrib.auth.models import AbstractUser  # Наследуемся о
 
 from api.groups.models import Group  # Импорт группы для связи с пользователями
 from api.subjects.models import Subject  # Импорт предметов, которые преподаёт пользователь
+from api.users.presence import presence_key  # Ключ кеша с временем последней активности
 
 
 
@@ -75,10 +76,11 @@ class User(AbstractUser):  # Наследуем стандартные поля:
     def full_name(self):
         return '{} {}'.format(self.last_name, self.first_name)
 
-    # Время последнего действия из кеша (обновляется в middleware)
+    # Время последнего действия из кеша (обновляется в middleware с задержкой до
+    # USER_LASTSEEN_WRITE_INTERVAL + USER_LASTSEEN_FLUSH_INTERVAL секунд)
     @property
     def last_seen(self):
-        return cache.get(f'seen_{self.id}')
+        return cache.get(presence_key(self.id))
 
     # Проверка: считается ли пользователь "онлайн"
     @property
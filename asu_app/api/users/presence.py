@@ -0,0 +1,107 @@
+import datetime  # Время последнего действия хранится как naive datetime (см. User.is_online)
+import threading  # Воркер может обслуживать запросы в нескольких потоках
+import time  # Монотонные часы для троттлинга записей
+
+from django.conf import settings  # Интервалы записи и сброса, TTL отметок
+from django.core.cache import cache  # Хранилище времени последней активности
+from django.db import close_old_connections, connection  # Соединение потока таймера (кеш может быть в базе)
+
+
+
+def presence_key(user_id):
+    # Ключ кеша с временем последнего действия пользователя
+    return f'seen_{user_id}'
+
+
+
+class PresenceTracker:
+    """
+    Отслеживает время последней активности пользователей с отложенной записью в кеш.
+
+    Отметка пользователя обновляется не чаще раза в USER_LASTSEEN_WRITE_INTERVAL секунд —
+    в остальных случаях запрос стоит одной проверки словаря в памяти.
+    Обновлённые отметки копятся в буфере и записываются в кеш одним cache.set_many
+    раз в USER_LASTSEEN_FLUSH_INTERVAL секунд. Если запросов больше нет, буфер сбрасывает
+    фоновый таймер, поэтому отметка попадает в кеш не позже чем через flush_interval секунд.
+    При остановке воркера несброшенные отметки теряются: это не больше flush_interval секунд
+    активности, а запись в кеш при завершении процесса может не застать ни соединения, ни таблицы.
+    """
+
+    def __init__(self, write_interval, flush_interval, timeout, clock=time.monotonic, timer=threading.Timer):
+        self._write_interval = write_interval
+        self._flush_interval = flush_interval
+        self._timeout = timeout
+        self._clock = clock
+        self._timer_factory = timer
+        self._timer = None  # Таймер отложенного сброса, пока буфер не пуст
+        self._lock = threading.Lock()
+        self._written_at = {}  # user_id -> когда отметка пользователя последний раз попала в буфер
+        self._pending = {}  # Ключ кеша -> время последнего действия, ещё не записанное в кеш
+        self._flushed_at = clock()
+
+    def touch(self, user_id):
+        """
+        Отмечает активность пользователя.
+        """
+        moment = self._clock()
+        written_at = self._written_at.get(user_id)
+        if written_at is not None and moment - written_at < self._write_interval:
+            return  # Отметка ещё свежая — ничего не делаем
+
+        with self._lock:
+            self._written_at[user_id] = moment
+            self._pending[presence_key(user_id)] = datetime.datetime.now()
+            if moment - self._flushed_at < self._flush_interval:
+                self._schedule_flush()
+                return
+            batch = self._take_batch(moment)
+
+        cache.set_many(batch, self._timeout)
+
+    def flush(self):
+        """
+        Немедленно записывает накопленные отметки в кеш.
+        """
+        with self._lock:
+            batch = self._take_batch(self._clock())
+
+        if batch:
+            cache.set_many(batch, self._timeout)
+
+    def _flush_in_background(self):
+        # Поток таймера открывает собственное соединение с базой — закрываем его после записи
+        close_old_connections()
+        try:
+            self.flush()
+        finally:
+            connection.close()
+
+    def _schedule_flush(self):
+        # Вызывается под блокировкой: один таймер на буфер, сброс — через flush_interval после первой отметки
+        if self._timer is None:
+            self._timer = self._timer_factory(self._flush_interval, self._flush_in_background)
+            self._timer.daemon = True  # Таймер не должен задерживать остановку воркера
+            self._timer.start()
+
+    def _take_batch(self, moment):
+        # Вызывается под блокировкой: забирает буфер и забывает давно неактивных пользователей
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, {}
+        self._flushed_at = moment
+        self._written_at = {
+            user_id: written_at
+            for user_id, written_at in self._written_at.items()
+            if moment - written_at < self._write_interval
+        }
+        return batch
+
+
+
+# Один трекер на процесс: буфер и троттлинг общие для всех потоков воркера
+tracker = PresenceTracker(
+    write_interval=settings.USER_LASTSEEN_WRITE_INTERVAL,
+    flush_interval=settings.USER_LASTSEEN_FLUSH_INTERVAL,
+    timeout=settings.USER_LASTSEEN_TIMEOUT,
+)
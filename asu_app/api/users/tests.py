@@ -1,3 +1,72 @@
+from unittest import mock
+
+from django.core.cache import cache
 from django.test import TestCase
 
-# Create your tests here.
+from api.users.presence import PresenceTracker, presence_key
+from asu_app.testing import FakeTimer
+
+
+class PresenceTrackerTestCase(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        FakeTimer.started = []
+        self.now = 0.0
+        self.tracker = PresenceTracker(
+            write_interval=60, flush_interval=10, timeout=3600, clock=lambda: self.now, timer=FakeTimer,
+        )
+
+    def test_touches_are_throttled_per_user(self):
+        self.tracker.touch(1)
+        self.tracker.flush()
+        self.assertIsNotNone(cache.get(presence_key(1)))
+        cache.delete(presence_key(1))
+
+        self.now = 30.0
+        self.tracker.touch(1)
+        self.tracker.flush()
+        self.assertIsNone(cache.get(presence_key(1)))  # Отметка ещё свежая — повторно не записывается
+        self.assertEqual(len(FakeTimer.started), 1)
+
+        self.now = 70.0
+        self.tracker.touch(1)  # Интервал записи прошёл — отметка обновляется и буфер сбрасывается
+        self.assertIsNotNone(cache.get(presence_key(1)))
+
+    def test_buffer_is_flushed_by_the_next_touch_after_interval(self):
+        self.tracker.touch(1)
+        self.assertIsNone(cache.get(presence_key(1)))
+
+        self.now = 11.0
+        self.tracker.touch(2)
+        self.assertIsNotNone(cache.get(presence_key(1)))
+        self.assertIsNotNone(cache.get(presence_key(2)))
+        self.assertTrue(FakeTimer.started[0].cancelled)
+
+    def test_timer_bounds_staleness_without_further_requests(self):
+        self.tracker.touch(1)
+        self.tracker.touch(2)
+
+        # Один таймер на буфер, срабатывает через flush_interval, не мешает остановке процесса
+        self.assertEqual(len(FakeTimer.started), 1)
+        timer = FakeTimer.started[0]
+        self.assertEqual(timer.interval, 10)
+        self.assertTrue(timer.daemon)
+
+        timer.fire()
+        self.assertIsNotNone(cache.get(presence_key(1)))
+        self.assertIsNotNone(cache.get(presence_key(2)))
+
+        # После сброса следующая отметка заводит новый таймер
+        self.now = 5.0
+        self.tracker.touch(3)
+        self.assertEqual(len(FakeTimer.started), 2)
+
+    def test_timer_thread_closes_its_connection(self):
+        self.tracker.touch(1)
+        with mock.patch('api.users.presence.close_old_connections') as close_old, \
+                mock.patch('api.users.presence.connection') as connection:
+            FakeTimer.started[0].fire()
+        close_old.assert_called_once()
+        connection.close.assert_called_once()
+        self.assertIsNotNone(cache.get(presence_key(1)))
@@ -10,6 +10,7 @@ from rest_framework.permissions import AllowAny, IsAdminUser  # Разрешен
 from django_filters.rest_framework import DjangoFilterBackend  # Фильтрация по полям в списке пользователей
 
 from asu_app.custom_permissions import ReadOnlyIfTeacher  # Кастомное разрешение: преподавателям только чтение
+from asu_app.pagination import PagedByDefaultPagination  # Список пользователей отдаётся страницами
 
 
 
@@ -19,6 +20,7 @@ class UserViewSet(viewsets.ModelViewSet):
     serializer_class = UserSerializer
     filter_backends = [DjangoFilterBackend]
     filterset_fields = ['group', 'role']  # Фильтрация по группе и роли
+    pagination_class = PagedByDefaultPagination
 
     def get_queryset(self):
         if self.request.user.is_superuser:
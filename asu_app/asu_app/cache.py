@@ -0,0 +1,172 @@
+import logging  # Периодическая сводка попаданий в кеш
+import threading  # Счётчики общие для всех потоков воркера
+import time  # Интервал между сводками
+
+from django.core.cache import caches  # Общий (L2) кеш берётся по алиасу из CACHES
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+from django.core.cache.backends.locmem import LocMemCache  # Локальный (L1) кеш процесса с TTL
+
+
+logger = logging.getLogger(__name__)
+
+_missing = object()  # Маркер отсутствия значения (None тоже может быть закешированным значением)
+
+# Django создаёт экземпляр кеша на каждый поток, поэтому счётчики, как и данные L1, общие для процесса
+_stats_lock = threading.Lock()
+_stats = {}
+_counters = {}  # location -> ключи L1 счётчиков, которые не кешируются в памяти процесса
+
+
+
+class TwoTierCache(BaseCache):
+    """
+    Двухуровневый кеш: небольшой кеш в памяти процесса (L1) перед общим для всех
+    воркеров и хостов кешем (L2, алиас из OPTIONS['L2']).
+
+    Чтение идёт сначала из L1, при промахе — из L2 с сохранением результата в L1
+    не дольше OPTIONS['L1_TIMEOUT'] секунд. Запись и удаление идут в оба уровня,
+    поэтому другие воркеры видят изменение не позже, чем через L1_TIMEOUT.
+    Версия и префикс ключей (VERSION/KEY_PREFIX) задаются у L2, поэтому один и тот же ключ
+    означает одно и то же значение и через этот кеш, и через L2 напрямую.
+
+    Срок жизни значения в L2 при чтении неизвестен, поэтому копия в L1 может пережить его
+    на L1_TIMEOUT секунд. Через L1 допустимо читать ключи, которые не меняются на месте
+    (в ключе есть версия содержимого) или для которых такое отставание безразлично.
+    Ключи, изменение или истечение которых должно быть видно сразу (версии, счётчики),
+    перечисляются префиксами в OPTIONS['L2_ONLY'] и всегда читаются и пишутся только в L2.
+    Кроме того, в L1 не попадает ключ, который хотя бы раз увеличивали (incr/decr) в этом процессе.
+    """
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        options = params.get('OPTIONS', {})
+        self._l2_alias = options.get('L2', 'shared')
+        self._l1_timeout = options.get('L1_TIMEOUT', 5)
+        self._l2_only = tuple(options.get('L2_ONLY', ()))
+        self._l1 = LocMemCache(f'two-tier-l1-{location}', {
+            'TIMEOUT': self._l1_timeout,
+            'OPTIONS': {'MAX_ENTRIES': options.get('L1_MAX_ENTRIES', 1000)},
+        })
+        self._stats_interval = options.get('STATS_LOG_INTERVAL', 300)
+        with _stats_lock:
+            self._counters = _counters.setdefault(location, set())
+        with _stats_lock:
+            self._stats = _stats.setdefault(location, {
+                'l1_hits': 0, 'l2_hits': 0, 'misses': 0, 'logged_at': time.monotonic(),
+            })
+
+    @property
+    def l2(self):
+        # caches[...] хранит экземпляры по потокам — получаем при каждом обращении
+        return caches[self._l2_alias]
+
+    def stats(self):
+        """
+        Счётчики попаданий и промахов в текущем процессе.
+        """
+        with _stats_lock:
+            return {name: value for name, value in self._stats.items() if name != 'logged_at'}
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        added = self.l2.add(key, value, timeout, version)
+        if added:
+            self._l1_set(key, version, value, self._get_l1_timeout(timeout))
+        return added
+
+    def get(self, key, default=None, version=None):
+        value = self._l1.get(self._l1_key(key, version), _missing) if self._in_l1(key) else _missing
+        if value is not _missing:
+            self._record('l1_hits')
+            return value
+
+        value = self.l2.get(key, _missing, version)
+        if value is _missing:
+            self._record('misses')
+            return default
+
+        self._record('l2_hits')
+        self._l1_set(key, version, value)
+        return value
+
+    def get_many(self, keys, version=None):
+        l1_keys = {self._l1_key(key, version): key for key in keys if self._in_l1(key)}
+        found = {l1_keys[l1_key]: value for l1_key, value in self._l1.get_many(l1_keys).items()}
+        self._record('l1_hits', len(found))
+
+        missing = [key for key in keys if key not in found]
+        if missing:
+            from_l2 = self.l2.get_many(missing, version)
+            self._record('l2_hits', len(from_l2))
+            self._record('misses', len(missing) - len(from_l2))
+            for key, value in from_l2.items():
+                self._l1_set(key, version, value)
+            found.update(from_l2)
+
+        return found
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self.l2.set(key, value, timeout, version)
+        self._l1_set(key, version, value, self._get_l1_timeout(timeout))
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        failed = self.l2.set_many(data, timeout, version)
+        l1_timeout = self._get_l1_timeout(timeout)
+        for key, value in data.items():
+            if key not in failed:
+                self._l1_set(key, version, value, l1_timeout)
+        return failed
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        return self.l2.touch(key, timeout, version)
+
+    def delete(self, key, version=None):
+        self._l1.delete(self._l1_key(key, version))
+        return self.l2.delete(key, version)
+
+    def delete_many(self, keys, version=None):
+        self._l1.delete_many([self._l1_key(key, version) for key in keys])
+        self.l2.delete_many(keys, version)
+
+    def has_key(self, key, version=None):
+        return self.get(key, _missing, version) is not _missing
+
+    def incr(self, key, delta=1, version=None):
+        # Счётчики атомарны только в L2 — локальную копию сбрасываем и больше не заводим
+        l1_key = self._l1_key(key, version)
+        self._counters.add(l1_key)
+        self._l1.delete(l1_key)
+        return self.l2.incr(key, delta, version)
+
+    def clear(self):
+        self._l1.clear()
+        self.l2.clear()
+
+    def _in_l1(self, key):
+        return not key.startswith(self._l2_only)
+
+    def _l1_set(self, key, version, value, timeout=DEFAULT_TIMEOUT):
+        l1_key = self._l1_key(key, version)
+        if self._in_l1(key) and l1_key not in self._counters:
+            self._l1.set(l1_key, value, timeout)
+
+    def _l1_key(self, key, version):
+        # Ключ L1 совпадает с итоговым ключом L2 (с его префиксом и версией)
+        return self.l2.make_key(key, version)
+
+    def _get_l1_timeout(self, timeout):
+        # Локальная копия живёт не дольше L1_TIMEOUT и не дольше самого значения
+        if timeout is DEFAULT_TIMEOUT or timeout is None:
+            return self._l1_timeout
+        return min(timeout, self._l1_timeout)
+
+    def _record(self, counter, amount=1):
+        if not amount:
+            return
+        with _stats_lock:
+            self._stats[counter] += amount
+            now = time.monotonic()
+            if now - self._stats['logged_at'] < self._stats_interval:
+                return
+            self._stats['logged_at'] = now
+        logger.info('Cache stats: %s', self.stats())
+
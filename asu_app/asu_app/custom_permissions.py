@@ -1,10 +1,17 @@
 from rest_framework.permissions import BasePermission, SAFE_METHODS  # Базовый класс и список безопасных методов
 from asu_app.settings import SYSTEM_ADMINISTRATION_SUBJECT_ID  # ID дисциплины "Системное администрирование"
-from api.subjects.models import Subject  # Импорт модели дисциплины
+from api.subjects.access import role_subject_ids  # Закешированный список доступных пользователю предметов
 from api.users.models import UserRole  # Роли пользователей (STUDENT, TEACHER)
 
 
 
+def has_system_administration_access(user):
+    # Студенту дисциплина доступна через специальность группы, преподавателю — если он её ведёт.
+    # Статус суперпользователя доступа не даёт (администраторов пропускает IsAdminUser во вьюхах)
+    return SYSTEM_ADMINISTRATION_SUBJECT_ID in role_subject_ids(user)
+
+
+
 class ReadOnly(BasePermission):
     def has_permission(self, request, view):
         return request.method in SAFE_METHODS
@@ -13,52 +20,17 @@ class ReadOnly(BasePermission):
 class ReadOnlyIfAllowed(BasePermission):
 
     def has_permission(self, request, view):
-        # Получаем объект системной дисциплины и её разрешённые специальности
-        sys_adm_subj = Subject.objects.prefetch_related('allowed_specialities').get(
-            pk=SYSTEM_ADMINISTRATION_SUBJECT_ID
-        )
-
-        if request.user.role == UserRole.STUDENT:
-            # Студент может только читать, если его специальность допущена к системной дисциплине
-            if (
-                request.method in SAFE_METHODS and
-                request.user.group.speciality in sys_adm_subj.allowed_specialities.all()
-            ):
-                return True
-            return False
-
-        else:
-            # Преподаватель может читать, если он ведёт системную дисциплину
-            if (
-                request.method in SAFE_METHODS and
-                sys_adm_subj in request.user.teacher_subjects.all()
-            ):
-                return True
-            return False
+        # Только чтение — студенту, чья специальность допущена к системной дисциплине,
+        # и преподавателю, который её ведёт
+        return request.method in SAFE_METHODS and has_system_administration_access(request.user)
 
 
 
 class ConsolePermissions(BasePermission):
 
     def has_permission(self, request, view):
-        sys_adm_subj = Subject.objects.prefetch_related('allowed_specialities').get(
-            pk=SYSTEM_ADMINISTRATION_SUBJECT_ID
-        )
-         # Студент может использовать консоль, если его специальность допущена
-        if request.user.role == UserRole.STUDENT:
-            if (
-                request.user.group.speciality
-                in sys_adm_subj.allowed_specialities.all()
-            ):
-                return True
-            return False
-        else:
-            if (
-                 # Преподаватель — если ведёт системную дисциплину
-                sys_adm_subj in request.user.teacher_subjects.all()
-            ):
-                return True
-            return False
+        # Консоль доступна тем же пользователям, но без ограничения на метод
+        return has_system_administration_access(request.user)
 
 
 class ReadOnlyIfTeacher(BasePermission):
@@ -0,0 +1,133 @@
+from rest_framework import serializers
+
+
+
+def parse_paths(value):
+    """
+    Разбирает параметр вида 'semester.subject,id' в дерево {'semester': {'subject': {}}, 'id': {}}.
+    Пустое поддерево означает «без уточнений».
+    """
+    tree = {}
+    for path in (value or '').split(','):
+        node = tree
+        for name in path.strip().split('.'):
+            if name:
+                node = node.setdefault(name, {})
+    return tree
+
+
+def restrict_to_fields(expand, fields):
+    # Связи, которые всё равно будут убраны ?fields=, не разворачиваются и не подгружаются
+    if not fields:
+        return expand
+    return {name: restrict_to_fields(subtree, fields[name]) for name, subtree in expand.items() if name in fields}
+
+
+def requested_paths(serializer_class, query_params):
+    """
+    Деревья expand и fields из параметров запроса. Без ?expand= разворачиваются все связи
+    (прежняя вложенная форма ответа, на которую рассчитан веб-интерфейс); ?expand= с пустым
+    или частичным списком оставляет остальные связи идентификаторами.
+    """
+    if 'expand' in query_params:
+        expand = parse_paths(query_params.get('expand'))
+    else:
+        expand = serializer_class.default_expand()
+    fields = parse_paths(query_params.get('fields'))
+    return restrict_to_fields(expand, fields), fields
+
+
+
+class ExpandableFieldsMixin:
+    """
+    Сериализатор с выбором полей (?fields=) и разворачиванием связей (?expand=).
+
+    Связи из Meta.expandable_fields ({'поле': (сериализатор, параметры)}) по умолчанию
+    отдаются вложенными объектами целиком, как и раньше. ?expand= перечисляет связи, которые
+    нужно развернуть (вложенность — через точку: ?expand=semester.subject), остальные
+    отдаются идентификаторами; пустой ?expand= — все связи идентификаторами.
+    ?fields=id,name,semester.name оставляет только перечисленные поля, в том числе вложенные.
+    Параметры берутся из запроса в контексте, вложенным сериализаторам передаются поддеревья.
+    """
+
+    def __init__(self, *args, expand=None, fields=None, **kwargs):
+        super().__init__(*args, **kwargs)
+
+        request = self.context.get('request')
+        if expand is None or fields is None:
+            requested_expand, requested_fields = (
+                requested_paths(type(self), request.query_params) if request else (self.default_expand(), {})
+            )
+            expand = requested_expand if expand is None else expand
+            fields = requested_fields if fields is None else fields
+
+        for name, (serializer_class, options) in self.get_expanded(expand).items():
+            if issubclass(serializer_class, ExpandableFieldsMixin):
+                options = dict(options, expand=expand[name], fields=fields.get(name) or {})
+            self.fields[name] = serializer_class(read_only=True, **options)
+
+        if fields:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
+    @classmethod
+    def default_expand(cls):
+        # Все связи, развёрнутые на всю глубину, — форма ответа без ?expand=
+        return {
+            name: serializer_class.default_expand() if issubclass(serializer_class, ExpandableFieldsMixin) else {}
+            for name, (serializer_class, options) in getattr(cls.Meta, 'expandable_fields', {}).items()
+        }
+
+    @classmethod
+    def get_expanded(cls, expand):
+        # Разворачиваемые связи из запрошенных (неизвестные имена игнорируются)
+        expandable = getattr(cls.Meta, 'expandable_fields', {})
+        return {name: expandable[name] for name in expand if name in expandable}
+
+    @classmethod
+    def get_related_lookups(cls, expand, prefix='', prefetch_only=False, fields=None):
+        """
+        Пути для select_related и prefetch_related, нужные для ответа с указанными expand и fields.
+        Связи «ко многим» и всё, что вложено в них, подгружаются через prefetch_related.
+        """
+        select, prefetch = [], []
+        for name, (serializer_class, options) in getattr(cls.Meta, 'expandable_fields', {}).items():
+            if fields and name not in fields:
+                continue  # Поле убрано ?fields= — подгружать нечего
+            lookup = prefix + name
+            many = prefetch_only or options.get('many', False)
+            if name not in expand:
+                if options.get('many', False):
+                    prefetch.append(lookup)  # Даже список идентификаторов «ко многим» — отдельный запрос
+                continue
+            (prefetch if many else select).append(lookup)
+            if issubclass(serializer_class, ExpandableFieldsMixin):
+                nested_select, nested_prefetch = serializer_class.get_related_lookups(
+                    expand[name], f'{lookup}__', many, (fields or {}).get(name),
+                )
+                select += nested_select
+                prefetch += nested_prefetch
+        return select, prefetch
+
+
+
+class ExpandableModelSerializer(ExpandableFieldsMixin, serializers.ModelSerializer):
+    pass
+
+
+
+class ExpandableViewMixin:
+    """
+    Подгружает связи, которые будут развёрнуты в ответе (все без ?expand=, иначе — перечисленные),
+    и только их.
+    """
+
+    def expand_queryset(self, queryset):
+        serializer_class = self.get_serializer_class()
+        expand, fields = requested_paths(serializer_class, self.request.query_params)
+        select, prefetch = serializer_class.get_related_lookups(expand, fields=fields)
+        if select:
+            queryset = queryset.select_related(*select)
+        if prefetch:
+            queryset = queryset.prefetch_related(*prefetch)
+        return queryset
@@ -0,0 +1,147 @@
+import mimetypes
+import os
+import posixpath
+import time
+from urllib.parse import quote, unquote, urlencode, urlsplit, urlunsplit
+
+from django.conf import settings
+from django.core import signing
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import Http404, HttpResponse
+from django.utils._os import safe_join
+from django.utils.cache import patch_cache_control
+from django.utils.crypto import constant_time_compare
+from django.views.static import serve
+from rest_framework import serializers
+from rest_framework.authentication import SessionAuthentication, TokenAuthentication
+from rest_framework.exceptions import NotAuthenticated
+from rest_framework.views import APIView
+
+from api.simple_tests.models import Question
+from api.subjects.access import filter_by_subject_scope
+from api.subjects.models import File, Lab, Lecture
+
+
+
+def _scoped_exists(queryset, user, *subject_lookups):
+    return filter_by_subject_scope(queryset, user, *subject_lookups).exists()
+
+
+# Проверка доступа к загруженному файлу по каталогу upload_to: файл виден тому, кому виден объект,
+# к которому он прикреплён (те же области доступа, что и во ViewSet'ах)
+MEDIA_ACCESS = {
+    'labs/': lambda user, name: _scoped_exists(
+        Lab.objects.filter(file=name), user, 'semester__subject_id',
+    ),
+    'lectures/': lambda user, name: _scoped_exists(
+        Lecture.objects.filter(file=name), user, 'semester__subject_id',
+    ),
+    'additional_files/': lambda user, name: _scoped_exists(
+        File.objects.filter(file=name), user, 'folder__semester__subject_id',
+    ),
+    'question_pictures/': lambda user, name: _scoped_exists(
+        Question.objects.filter(image=name), user,
+        'test__lab__semester__subject_id', 'test__lecture__semester__subject_id',
+    ),
+    # Аватары показываются всем авторизованным пользователям
+    'profiles/': lambda user, name: True,
+}
+
+
+def has_media_access(user, name):
+    # Файлы вне известных каталогов доступны только суперпользователю
+    if user.is_superuser:
+        return True
+    for prefix, check in MEDIA_ACCESS.items():
+        if name.startswith(prefix):
+            return check(user, name)
+    return False
+
+
+def _media_name(path):
+    return posixpath.normpath(path).lstrip('/')
+
+
+def _media_signature(name, expires):
+    return signing.Signer(salt='asu_app.media').signature(f'{name}:{expires}')
+
+
+def sign_media_url(url):
+    """
+    Добавляет к ссылке на медиафайл подпись со сроком действия (?expires=&signature=).
+    Ссылки открываются из <a href> и <img src>, где заголовка с токеном нет, поэтому доступ
+    по ссылке подтверждает подпись, выданная вместе с данными API тому, кому файл виден.
+    Срок выравнивается по окнам MEDIA_URL_MAX_AGE: в пределах окна ссылка не меняется
+    (браузер берёт файл из своего кеша) и действует ещё не меньше MEDIA_URL_MAX_AGE секунд.
+    """
+    if not url:
+        return url
+    parts = urlsplit(url)
+    if not parts.path.startswith(settings.MEDIA_URL):
+        return url
+    name = _media_name(unquote(parts.path[len(settings.MEDIA_URL):]))
+    window = settings.MEDIA_URL_MAX_AGE
+    expires = (int(time.time()) // window + 2) * window
+    query = urlencode({'expires': expires, 'signature': _media_signature(name, expires)})
+    return urlunsplit(parts._replace(query=query))
+
+
+def has_valid_signature(params, name):
+    expires = params.get('expires', '')
+    if not expires.isdigit() or int(expires) < time.time():
+        return False
+    return constant_time_compare(params.get('signature', ''), _media_signature(name, expires))
+
+
+class SignedImageField(serializers.ImageField):
+    # Ссылка на картинку с подписью (см. sign_media_url)
+    def to_representation(self, value):
+        return sign_media_url(super().to_representation(value))
+
+
+class ProtectedMediaView(APIView):
+    """
+    Отдача загруженных файлов (MEDIA_URL) после проверки доступа.
+
+    Сам файл отдаёт nginx: ответ содержит только заголовок X-Accel-Redirect на внутренний
+    location MEDIA_ACCEL_LOCATION (см. asu_ui/config/default.conf), поэтому воркер gunicorn
+    не занят на время скачивания, а Range и условные запросы обрабатывает nginx.
+    Без nginx (MEDIA_ACCEL_REDIRECT выключен) файл отдаётся средствами Django.
+
+    Ссылки из API подписаны (sign_media_url) и открываются без авторизации; без подписи файл
+    отдаётся пользователю, авторизованному токеном или сессией, если ему виден объект с этим файлом.
+    """
+    # Сессия — для ссылок на файлы из админки, где заголовка с токеном нет
+    authentication_classes = [TokenAuthentication, SessionAuthentication]
+    permission_classes = []  # Доступ проверяется в get: по подписи ссылки или по пользователю
+
+    def perform_content_negotiation(self, request, force=False):
+        # Ответ — файл, а не данные API: Accept браузера (image/*, application/pdf) не должен приводить к 406
+        return super().perform_content_negotiation(request, force=True)
+
+    def get(self, request, path):
+        name = _media_name(path)
+        try:
+            full_path = safe_join(settings.MEDIA_ROOT, name)
+        except SuspiciousFileOperation:
+            raise Http404
+        if not has_valid_signature(request.query_params, name):
+            if not request.user.is_authenticated:
+                raise NotAuthenticated
+            if not has_media_access(request.user, name):
+                raise Http404  # Не раскрываем, что файл существует
+        if not os.path.isfile(full_path):
+            raise Http404
+
+        if settings.MEDIA_ACCEL_REDIRECT:
+            content_type, encoding = mimetypes.guess_type(name)
+            # nginx сохраняет Content-Type, Content-Disposition и Cache-Control этого ответа
+            response = HttpResponse(content_type=content_type or 'application/octet-stream')
+            response['X-Accel-Redirect'] = quote(settings.MEDIA_ACCEL_LOCATION + name)
+            response['Content-Disposition'] = f"inline; filename*=UTF-8''{quote(posixpath.basename(name))}"
+        else:
+            response = serve(request._request, name, document_root=settings.MEDIA_ROOT)
+
+        # Файлы доступны не всем, поэтому кешируются только в браузере
+        patch_cache_control(response, private=True, max_age=settings.MEDIA_CACHE_MAX_AGE)
+        return response
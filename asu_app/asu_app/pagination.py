@@ -0,0 +1,50 @@
+from django.conf import settings  # Максимальный размер страницы
+from rest_framework.pagination import CursorPagination
+from rest_framework.response import Response
+
+
+
+class HeaderCursorPagination(CursorPagination):
+    """
+    Курсорная (keyset) пагинация по id: стоимость страницы не зависит от её номера,
+    а вставки между запросами не сдвигают страницы.
+
+    Пагинация включается только по запросу клиента — параметром ?cursor= или ?page_size=:
+    без параметров список отдаётся целиком, как раньше. Списки, которые растут без ограничений,
+    используют PagedByDefaultPagination. Страницы идут от новых записей к старым.
+
+    Тело ответа остаётся обычным списком (как ожидает веб-интерфейс), ссылки на соседние
+    страницы передаются в заголовке Link (rel="next" / rel="prev").
+    Размер страницы — PAGE_SIZE из REST_FRAMEWORK, клиент может изменить его параметром
+    ?page_size= в пределах API_MAX_PAGE_SIZE.
+    """
+    ordering = '-id'  # Уникальное и неизменяемое поле — порядок стабилен; новые записи первыми
+    page_size_query_param = 'page_size'
+    max_page_size = settings.API_MAX_PAGE_SIZE
+    paginate_by_default = False
+
+    def paginate_queryset(self, queryset, request, view=None):
+        params = request.query_params
+        if not self.paginate_by_default and self.cursor_query_param not in params \
+                and self.page_size_query_param not in params:
+            return None  # Клиент не просил страницу — список целиком
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        links = [
+            f'<{url}>; rel="{rel}"'
+            for url, rel in ((self.get_next_link(), 'next'), (self.get_previous_link(), 'prev'))
+            if url
+        ]
+        headers = {'Link': ', '.join(links)} if links else None
+        return Response(data, headers=headers)
+
+
+
+class PagedByDefaultPagination(HeaderCursorPagination):
+    """
+    Та же пагинация, но и без параметров отдаётся только первая страница (PAGE_SIZE записей)
+    со ссылкой на следующую в заголовке Link. Для таблиц, которые растут без ограничений
+    (результаты тестов, пользователи): веб-интерфейс проходит по ссылкам rel="next".
+    """
+    paginate_by_default = True
@@ -100,6 +100,33 @@ DATABASES = {
     },
 }
 
+# Кеш: общий для всех воркеров и хостов уровень ('shared', по умолчанию — таблица в PostgreSQL)
+# и перед ним небольшой кеш в памяти процесса ('default').
+# Смена CACHE_VERSION делает недействительными все ранее закешированные значения.
+CACHES = {
+    'default': {
+        'BACKEND': 'asu_app.cache.TwoTierCache',
+        'OPTIONS': {
+            'L2': 'shared',
+            'L1_TIMEOUT': int(os.getenv('CACHE_L1_TIMEOUT', 5)),  # Сколько секунд значение живёт в памяти процесса
+            'L1_MAX_ENTRIES': int(os.getenv('CACHE_L1_MAX_ENTRIES', 1000)),
+            # Версии содержимого тестов и областей доступа: их увеличение должно сразу видеть
+            # каждый воркер, поэтому они минуют память процесса
+            'L2_ONLY': ('test_content_version_', 'subject_scope_version'),
+        },
+    },
+    'shared': {
+        'BACKEND': os.getenv('CACHE_BACKEND', 'django.core.cache.backends.db.DatabaseCache'),
+        'LOCATION': os.getenv('CACHE_LOCATION', 'asu_cache'),  # Таблица, каталог или адрес сервера кеша
+        'KEY_PREFIX': os.getenv('CACHE_KEY_PREFIX', 'asu'),
+        'VERSION': int(os.getenv('CACHE_VERSION', 1)),
+        'TIMEOUT': 300,
+        'OPTIONS': {
+            'MAX_ENTRIES': int(os.getenv('CACHE_MAX_ENTRIES', 100000)),
+        },
+    },
+}
+
 # Настройки Django REST Framework
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
@@ -111,8 +138,16 @@ REST_FRAMEWORK = {
     'DEFAULT_FILTER_BACKENDS': (
         'django_filters.rest_framework.DjangoFilterBackend',  # Поддержка фильтрации в API
     ),
+    # Курсорная пагинация списков по запросу клиента (?cursor=, ?page_size=); без параметров список
+    # отдаётся целиком. Большие таблицы разбиваются на страницы всегда (PagedByDefaultPagination),
+    # небольшие справочники отключают пагинацию совсем (pagination_class = None)
+    'DEFAULT_PAGINATION_CLASS': 'asu_app.pagination.HeaderCursorPagination',
+    'PAGE_SIZE': int(os.getenv('API_PAGE_SIZE', 100)),  # Размер страницы по умолчанию
 }
 
+# Максимальный размер страницы, который клиент может запросить параметром ?page_size=
+API_MAX_PAGE_SIZE = int(os.getenv('API_MAX_PAGE_SIZE', 1000))
+
 # Валидаторы пароля
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -147,6 +182,18 @@ STATIC_ROOT = os.path.join(BASE_DIR, '.', 'public', 'static')
 MEDIA_ROOT = os.path.join(BASE_DIR, '.', 'public', 'media')
 MEDIA_URL = '/media/'
 
+# Медиафайлы отдаются после проверки доступа (asu_app/media.py). За nginx ответ содержит только
+# X-Accel-Redirect на внутренний location MEDIA_ACCEL_LOCATION, а файл отдаёт сам nginx
+# (см. asu_ui/config/default.conf); в режиме отладки без nginx файлы отдаёт Django
+MEDIA_ACCEL_REDIRECT = bool(os.getenv('MEDIA_ACCEL_REDIRECT', '' if DEBUG else '1'))
+MEDIA_ACCEL_LOCATION = '/protected-media/'
+
+# Время в секундах, на которое браузер может сохранить медиафайл без повторного запроса
+MEDIA_CACHE_MAX_AGE = int(os.getenv('MEDIA_CACHE_MAX_AGE', 60 * 60))
+
+# Подписанные ссылки на медиафайлы в ответах API действуют от MEDIA_URL_MAX_AGE до удвоенного значения секунд
+MEDIA_URL_MAX_AGE = int(os.getenv('MEDIA_URL_MAX_AGE', 60 * 60))
+
 # Пользовательская модель пользователя
 AUTH_USER_MODEL = 'users.User'
 
@@ -165,3 +212,27 @@ USER_ONLINE_TIMEOUT = 300
 
 # Время в секундах, на протяжении которого система хранит последнее время активности пользователя
 USER_LASTSEEN_TIMEOUT = 60 * 60 * 24 * 7  # 1 неделя
+
+# Время в секундах, чаще которого отметка активности одного пользователя не обновляется
+USER_LASTSEEN_WRITE_INTERVAL = 60
+
+# Учебный год начинается 1 сентября. Результаты тестов до указанного учебного года переносятся
+# в архив командой archive_test_results (make archive-results YEAR=...)
+ACADEMIC_YEAR_START_MONTH = 9
+
+# Приём ответов на тесты без проверки в запросе (проверяет воркер grade_submissions): для всех клиентов
+# или, если не включено, только для приславших заголовок Prefer: respond-async
+TEST_SUBMISSIONS_ASYNC = bool(os.getenv('TEST_SUBMISSIONS_ASYNC'))
+
+# Через сколько секунд клиенту повторить запрос состояния непроверенных ответов (заголовок Retry-After)
+TEST_SUBMISSION_RETRY_AFTER = 1
+
+# Автосохранённые ответы попыток записываются из памяти воркера в базу не позже чем через столько секунд
+TEST_DRAFT_FLUSH_INTERVAL = int(os.getenv('TEST_DRAFT_FLUSH_INTERVAL', 60))
+
+# Время в секундах, с которым накопленные отметки активности записываются в кеш одним пакетом
+USER_LASTSEEN_FLUSH_INTERVAL = 10
+
+# Время в секундах, в течение которого хранится вычисленный список предметов, доступных пользователю
+# (при изменении связей список сбрасывается сразу, см. api/subjects/signals.py)
+SUBJECT_SCOPE_TIMEOUT = 60 * 60
@@ -0,0 +1,49 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+
+class FakeTimer:
+    # Вместо threading.Timer: тест сам решает, когда «истекло» время
+    started = []
+
+    def __init__(self, interval, function):
+        self.interval = interval
+        self.function = function
+        self.daemon = False
+        self.cancelled = False
+
+    def start(self):
+        FakeTimer.started.append(self)
+
+    def cancel(self):
+        self.cancelled = True
+
+    def fire(self):
+        if not self.cancelled:
+            self.function()
+
+
+class ConstantQueriesMixin:
+    """
+    Проверка, что число запросов к базе на страницах не зависит от количества строк.
+    Тест-кейс определяет add_rows(number) — добавление строк, которые выводятся на проверяемых страницах.
+    """
+
+    def add_rows(self, number):
+        raise NotImplementedError
+
+    def count_queries(self, urls):
+        counts = []
+        for url in urls:
+            self.assertEqual(self.client.get(url).status_code, 200, url)
+            with CaptureQueriesContext(connection) as queries:
+                self.client.get(url)
+            counts.append(len(queries))
+        return counts
+
+    def assertConstantQueries(self, urls):
+        self.add_rows(1)
+        few = self.count_queries(urls)
+        for number in range(2, 6):
+            self.add_rows(number)
+        self.assertEqual(self.count_queries(urls), few)
@@ -0,0 +1,170 @@
+from unittest import mock
+from urllib.parse import urlsplit
+
+from django.core.cache import cache, caches
+from django.test import TestCase
+from rest_framework.authtoken.models import Token
+
+from api.groups.models import Group, Speciality
+from api.simple_tests.models import Test, TestsResult
+from api.simple_tests.content import content_version, invalidate_test_content
+from api.subjects.access import _scope_version, invalidate_all_scopes
+from api.subjects.models import Lab, Semester, Subject
+from api.users.models import User, UserRole
+from asu_app.cache import TwoTierCache
+from asu_app.pagination import HeaderCursorPagination, PagedByDefaultPagination
+
+
+def make_worker_cache(name):
+    # Отдельный L1 над тем же L2 — как кеш по умолчанию в другом воркере
+    return TwoTierCache(name, {'OPTIONS': {'L2': 'shared', 'L1_TIMEOUT': 60, 'L2_ONLY': ('version_',)}})
+
+
+class TwoTierCacheTestCase(TestCase):
+
+    def setUp(self):
+        self.worker = make_worker_cache('worker')
+        self.other_worker = make_worker_cache('other-worker')
+        self.worker.clear()
+        self.other_worker.clear()
+
+    def test_l1_hit_does_not_read_l2(self):
+        self.worker.set('key', 'value')
+        caches['shared'].delete('key')  # Значение осталось только в L1
+
+        before = self.worker.stats()
+        self.assertEqual(self.worker.get('key'), 'value')
+        self.assertEqual(self.worker.stats()['l1_hits'], before['l1_hits'] + 1)
+
+    def test_miss_falls_through_to_l2_and_fills_l1(self):
+        caches['shared'].set('key', 'value')
+
+        before = self.worker.stats()
+        self.assertEqual(self.worker.get('key'), 'value')
+        self.assertEqual(self.worker.get('key'), 'value')
+        self.assertEqual(self.worker.get('absent', 'default'), 'default')
+
+        stats = self.worker.stats()
+        self.assertEqual(stats['l2_hits'], before['l2_hits'] + 1)
+        self.assertEqual(stats['l1_hits'], before['l1_hits'] + 1)
+        self.assertEqual(stats['misses'], before['misses'] + 1)
+
+    def test_delete_invalidates_both_levels(self):
+        self.worker.set('key', 'value')
+        self.worker.delete('key')
+
+        self.assertIsNone(self.worker.get('key'))
+        self.assertIsNone(caches['shared'].get('key'))
+
+    def test_incremented_keys_are_not_kept_in_l1(self):
+        self.worker.set('counter', 1)
+        self.assertEqual(self.worker.incr('counter'), 2)
+
+        caches['shared'].incr('counter')  # Увеличение в другом процессе
+        self.assertEqual(self.worker.get('counter'), 3)
+        self.worker.set('counter', 10)
+        caches['shared'].incr('counter')
+        self.assertEqual(self.worker.get_many(['counter']), {'counter': 11})
+
+    def test_l2_only_keys_bypass_l1(self):
+        self.worker.set('version_1', 1)
+        self.assertEqual(self.other_worker.get('version_1'), 1)
+
+        caches['shared'].set('version_1', 2)  # Изменение в другом процессе, в том числе истечение срока
+        self.assertEqual(self.worker.get('version_1'), 2)
+        self.assertEqual(self.other_worker.get_many(['version_1', 'absent']), {'version_1': 2})
+        caches['shared'].delete('version_1')
+        self.assertIsNone(self.other_worker.get('version_1'))
+
+    def test_version_bumps_are_visible_despite_stale_l1(self):
+        # Версии раньше читались через кеш по умолчанию и оставались в L1 других воркеров
+        version = content_version(1)
+        scope_version = _scope_version()
+
+        invalidate_test_content(1)
+        invalidate_all_scopes()
+        # Копии в L1 этого процесса, как у воркера, прочитавшего версии до изменения
+        cache._l1.set(cache._l1_key('test_content_version_1', None), version)
+        cache._l1.set(cache._l1_key('subject_scope_version', None), scope_version)
+
+        self.assertEqual(content_version(1), version + 1)
+        self.assertEqual(_scope_version(), scope_version + 1)
+
+
+class HeaderCursorPaginationTestCase(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        admin = User.objects.create(
+            username='admin', first_name='Имя', last_name='Фамилия', role=UserRole.TEACHER, is_superuser=True,
+        )
+        self.auth = {'HTTP_AUTHORIZATION': f'Token {Token.objects.create(user=admin).key}'}
+        semester = Semester.objects.create(name='1', subject=Subject.objects.create(name='Сети'))
+        self.lab_ids = [
+            Lab.objects.create(name=f'Лаба {number}', semester=semester, file='labs/lab.pdf').id
+            for number in range(5)
+        ]
+
+    def get(self, url):
+        response = self.client.get(url, **self.auth)
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def links(self, response):
+        # Заголовок Link: '<url>; rel="next", <url>; rel="prev"' -> {'next': путь с параметрами}
+        links = {}
+        for part in filter(None, response.get('Link', '').split(', ')):
+            url, rel = part.split('; ')
+            url = urlsplit(url.strip('<>'))
+            links[rel[len('rel="'):-1]] = f'{url.path}?{url.query}'
+        return links
+
+    def ids(self, response):
+        return [lab['id'] for lab in response.json()]
+
+    def test_lists_are_not_paginated_without_parameters(self):
+        with mock.patch.object(HeaderCursorPagination, 'page_size', 2):
+            response = self.get('/api/labs/')
+
+        self.assertEqual(self.ids(response), self.lab_ids)
+        self.assertNotIn('Link', response)
+
+    def test_cursor_round_trip_newest_first(self):
+        response = self.get('/api/labs/?page_size=2')
+        self.assertEqual(set(self.links(response)), {'next'})
+        pages = [self.ids(response)]
+        while 'next' in self.links(response):
+            response = self.get(self.links(response)['next'])
+            pages.append(self.ids(response))
+
+        newest_first = self.lab_ids[::-1]
+        self.assertEqual(pages, [newest_first[:2], newest_first[2:4], newest_first[4:]])
+
+        # С последней страницы ссылка prev ведёт обратно на предыдущую
+        self.assertEqual(self.ids(self.get(self.links(response)['prev'])), newest_first[2:4])
+
+    def test_large_lists_are_paginated_without_parameters(self):
+        student = User.objects.create(username='student', first_name='Иван', last_name='Иванов', role=UserRole.STUDENT)
+        test = Test.objects.create(name='Сети: тест 1', attempts=3, timer=10)
+        result_ids = [TestsResult.objects.create(student=student, test=test, mark=number).id for number in range(3)]
+        User.objects.create(username='other', first_name='Пётр', last_name='Петров', role=UserRole.STUDENT)
+
+        user_ids = list(User.objects.values_list('id', flat=True))
+        for url, ids in (('/api/tests-results/', result_ids), ('/api/users/', user_ids)):
+            with mock.patch.object(PagedByDefaultPagination, 'page_size', 2):
+                response = self.get(url)
+                pages = [[item['id'] for item in response.json()]]
+                while 'next' in self.links(response):
+                    response = self.get(self.links(response)['next'])
+                    pages.append([item['id'] for item in response.json()])
+            newest_first = sorted(ids, reverse=True)
+            self.assertEqual(pages, [newest_first[:2], newest_first[2:]], url)
+
+    def test_reference_lists_opt_out(self):
+        speciality = Speciality.objects.create(name='АСОИ')
+        for number in range(3):
+            Group.objects.create(name=f'АСОИ-21{number}', speciality=speciality)
+
+        response = self.get('/api/groups/?page_size=1')
+        self.assertEqual(len(response.json()), 3)
+        self.assertNotIn('Link', response)
@@ -11,7 +11,8 @@ from django.contrib import admin
 from django.urls import path, include, re_path  # Подключаем функции для маршрутизации
 from rest_framework.authtoken.views import obtain_auth_token  # Вьюха для получения токена по логину и паролю
 from django.conf import settings
-from django.conf.urls.static import static  # Для отдачи статических и медиафайлов в режиме разработки
+from django.conf.urls.static import static  # Для отдачи статики в режиме разработки
+from asu_app.media import ProtectedMediaView  # Медиафайлы с проверкой доступа
 
 # Список путей API, включающий маршруты из всех внутренних модулей
 apipatterns = [
@@ -27,11 +28,14 @@ urlpatterns = [
     path('admin/', admin.site.urls),  # Админка Django по адресу /admin/
     path('api-token-auth/', obtain_auth_token, name='api_token_auth'),  # Эндпоинт для получения токена
     path('api/', include((apipatterns, 'api'), namespace='api')),  # Включаем все пути из apipatterns под префиксом /api/
-    re_path(r'^_nested_admin/', include('nested_admin.urls'))  # Поддержка вложенного админ-интерфейса
+    re_path(r'^_nested_admin/', include('nested_admin.urls')),  # Поддержка вложенного админ-интерфейса
+    # Загруженные файлы: доступ проверяется всегда, сам файл за nginx отдаёт nginx (X-Accel-Redirect)
+    re_path(
+        r'^%s(?P<path>.+)$' % settings.MEDIA_URL.lstrip('/'), ProtectedMediaView.as_view(), name='protected_media',
+    ),
 ]
 
-# Добавление поддержки отдачи медиафайлов и статики в режиме DEBUG
-urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
+# Добавление поддержки отдачи статики в режиме DEBUG (без DEBUG статику отдаёт nginx)
 urlpatterns += static(settings.STATIC_URL, document_root=settings.STATIC_ROOT)
 
 # Настройка заголовков административной панели
@@ -2,5 +2,9 @@
 
 python ./manage.py makemigrations
 python ./manage.py migrate
+python ./manage.py createcachetable  # Таблица общего кеша (если используется DatabaseCache)
+python ./manage.py rebuild_subject_access  # Таблица доступа групп к предметам (на случай изменений вне приложения)
+python ./manage.py backfill_test_attempts  # Попытки для результатов, сохранённых до появления TestAttempt
+python ./manage.py rebuild_gradebook  # Сводная таблица журнала (на случай изменений вне приложения)
 python ./manage.py collectstatic --noinput
 gunicorn asu_app.wsgi:application --timeout 6000 --bind 0.0.0.0:8000
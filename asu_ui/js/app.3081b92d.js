@@ -342,7 +342,15 @@
             O = n("bc3a"), L = n.n(O), j = L.a.create({
                 baseURL: "/api/",
                 headers: {"Content-Type": "application/json", Authorization: "Token ".concat(localStorage.token)}
-            }), E = {
+            }), Lt = j.getAll = function (e) {
+                var t = arguments.length > 1 && void 0 !== arguments[1] ? arguments[1] : [];
+                return j.get(e).then((function (e) {
+                    var n = t.concat(e.data), s = /<([^>]+)>;\s*rel="next"/.exec(e.headers.link || "");
+                    if (!s) return e.data = n, e;
+                    var r = new URL(s[1], window.location.href);
+                    return Lt(window.location.origin + r.pathname + r.search, n)
+                }))
+            }, E = {
                 name: "Subjects", components: {SquareTemplates: R}, data: function () {
                     return {subjectList: []}
                 }, mounted: function () {
@@ -1568,7 +1576,7 @@
                             return regeneratorRuntime.wrap((function (t) {
                                 while (1) switch (t.prev = t.next) {
                                     case 0:
-                                        return n = e.selectedGroup ? e.selectedGroup : "", t.next = 3, j.get(e.$getConst("STUDENTS_URL")(n));
+                                        return n = e.selectedGroup ? e.selectedGroup : "", t.next = 3, j.getAll(e.$getConst("STUDENTS_URL")(n));
                                     case 3:
                                         s = t.sent, e.studentsOptions = [{
                                             value: null,
@@ -1634,7 +1642,7 @@
                             return regeneratorRuntime.wrap((function (t) {
                                 while (1) switch (t.prev = t.next) {
                                     case 0:
-                                        return n = e.selectedGroup ? e.selectedStudent ? "" : e.selectedGroup : "", s = e.selectedTest ? e.selectedTest : "", r = e.selectedStudent ? e.selectedStudent : "", t.next = 5, j.get(e.$getConst("TEST_RESULTS_URL")(s, n, r));
+                                        return n = e.selectedGroup ? e.selectedStudent ? "" : e.selectedGroup : "", s = e.selectedTest ? e.selectedTest : "", r = e.selectedStudent ? e.selectedStudent : "", t.next = 5, j.getAll(e.$getConst("TEST_RESULTS_URL")(s, n, r));
                                     case 5:
                                         a = t.sent, e.testsResults = a.data;
                                     case 7:
@@ -1861,7 +1869,7 @@
                             return regeneratorRuntime.wrap((function (t) {
                                 while (1) switch (t.prev = t.next) {
                                     case 0:
-                                        return n = e.selectedGroup ? e.selectedGroup : "", t.next = 3, j.get(e.$getConst("STUDENTS_URL")(n));
+                                        return n = e.selectedGroup ? e.selectedGroup : "", t.next = 3, j.getAll(e.$getConst("STUDENTS_URL")(n));
                                     case 3:
                                         s = t.sent, e.studentsOptions = [{
                                             value: null,
@@ -1927,7 +1935,7 @@
                             return regeneratorRuntime.wrap((function (t) {
                                 while (1) switch (t.prev = t.next) {
                                     case 0:
-                                        return e.testsToDisplay = [], n = e.selectedGroup ? e.selectedStudent ? "" : e.selectedGroup : "", s = e.selectedTest ? e.selectedTest : "", r = e.selectedStudent ? e.selectedStudent : "", t.next = 6, j.get(e.$getConst("TEST_RESULTS_URL")(s, n, r));
+                                        return e.testsToDisplay = [], n = e.selectedGroup ? e.selectedStudent ? "" : e.selectedGroup : "", s = e.selectedTest ? e.selectedTest : "", r = e.selectedStudent ? e.selectedStudent : "", t.next = 6, j.getAll(e.$getConst("TEST_RESULTS_URL")(s, n, r));
                                     case 6:
                                         a = t.sent, a.data.map((function (t, n) {
                                             var s = e.testsOptions.filter((function (e) {
@@ -1954,7 +1962,7 @@
                             return regeneratorRuntime.wrap((function (t) {
                                 while (1) switch (t.prev = t.next) {
                                     case 0:
-                                        return e.studentsToDisplay = [], n = e.selectedGroup ? e.selectedGroup : "", t.next = 4, j.get(e.$getConst("STUDENTS_URL")(n));
+                                        return e.studentsToDisplay = [], n = e.selectedGroup ? e.selectedGroup : "", t.next = 4, j.getAll(e.$getConst("STUDENTS_URL")(n));
                                     case 4:
                                         s = t.sent, s.data.map((function (t, n) {
                                             var s = e.groupsOptions.filter((function (e) {
@@ -0,0 +1,63 @@
+import hashlib
+import logging
+import re
+import time
+from typing import Awaitable, Callable, Optional
+
+from fastapi import Request
+from fastapi.responses import Response
+
+from gns_api_gateway.constants import TOKEN_KEY  # Ключ, по которому ищется токен в параметрах запроса или cookie
+from gns_api_gateway.log_pipeline import ACCESS_LOGGER_NAME, request_log_context
+
+__all__ = ["log_access", "normalize_route"]
+
+access_logger = logging.getLogger(ACCESS_LOGGER_NAME)
+
+# Идентификаторы в пути (UUID проектов/узлов GNS3 и числовые id) заменяются на {id},
+# чтобы записи одного маршрута можно было агрегировать.
+_ID_PATTERN = re.compile(r"/(?:[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}|\d+)(?=/|$)")
+
+
+def normalize_route(path: str) -> str:
+    return _ID_PATTERN.sub("/{id}", path)
+
+
+def _token_fingerprint(request: Request) -> Optional[str]:
+    # Сам токен в лог не пишется — только короткий отпечаток, достаточный для корреляции запросов.
+    token = request.query_params.get(TOKEN_KEY) or request.cookies.get(TOKEN_KEY)
+    if not token:
+        return None
+    return hashlib.sha256(token.encode()).hexdigest()[:12]
+
+
+async def log_access(request: Request, call_next: Callable[[Request], Awaitable[Response]]) -> Response:
+    """
+    Middleware структурированного access-лога.
+    Замеряет полное время обработки запроса и пишет JSON-запись с маршрутом, пользователем,
+    задержкой и статусом апстрима. Запись уходит в очередь, запись в поток — в фоновом потоке.
+    """
+    context: dict = {}
+    request_log_context.set(context)  # Наполняется прокси-клиентом и сервисами во время обработки.
+    started_at = time.perf_counter()
+    status = 500
+
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        access_logger.info(
+            "%s %s %s",
+            request.method,
+            request.url.path,
+            status,
+            extra={
+                "method": request.method,
+                "route": normalize_route(request.url.path),
+                "status": status,
+                "duration_ms": round((time.perf_counter() - started_at) * 1000, 2),
+                "user": _token_fingerprint(request),
+                **context,
+            },
+        )
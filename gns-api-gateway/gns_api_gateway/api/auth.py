@@ -1,6 +1,6 @@
 from fastapi import Request
 
-from gns_api_gateway.constants import TOKEN_KEY  # Ключ, по которому ищется токен в параметрах запроса или cookie
+from gns_api_gateway.constants import METRICS_URL, TOKEN_KEY  # Ключ, по которому ищется токен в параметрах запроса или cookie
 from gns_api_gateway.domain.exceptions import AuthError  # Кастомное исключение на случай отсутствия токена
 from gns_api_gateway.infrastructure import user  # Контекстное хранилище текущего пользователя
 
@@ -13,6 +13,11 @@ PUBLIC_ENDPOINTS_POSTFIXES = (
     "/favicon.ico",   # Иконка сайта
 )
 
+# Публичные эндпоинты самого шлюза (точное совпадение пути — не проксируются в GNS3)
+PUBLIC_ENDPOINTS = frozenset({
+    METRICS_URL,      # Метрики в формате Prometheus
+})
+
 def get_token(request: Request) -> str:
     """
     Извлекает токен авторизации из запроса:
@@ -33,7 +38,7 @@ def set_user_from_token(request: Request) -> None:
     Привязывает пользователя к текущему запросу на основе токена.
     Для публичных эндпоинтов ничего не делает.
     """
-    if request.url.path.endswith(PUBLIC_ENDPOINTS_POSTFIXES):
+    if request.url.path.endswith(PUBLIC_ENDPOINTS_POSTFIXES) or request.url.path in PUBLIC_ENDPOINTS:
         return
 
     token = get_token(request)
@@ -0,0 +1,153 @@
+import asyncio
+import logging
+import time
+from typing import Awaitable, Callable, Optional
+
+from fastapi import Request
+from fastapi.responses import Response
+
+from gns_api_gateway.async_rest_client import (
+    SUPPORTED_ENCODINGS,
+    compress_content,
+    decode_content,
+    is_supported_encoding,
+)
+from gns_api_gateway.settings import CompressionSettings
+
+__all__ = ["ResponseCompressor", "parse_accept_encoding"]
+
+# Типы содержимого, которые имеет смысл сжимать (JSON-листинги, топологии, текст).
+COMPRESSIBLE_CONTENT_TYPES = (
+    "application/json",
+    "application/javascript",
+    "application/xml",
+    "image/svg+xml",
+    "text/",
+)
+
+
+def parse_accept_encoding(header: Optional[str]) -> set[str]:
+    """
+    Возвращает набор кодировок, которые принимает клиент (q > 0).
+    `*` раскрывается во все поддерживаемые шлюзом кодировки.
+    """
+    accepted = set()
+    for item in (header or "").split(","):
+        coding, _, params = item.strip().partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        if quality <= 0:
+            continue
+        if coding == "*":
+            accepted.update(SUPPORTED_ENCODINGS)
+        else:
+            accepted.add(coding)
+    return accepted
+
+
+class ResponseCompressor:
+    """
+    Middleware согласованного сжатия ответов шлюза:
+    - если апстрим уже сжал тело и клиент принимает эту кодировку — тело отдаётся как есть (passthrough);
+    - если клиент кодировку апстрима не принимает — тело распаковывается;
+    - несжатые ответы подходящего типа и размера сжимаются br/gzip по Accept-Encoding;
+    - суммарный объём сжатия ограничен бюджетом байт в секунду, чтобы сжатие не съедало CPU под нагрузкой.
+    """
+
+    def __init__(self, settings: CompressionSettings, clock: Callable[[], float] = time.monotonic) -> None:
+        self._settings = settings
+        self._clock = clock
+        self._budget = float(settings.cpu_budget_bytes)
+        self._budget_updated_at = clock()
+        self._logger = logging.getLogger(self.__class__.__name__)
+
+    async def __call__(self, request: Request, call_next: Callable[[Request], Awaitable[Response]]) -> Response:
+        response = await call_next(request)
+        if response.status_code in (204, 304) or request.method == "HEAD":
+            return response
+
+        accepted = parse_accept_encoding(request.headers.get("accept-encoding"))
+        current_encoding = (response.headers.get("content-encoding") or "identity").lower()
+
+        # Тело уже сжато апстримом и клиент его примет — ничего не трогаем, ответ уходит потоком.
+        if current_encoding != "identity" and current_encoding in accepted:
+            return response
+
+        if current_encoding == "identity" and not self._is_compressible(response):
+            return response
+
+        # Кодировку апстрима шлюз распаковать не умеет — тело уходит как есть, без ошибки.
+        if not is_supported_encoding(current_encoding):
+            self._logger.warning("Passing through body with unsupported Content-Encoding %r", current_encoding)
+            return response
+
+        body = b"".join([chunk async for chunk in response.body_iterator])
+        headers = dict(response.headers)
+        headers.pop("content-length", None)
+
+        if current_encoding != "identity":
+            body = decode_content(body, current_encoding)
+            headers.pop("content-encoding", None)
+
+        encoding = self._choose_encoding(accepted, len(body))
+        if encoding:
+            body = await self._compress(body, encoding)
+            headers["content-encoding"] = encoding
+            headers["vary"] = "Accept-Encoding"
+
+        return Response(content=body, status_code=response.status_code, headers=headers)
+
+    def _is_compressible(self, response: Response) -> bool:
+        if not self._settings.enabled:
+            return False
+        content_type = (response.headers.get("content-type") or "").lower()
+        if not content_type.startswith(COMPRESSIBLE_CONTENT_TYPES):
+            return False
+        # Длина известна для всех ответов, собранных ResponseBuilder; неизвестную не угадываем.
+        content_length = response.headers.get("content-length")
+        return content_length is not None and int(content_length) >= self._settings.min_size
+
+    def _choose_encoding(self, accepted: set[str], size: int) -> Optional[str]:
+        settings = self._settings
+        if not settings.enabled or not settings.min_size <= size <= settings.max_size:
+            return None
+
+        encoding = next((coding for coding in SUPPORTED_ENCODINGS if coding in accepted), None)
+        if encoding and not self._take_budget(size):
+            self._logger.debug("Compression budget exhausted, sending %s bytes uncompressed.", size)
+            return None
+        return encoding
+
+    def _take_budget(self, size: int) -> bool:
+        now = self._clock()
+        self._budget = min(
+            float(self._settings.cpu_budget_bytes),
+            self._budget + (now - self._budget_updated_at) * self._settings.cpu_budget_bytes,
+        )
+        self._budget_updated_at = now
+        if self._budget < size:
+            return False
+        self._budget -= size
+        return True
+
+    async def _compress(self, body: bytes, encoding: str) -> bytes:
+        def compress() -> bytes:
+            return compress_content(
+                body,
+                encoding,
+                gzip_level=self._settings.gzip_level,
+                brotli_quality=self._settings.brotli_quality,
+            )
+
+        # Крупные тела сжимаются в пуле потоков (zlib и brotli отпускают GIL), мелкие — на месте.
+        if len(body) > self._settings.offload_size:
+            return await asyncio.to_thread(compress)
+        return compress()
@@ -1,4 +1,5 @@
 import logging
+import math
 from http import HTTPStatus
 
 from fastapi import FastAPI
@@ -8,7 +9,11 @@ from starlette import status
 from starlette.requests import Request
 
 from gns_api_gateway.api.serializers import ErrorModel  # Сериализатор для форматирования ошибок
-from gns_api_gateway.domain.exceptions import BaseApiGatewayException, NotFoundError  # Кастомные исключения
+from gns_api_gateway.domain.exceptions import (  # Кастомные исключения
+    BaseApiGatewayException,
+    NotFoundError,
+    UpstreamBusyError,
+)
 
 logger = logging.getLogger(__name__)  # Логгер текущего модуля
 
@@ -36,12 +41,16 @@ def register_error_handler(app: FastAPI) -> None:
         """
         mapper = [
             (NotFoundError, HTTPStatus.NOT_FOUND),  # Например, NotFoundError = 404
+            (UpstreamBusyError, HTTPStatus.SERVICE_UNAVAILABLE),  # Очередь к GNS3 не дождалась слота — 503
             (BaseApiGatewayException, HTTPStatus.BAD_REQUEST),  # Остальные — 400
         ]
 
         for error_type, status_code in mapper:
             if issubclass(type(error), error_type):
-                return json_api_gateway_exception_error_handler(error, status_code)
+                response = json_api_gateway_exception_error_handler(error, status_code)
+                if retry_after := getattr(error, "retry_after", None):
+                    response.headers["Retry-After"] = str(math.ceil(retry_after))
+                return response
 
     @app.exception_handler(ValidationError)
     def bad_request(req: Request, exc: ValidationError):  # noqa: WPS430
@@ -60,7 +69,7 @@ def register_error_handler(app: FastAPI) -> None:
         Глобальный обработчик всех необработанных исключений.
         Возвращает статус 500 и логирует ошибку.
         """
-        logger.error(f"Unhandled error {error}")
+        logger.error("Unhandled error %s", error)
         return JSONResponse(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             content=ErrorModel(code="unhandled_error", message=str(error)).dict(),
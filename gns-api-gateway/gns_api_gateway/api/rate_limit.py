@@ -0,0 +1,73 @@
+import hashlib
+import math
+from typing import Awaitable, Callable
+
+from fastapi import Request
+from fastapi.responses import Response
+
+from gns_api_gateway.domain.exceptions import RateLimitError
+from gns_api_gateway.infrastructure import user  # Токен, установленный middleware авторизации
+from gns_api_gateway.infrastructure.rate_limiting import BucketStore, InMemoryBucketStore, SqliteBucketStore
+from gns_api_gateway.metrics import registry
+from gns_api_gateway.settings import RateLimitSettings
+from .error_handlers import json_api_gateway_exception_error_handler
+
+__all__ = ["RateLimiter"]
+
+READ_METHODS = frozenset({"GET", "HEAD", "OPTIONS"})  # Всё остальное считается изменяющими запросами.
+
+allowed_requests = registry.counter(
+    "gateway_rate_limit_allowed_total",
+    "Requests admitted by the per-user rate limiter.",
+    labels=("budget",),
+)
+rejected_requests = registry.counter(
+    "gateway_rate_limit_rejected_total",
+    "Requests rejected with 429 by the per-user rate limiter.",
+    labels=("budget",),
+)
+
+
+class RateLimiter:
+    """
+    Middleware ограничения частоты запросов на пользователя (токен-бакет).
+    Ключ бакета — токен, установленный `set_user_from_token`; у чтения и изменяющих методов
+    раздельные бюджеты. При исчерпании бюджета возвращается 429 с заголовком Retry-After.
+    Бакеты хранятся в памяти воркера либо, если задан RATE_LIMIT_SHARED_STORE_PATH,
+    в общем для всех воркеров файле SQLite.
+    """
+
+    def __init__(self, settings: RateLimitSettings) -> None:
+        self._settings = settings
+        self._budgets = {
+            "read": (settings.read_rate, settings.read_burst),
+            "write": (settings.write_rate, settings.write_burst),
+        }
+        # Простаивающий дольше этого бакет гарантированно полон, его можно забыть.
+        idle_ttl = max(burst / rate for rate, burst in self._budgets.values())
+        self._store: BucketStore = (
+            SqliteBucketStore(settings.shared_store_path, idle_ttl=idle_ttl)
+            if settings.shared_store_path
+            else InMemoryBucketStore(idle_ttl=idle_ttl)
+        )
+
+    async def __call__(self, request: Request, call_next: Callable[[Request], Awaitable[Response]]) -> Response:
+        token = user.get(None)
+        if not self._settings.enabled or not token:
+            return await call_next(request)  # Публичные эндпоинты не ограничиваются.
+
+        budget = "read" if request.method in READ_METHODS else "write"
+        rate, burst = self._budgets[budget]
+        # В общем хранилище лежит не сам токен, а его хеш.
+        key = f"{budget}:{hashlib.sha256(token.encode()).hexdigest()}"
+
+        retry_after = await self._store.take(key, rate, burst)
+        if retry_after:
+            rejected_requests.inc(budget=budget)
+            error = RateLimitError("Too many requests, retry later", retry_after=retry_after)
+            response = json_api_gateway_exception_error_handler(error, error.status_code)
+            response.headers["Retry-After"] = str(math.ceil(retry_after))
+            return response
+
+        allowed_requests.inc(budget=budget)
+        return await call_next(request)
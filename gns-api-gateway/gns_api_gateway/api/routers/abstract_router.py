@@ -53,8 +53,9 @@ class AbstractRouter(ABC):
                 .build()
             )
         except Exception:
-            # Логируем исключение с деталями запроса для отладки
-            self._logger.debug("Request to the service failed.\n Failed request: %s.", request.__dict__)
+            # Логируем только метод и путь: форматирование всего request.__dict__ при всплеске ошибок
+            # занимало event loop. Аргументы подставляются лениво и только если уровень DEBUG включён.
+            self._logger.debug("Request to the service failed: %s %s.", request.method, request.url.path)
             raise  # Повторно выбрасываем исключение
 
     def get_request_processor(self, request: ParsedRequest) -> Optional[Callable]:
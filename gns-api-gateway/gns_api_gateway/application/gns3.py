@@ -1,8 +1,9 @@
 from typing import Any
 
 from gns_api_gateway.api import get_user_token  # Получение токена текущего пользователя
-from gns_api_gateway.domain import UserRole  # Роли пользователей (STUDENT, TEACHER)
+from gns_api_gateway.domain import User, UserRole  # Модель и роли пользователей (STUDENT, TEACHER)
 from gns_api_gateway.infrastructure import GNS3Proxy, UserRepository  # Прокси и репозиторий пользователя
+from gns_api_gateway.log_pipeline import update_request_log_context  # Данные для access-лога
 
 __all__ = ["GNS3Service"]  # Экспортируемый класс
 
@@ -22,7 +23,7 @@ class GNS3Service:
         Добавляет идентификатор проекта к списку проектов пользователя.
         Используется после успешного создания проекта.
         """
-        user = await self._user_repository.get_user_by_token(get_user_token())
+        user = await self._get_current_user()
         user.add_project(project_id)  # Добавляем проект в JSONField
         await self._user_repository.update(user)  # Сохраняем изменения
 
@@ -32,7 +33,7 @@ class GNS3Service:
         - Студенты видят только свои проекты;
         - Преподаватели и админы — все.
         """
-        user = await self._user_repository.get_user_by_token(get_user_token())
+        user = await self._get_current_user()
 
         if user.role == UserRole.STUDENT:
             # Только те проекты, которые присутствуют в user.projects
@@ -44,6 +45,14 @@ class GNS3Service:
         """
         Удаляет проект у пользователя из списка при удалении его в GNS3.
         """
-        user = await self._user_repository.get_user_by_token(get_user_token())
+        user = await self._get_current_user()
         user.delete_project(project_id)  # Удаляем ID проекта из списка
         await self._user_repository.update(user)  # Сохраняем пользователя
+
+    async def _get_current_user(self) -> User:
+        """
+        Загружает пользователя по токену текущего запроса и отмечает его id в access-логе.
+        """
+        user = await self._user_repository.get_user_by_token(get_user_token())
+        update_request_log_context(user_id=user.id)
+        return user
@@ -2,6 +2,7 @@ from .abstract_rest_client import *
 from .auth_providers import *
 from .client_utils import *
 from .constants import *
+from .content_encoding import *
 from .exceptions import *
 from .interfaces import *
 from .response import *
@@ -11,6 +12,7 @@ __all__ = (
     + client_utils.__all__
     + exceptions.__all__
     + constants.__all__
+    + content_encoding.__all__
     + auth_providers.__all__
     + interfaces.__all__
     + response.__all__
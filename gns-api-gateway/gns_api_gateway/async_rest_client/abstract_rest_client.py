@@ -1,10 +1,13 @@
 import abc  # Модуль для поддержки абстрактных базовых классов (ABC).
 import logging  # Стандартная библиотека для логирования.
-from typing import Optional  # Для аннотаций типов, здесь — поддержка опциональных значений.
+import time  # Замер времени ответа апстрима.
+from contextlib import asynccontextmanager  # Хук ограничения одновременных запросов.
+from typing import AsyncIterator, Optional  # Для аннотаций типов, здесь — поддержка опциональных значений.
 
 # Асинхронный HTTP-клиент и дополнительные инструменты:
 from aiohttp import ClientSession, ClientTimeout, TCPConnector
 from aiohttp_retry import ExponentialRetry, RetryClient  # Для повторных попыток при ошибках.
+from multidict import CIMultiDictProxy  # Тип заголовков ответа aiohttp.
 
 # Вспомогательные модули из текущего пакета:
 from .auth_providers import BaseAuthProvider  # Базовый класс для авторизации.
@@ -32,6 +35,7 @@ class AbstractRestClient(abc.ABC):
         verify_ssl: bool = False,
         timeout: int = 60,
         headers: Optional[CommonDictType] = None,
+        passthrough_encoding: bool = False,
     ) -> None:
         """
         Инициализация клиента:
@@ -39,11 +43,15 @@ class AbstractRestClient(abc.ABC):
         - verify_ssl: Проверять ли SSL-сертификат (обычно True на проде, False — для тестов).
         - timeout: Таймаут соединения, сек.
         - headers: Начальные HTTP-заголовки для сессии.
+        - passthrough_encoding: Не распаковывать сжатые ответы — тело отдаётся как есть
+          вместе с исходным Content-Encoding (распаковка только по требованию, см. Response.get_content).
         """
+        self._passthrough_encoding = passthrough_encoding
         self._session = ClientSession(
             base_url=base_url,
             connector=TCPConnector(verify_ssl=verify_ssl),
             timeout=ClientTimeout(total=timeout),
+            auto_decompress=not passthrough_encoding,
         )
         self._session_headers = headers  # Сохраняем начальные заголовки (если есть).
         self._logger = logging.getLogger(self.__class__.__name__)  # Отдельный логгер для каждого клиента.
@@ -59,17 +67,21 @@ class AbstractRestClient(abc.ABC):
         Возвращает объект Response с содержимым ответа, статусом и заголовками.
         """
         headers = self._unify_headers(kwargs)  # Объединение базовых и пользовательских заголовков.
-        async with self._client.request(
-            method=method,
-            url=url,
-            headers=headers,
-            **kwargs,
-        ) as response:
-            return Response(
-                content=await response.read(),  # Считываем всё тело ответа.
-                status_code=response.status,
-                headers=dict(response.headers),  # aiohttp возвращает CIMultiDict — приводим к обычному словарю.
-            )
+        async with self._upstream_slot(method, url):  # Ожидание в очереди не входит в задержку апстрима.
+            started_at = time.perf_counter()
+            async with self._client.request(
+                method=method,
+                url=url,
+                headers=headers,
+                **kwargs,
+            ) as response:
+                content = await response.read()  # Считываем всё тело ответа.
+                self._on_response(method, url, response.status, time.perf_counter() - started_at)
+                return Response(
+                    content=content,
+                    status_code=response.status,
+                    headers=self._response_headers(response.headers),
+                )
 
     async def close(self) -> None:
         """
@@ -79,6 +91,34 @@ class AbstractRestClient(abc.ABC):
         await self._client.close()
         await self._session.close()
 
+    @asynccontextmanager
+    async def _upstream_slot(self, method: Methods, url: str) -> AsyncIterator[None]:
+        """
+        Хук, оборачивающий запрос к апстриму вместе с повторными попытками.
+        Потомки переопределяют его, чтобы ограничивать число одновременных запросов.
+        По умолчанию не ограничивает.
+        """
+        yield
+
+    def _on_response(self, method: Methods, url: str, status: int, elapsed: float) -> None:
+        """
+        Хук, вызываемый после получения ответа (включая повторные попытки).
+        - elapsed: полное время запроса к апстриму, сек.
+        По умолчанию ничего не делает; потомки используют его для логов и метрик.
+        """
+
+    def _response_headers(self, headers: CIMultiDictProxy) -> CommonDictType:
+        """
+        aiohttp возвращает CIMultiDict — приводим к обычному словарю.
+        Тело прочитано целиком, поэтому Transfer-Encoding апстрима к нему не относится.
+        Если aiohttp уже распаковал тело, заголовки Content-Encoding/Content-Length
+        относятся к сжатому телу апстрима и тоже отбрасываются.
+        """
+        dropped = {"transfer-encoding"}
+        if not self._passthrough_encoding:
+            dropped |= {"content-encoding", "content-length"}
+        return {key: value for key, value in headers.items() if key.lower() not in dropped}
+
     def _initialize(self) -> None:
         """
         Вспомогательный метод для полной инициализации клиента:
@@ -0,0 +1,68 @@
+import zlib  # gzip/deflate — стандартная библиотека.
+from typing import Any, Optional
+
+try:  # brotli — необязательная зависимость: без неё кодировка `br` просто не поддерживается.
+    import brotli
+except ImportError:  # pragma: no cover
+    brotli = None
+
+from .exceptions import AsyncRestClientError
+
+__all__ = ["SUPPORTED_ENCODINGS", "compress_content", "decode_content", "get_header", "is_supported_encoding"]
+
+
+# Кодировки, которые клиент умеет и распаковывать, и сжимать (в порядке предпочтения).
+SUPPORTED_ENCODINGS: tuple[str, ...] = ("br", "gzip", "deflate") if brotli else ("gzip", "deflate")
+
+
+def get_header(headers: dict[str, Any], name: str) -> Optional[Any]:
+    """
+    Регистронезависимый поиск заголовка в обычном словаре
+    (после dict(CIMultiDict) ключи сохраняют исходный регистр апстрима).
+    """
+    name = name.lower()
+    for key, value in headers.items():
+        if key.lower() == name:
+            return value
+    return None
+
+
+def is_supported_encoding(encoding: Optional[str]) -> bool:
+    """
+    Умеет ли клиент распаковать тело в этой кодировке (отсутствующая кодировка и `identity` — тоже).
+    """
+    encoding = (encoding or "identity").strip().lower()
+    return encoding == "identity" or encoding in SUPPORTED_ENCODINGS
+
+
+def decode_content(content: bytes, encoding: Optional[str]) -> bytes:
+    """
+    Распаковывает тело ответа согласно Content-Encoding.
+    Для отсутствующей кодировки и `identity` возвращает тело без изменений.
+    """
+    encoding = (encoding or "identity").strip().lower()
+    if encoding == "identity":
+        return content
+    if encoding == "gzip":
+        return zlib.decompress(content, wbits=zlib.MAX_WBITS | 16)
+    if encoding == "deflate":
+        return zlib.decompress(content)
+    if encoding == "br" and brotli:
+        return brotli.decompress(content)
+
+    raise AsyncRestClientError(f"Unsupported content encoding {encoding!r}")
+
+
+def compress_content(content: bytes, encoding: str, *, gzip_level: int = 6, brotli_quality: int = 4) -> bytes:
+    """
+    Сжимает тело в указанную кодировку (одну из SUPPORTED_ENCODINGS).
+    """
+    if encoding == "gzip":
+        compressor = zlib.compressobj(gzip_level, zlib.DEFLATED, zlib.MAX_WBITS | 16)
+        return compressor.compress(content) + compressor.flush()
+    if encoding == "deflate":
+        return zlib.compress(content, gzip_level)
+    if encoding == "br" and brotli:
+        return brotli.compress(content, quality=brotli_quality)
+
+    raise AsyncRestClientError(f"Unsupported content encoding {encoding!r}")
@@ -1,6 +1,8 @@
 import json  # Для сериализации/десериализации тела ответа.
 from dataclasses import dataclass  # Упрощённое объявление класса данных (автоматически создаёт init, repr и т.д.).
-from typing import Any  # Универсальный тип, может быть что угодно.
+from typing import Any, Optional  # Универсальный тип, может быть что угодно.
+
+from .content_encoding import decode_content, get_header, is_supported_encoding  # Распаковка тела, если апстрим его сжал.
 
 
 __all__ = ["Response"]  # Экспортируется только класс Response при использовании from module import *.
@@ -22,13 +24,33 @@ class Response:
     status_code: int  # HTTP-статус (например, 200, 404, 500).
     headers: dict[str, Any]  # Заголовки ответа, полученные от сервера.
 
+    @property
+    def content_encoding(self) -> Optional[str]:
+        """
+        Значение Content-Encoding, если тело передано в сжатом виде (режим passthrough).
+        """
+        return get_header(self.headers, "Content-Encoding")
+
     def get_content(self) -> Any:
         """
         Десериализует content из JSON в Python-объект.
         Используется, если сервер возвращает JSON (например, {"message": "OK"}).
+        Сжатое тело предварительно распаковывается.
         :return: dict/list/str/int — в зависимости от содержимого.
         """
-        return json.loads(self.content)
+        return json.loads(decode_content(self.content, self.content_encoding))
+
+    def get_log_content(self) -> str:
+        """
+        Тело ответа для записи в лог: сжатое тело распаковывается, а если кодировка
+        неизвестна или тело повреждено — вместо байтов пишется только их количество.
+        """
+        if is_supported_encoding(self.content_encoding):
+            try:
+                return decode_content(self.content, self.content_encoding).decode(errors="replace")
+            except Exception:  # noqa: WPS424 — лог не должен ронять обработку ответа
+                pass
+        return f"<{len(self.content)} bytes, Content-Encoding: {self.content_encoding}>"
 
 
     def change_content(self, content: Any) -> None:
@@ -39,6 +61,10 @@ class Response:
         :param content: новый контент (например, dict)
         """
         self.content = json.dumps(content).encode()  # Сериализация + кодирование в байты.
+        self.headers = {
+            key: value for key, value in self.headers.items()
+            if key.lower() not in ("content-encoding", "content-length")
+        }  # Новое тело не сжато — старые Content-Encoding/Content-Length к нему не относятся.
         self.headers["Content-Length"] = str(len(self.content))  # Обновляем длину тела.
 
 
@@ -4,6 +4,7 @@ V1_PREFIX = "/v1"
 BASE_API_PREFIX = "/api/api-gateway"
 API_PREFIX = BASE_API_PREFIX + V1_PREFIX
 SWAGGER_DOC_URL = "/docs"
+METRICS_URL = API_PREFIX + "/metrics"
 
 GNS3_BASE_API_PREFIX = "/api/gns3"
 
@@ -1,3 +1,5 @@
+from typing import Optional
+
 from dependency_injector import containers, providers, resources
 # containers — базовый модуль для создания контейнеров зависимостей
 # providers — механизмы создания зависимостей (Singleton, Factory, Resource и т.д.)
@@ -8,7 +10,7 @@ from dependency_injector import containers, providers, resources
 from gns_api_gateway.api import GNS3Router  # HTTP-роутер (например, FastAPI router)
 from gns_api_gateway.application import GNS3Service  # Сервисный слой (бизнес-логика)
 from gns_api_gateway.datasource import Database  # Класс для подключения к PostgreSQL
-from gns_api_gateway.infrastructure import GNS3Proxy  # Клиент для общения с внешним GNS3 API
+from gns_api_gateway.infrastructure import GNS3Proxy, UpstreamLimiter  # Клиент для общения с внешним GNS3 API
 from gns_api_gateway.infrastructure.repositories import UserRepository, TokenRepository  # Работа с БД
 
 class DatabaseResource(resources.Resource):
@@ -56,12 +58,39 @@ class Repositories(containers.DeclarativeContainer):
 
 
 
+def create_upstream_limiter(
+    enabled: bool,
+    project_create: int,
+    project_open: int,
+    node_start: int,
+    queue_timeout: float,
+) -> Optional[UpstreamLimiter]:
+    if not enabled:
+        return None
+    limits = {"project_create": project_create, "project_open": project_open, "node_start": node_start}
+    return UpstreamLimiter(limits, queue_timeout=queue_timeout)
+
+
 class ExternalServices(containers.DeclarativeContainer):
     config = providers.Configuration()
+    repositories = providers.DependenciesContainer()  # Роль пользователя нужна для приоритета в очереди к GNS3
+
+    upstream_limiter: providers.Singleton[Optional[UpstreamLimiter]] = providers.Singleton(
+        create_upstream_limiter,
+        enabled=config.upstream_limit.enabled,
+        project_create=config.upstream_limit.project_create,
+        project_open=config.upstream_limit.project_open,
+        node_start=config.upstream_limit.node_start,
+        queue_timeout=config.upstream_limit.queue_timeout,
+    )
 
     gns3_proxy: providers.Singleton[GNS3Proxy] = providers.Singleton(
         GNS3Proxy,
         base_url=config.gns3_url,
+        passthrough_encoding=config.compression.passthrough,  # Сжатые ответы GNS3 не распаковываются.
+        limiter=upstream_limiter,
+        user_repository=repositories.user,
+        role_cache_ttl=config.upstream_limit.role_cache_ttl,
     )
 
 
@@ -101,6 +130,7 @@ class Containers(containers.DeclarativeContainer):
     external_services: providers.Container[ExternalServices] = providers.Container(
         ExternalServices,
         config=config,
+        repositories=repositories,
     )
     application: providers.Container[Application] = providers.Container(
         Application,
@@ -1,46 +1,160 @@
+import asyncio  # Асинхронная пауза между повторными попытками.
 import logging  # Для записи ошибок и событий в лог.
-from asyncio import sleep  # Асинхронная пауза между повторными попытками.
+import random  # Случайная задержка (full jitter).
+import threading  # Бюджет повторов общий для всех корутин и потоков процесса.
+import time  # Часы для ограничения общего времени повторов.
+from dataclasses import dataclass
 from functools import wraps  # Сохраняет метаданные декорируемой функции.
+from typing import Awaitable, Callable, Optional
+
+from gns_api_gateway.metrics import registry  # Метрики повторных попыток.
 
 
 logger = logging.getLogger(__name__)  # Логгер текущего модуля.
 
 
-__all__ = ["async_backoff"]  # Экспортируется только декоратор async_backoff.
+__all__ = ["RetryBudget", "RetryPolicy", "async_backoff"]
+
+
+retries_total = registry.counter(
+    "gateway_retries_total",
+    "Retry decisions taken by retry policies.",
+    labels=("operation", "outcome"),
+)
+retry_delay = registry.histogram(
+    "gateway_retry_delay_seconds",
+    "Delay slept before a retry.",
+    labels=("operation",),
+)
+
+
+class RetryBudget:
+    """
+    Общий для всех вызывающих бюджет повторов (токен-бакет).
+    Каждый первый вызов пополняет бюджет на `ratio` токена, каждый повтор тратит один токен,
+    кроме того, бюджет пополняется на `min_per_second` токенов в секунду.
+    Когда база недоступна, повторы всех корутин в сумме не превышают заданную долю от нагрузки,
+    вместо того чтобы умножать её на число попыток.
+    """
+
+    def __init__(
+        self,
+        ratio: float = 0.2,
+        min_per_second: float = 1.0,
+        capacity: float = 10.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self._ratio = ratio
+        self._min_per_second = min_per_second
+        self._capacity = capacity
+        self._clock = clock
+        self._tokens = capacity
+        self._updated_at = clock()
+        self._lock = threading.Lock()
+
+    def deposit(self) -> None:
+        with self._lock:
+            self._refill()
+            self._tokens = min(self._capacity, self._tokens + self._ratio)
+
+    def try_withdraw(self) -> bool:
+        with self._lock:
+            self._refill()
+            if self._tokens < 1:
+                return False
+            self._tokens -= 1
+            return True
+
+    def _refill(self) -> None:
+        now = self._clock()
+        self._tokens = min(self._capacity, self._tokens + (now - self._updated_at) * self._min_per_second)
+        self._updated_at = now
 
 
+@dataclass(frozen=True)
+class RetryPolicy:
+    """
+    Политика повторов с экспоненциальной задержкой и полным джиттером:
+    перед повтором номер n ждём случайное время из [0, min(max_delay, base_delay * 2 ** n)],
+    поэтому корутины, упавшие одновременно (например, при перезапуске Postgres), не повторяют запрос в унисон.
+    Повторяются только исключения из `retry_on`; остальные пробрасываются сразу.
+    Повторы прекращаются, если исчерпаны попытки, истекло `max_elapsed` секунд с первого вызова
+    или закончился общий бюджет повторов.
+    Часы, функция ожидания и генератор случайных чисел подменяемы — для детерминированных проверок.
+    """
+    base_delay: float = 0.1  # Верхняя граница задержки перед первым повтором (в секундах).
+    max_delay: float = 6.0  # Максимальная верхняя граница задержки (в секундах).
+    max_attempts: int = 4  # Общее число попыток, включая первую.
+    max_elapsed: float = 10.0  # Сколько секунд с первого вызова допускается тратить на повторы.
+    budget: Optional[RetryBudget] = None  # Общий бюджет повторов; None — без ограничения.
+    retry_on: tuple[type[Exception], ...] = (Exception,)  # Исключения, при которых вызов повторяется.
+    clock: Callable[[], float] = time.monotonic
+    sleep: Callable[[float], Awaitable[None]] = asyncio.sleep
+    uniform: Callable[[float, float], float] = random.uniform
+
+    def delay(self, retry: int) -> float:
+        """
+        Задержка перед повтором номер `retry` (начиная с нуля).
+        """
+        return self.uniform(0, min(self.max_delay, self.base_delay * 2 ** retry))
+
+    async def call(self, operation: str, func: Callable[..., Awaitable], *args, **kwargs):
+        """
+        Вызывает `func` и повторяет вызов при исключениях согласно политике.
+        Если повтор невозможен, пробрасывается последнее исключение.
+        """
+        started_at = self.clock()
+        if self.budget is not None:
+            self.budget.deposit()
+
+        retry = 0
+        while True:
+            try:
+                return await func(*args, **kwargs)
+            except Exception as err:
+                if not isinstance(err, self.retry_on):
+                    retries_total.inc(operation=operation, outcome="not_retryable")
+                    raise
+
+                delay = self.delay(retry)
+                outcome = self._refusal(retry, self.clock() - started_at + delay)
+                if outcome is not None:
+                    retries_total.inc(operation=operation, outcome=outcome)
+                    logger.error("Error occurred in %s: %s. Giving up (%s).", operation, err, outcome)
+                    raise
 
-def async_backoff(
-    start_sleep_time: float = 0.1,  # Начальная задержка между попытками (в секундах).
-    factor: int = 2,                # Множитель, по которому увеличивается задержка (экспоненциально).
-    max_sleep_time: int = 6,       # Максимальная пауза между попытками (в секундах).
-    times: int = 5,                # Общее число попыток.
-):
+                retry += 1
+                retries_total.inc(operation=operation, outcome="retried")
+                retry_delay.observe(delay, operation=operation)
+                logger.error(
+                    "Error occurred in %s: %s. Retry #%s in %.3f sec.", operation, err, retry, delay,
+                )
+            await self.sleep(delay)
+
+    def _refusal(self, retry: int, elapsed_after_delay: float) -> Optional[str]:
+        """
+        Причина, по которой повтор не выполняется, или None, если повторять можно.
+        Бюджет проверяется последним, чтобы не тратить токены на заведомо отклонённые повторы.
+        """
+        if retry + 1 >= self.max_attempts:
+            return "exhausted"
+        if elapsed_after_delay > self.max_elapsed:
+            return "deadline"
+        if self.budget is not None and not self.budget.try_withdraw():
+            return "budget_exhausted"
+        return None
+
+
+def async_backoff(policy: RetryPolicy):
     """
-    Асинхронный декоратор для повторного выполнения функции при исключениях.
-    Использует экспоненциальную задержку между попытками.
+    Асинхронный декоратор для повторного выполнения функции при исключениях по политике `policy`.
     """
     def func_wrapper(func):
+        operation = func.__qualname__
+
         @wraps(func)
         async def inner(*args, **kwargs):
-            time = start_sleep_time  # Начальная задержка.
-            attempts = times  # Счётчик оставшихся попыток.
-            while True:
-                try:
-                    return await func(*args, **kwargs)  # Пытаемся выполнить функцию.
-                except Exception as err:
-                    if not attempts:  # Если попытки закончились — пробрасываем исключение.
-                        raise
-                    # Экспоненциальное увеличение задержки, с ограничением максимума.
-                    time = (time * 2 ** factor) if time < max_sleep_time else max_sleep_time
-                    attempts -= 1
-                    logger.error(  # Записываем ошибку и номер попытки в лог.
-                        f"Error occured in {func.__name__}: {err}.\n"
-                        f"Try to repeat {func.__name__}, attempt # {times - attempts}. "
-                        f"Delay before attempt: {time} sec."
-                    )
-                await sleep(time)  # Пауза перед повторной попыткой.
+            return await policy.call(operation, func, *args, **kwargs)
 
         return inner  # Возвращаем обёртку.
     return func_wrapper  # Возвращаем декоратор.
-
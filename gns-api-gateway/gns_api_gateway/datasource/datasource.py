@@ -1,3 +1,4 @@
+import asyncio  # Таймауты подключения повторяются наравне с сетевыми ошибками.
 import logging  # Для логирования событий и ошибок.
 from contextlib import asynccontextmanager  # Для создания асинхронного контекстного менеджера.
 from typing import AsyncGenerator  # Для аннотации типа генератора, работающего асинхронно.
@@ -6,7 +7,7 @@ from urllib import parse  # Для кодирования строки запр
 import asyncpg  # Высокопроизводительный асинхронный драйвер PostgreSQL.
 from sqlalchemy import MetaData  # Метаданные SQLAlchemy, например для Alembic или ORM.
 
-from .backoff import async_backoff  # Декоратор для повторных попыток при ошибке.
+from .backoff import RetryBudget, RetryPolicy, async_backoff  # Повторные попытки при ошибке.
 
 
 __all__ = ["Database", "metadata"]  # Экспортируемые объекты модуля.
@@ -14,6 +15,25 @@ __all__ = ["Database", "metadata"]  # Экспортируемые объект
 
 metadata = MetaData()
 
+# Политика повторов получения соединения. Бюджет общий для всех корутин процесса:
+# при перезапуске Postgres повторы не множат нагрузку на восстанавливающуюся базу.
+# Повторяются только сбои соединения; ошибки конфигурации (например, неверный пароль) — нет.
+ACQUIRE_RETRY_POLICY = RetryPolicy(
+    base_delay=0.1,
+    max_delay=2.0,
+    max_attempts=4,
+    max_elapsed=5.0,
+    budget=RetryBudget(ratio=0.2, min_per_second=2.0, capacity=20.0),
+    retry_on=(
+        OSError,
+        asyncio.TimeoutError,
+        asyncpg.InterfaceError,
+        asyncpg.PostgresConnectionError,
+        asyncpg.CannotConnectNowError,
+        asyncpg.TooManyConnectionsError,
+    ),
+)
+
 
 class Database:
     def __init__(
@@ -61,12 +81,12 @@ class Database:
 
 
 
-    @async_backoff(times=3)
+    @async_backoff(ACQUIRE_RETRY_POLICY)
     async def acquire_connection(self) -> asyncpg.Connection:
         """
         Получает соединение из пула.
         Если пул ещё не создан — создаёт его.
-        Повторяет попытки при сбое (до 3 раз).
+        Повторяет попытки при сбое (до 3 раз, в пределах общего бюджета повторов).
         """
         if not self._connection_pool:
             await self._initialize_connection_pool()
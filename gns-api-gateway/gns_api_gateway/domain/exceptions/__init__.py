@@ -2,5 +2,6 @@
 from .auth import *
 from .base import *
 from .proxies import *
+from .rate_limit import *
 
-__all__ = auth.__all__ + base.__all__ + proxies.__all__
+__all__ = auth.__all__ + base.__all__ + proxies.__all__ + rate_limit.__all__
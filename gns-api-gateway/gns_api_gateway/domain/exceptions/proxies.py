@@ -1,7 +1,18 @@
+import http
+
 from .base import BaseApiGatewayException
 
-__all__ = ["GNS3ProxyError"]
+__all__ = ["GNS3ProxyError", "UpstreamBusyError"]
 
 
 class GNS3ProxyError(BaseApiGatewayException):
     pass
+
+
+class UpstreamBusyError(GNS3ProxyError):
+    code = "upstream_busy"
+
+    def __init__(self, detail: str, retry_after: float, status_code: int = http.HTTPStatus.SERVICE_UNAVAILABLE):
+        super().__init__(detail)
+        self.retry_after = retry_after
+        self.status_code = status_code
@@ -0,0 +1,14 @@
+import http
+
+from .base import BaseApiGatewayException
+
+__all__ = ["RateLimitError"]
+
+
+class RateLimitError(BaseApiGatewayException):
+    code = "rate_limit_exceeded"
+
+    def __init__(self, detail: str, retry_after: float, status_code: int = http.HTTPStatus.TOO_MANY_REQUESTS):
+        super().__init__(detail)
+        self.retry_after = retry_after
+        self.status_code = status_code
@@ -4,17 +4,21 @@ from typing import Awaitable, Callable  # Для типов middleware.
 
 import uvicorn  # Сервер ASGI, используется для запуска FastAPI.
 from fastapi import FastAPI, Request
-from fastapi.responses import Response
+from fastapi.responses import PlainTextResponse, Response
 
 
 from gns_api_gateway.async_rest_client import Methods  # Перечисление HTTP-методов.
 from gns_api_gateway import api, constants  # Модули с роутерами и константами.
+from gns_api_gateway.api.access_log import log_access  # Middleware структурированного access-лога.
+from gns_api_gateway.api.compression import ResponseCompressor  # Middleware согласованного сжатия ответов.
+from gns_api_gateway.api.rate_limit import RateLimiter  # Middleware ограничения частоты запросов пользователя.
 from gns_api_gateway.api.error_handlers import (
     json_api_gateway_exception_error_handler,
     register_error_handler,
 )
 from gns_api_gateway.containers import Containers  # Корневой DI-контейнер.
 from gns_api_gateway.domain.exceptions import AuthError  # Кастомное исключение авторизации.
+from gns_api_gateway.metrics import registry  # Метрики процесса.
 from gns_api_gateway.settings import Settings  # Конфигурация приложения.
 
 
@@ -68,9 +72,13 @@ def create_fastapi() -> FastAPI:
 
         logger.info("SENTRY ENABLED!")
 
+    add_metrics_route(fastapi_app)
     add_routers(fastapi_app)
+    register_rate_limit(fastapi_app)  # До авторизации: выполняется внутри неё, когда токен уже известен.
     register_auth(fastapi_app)
     register_error_handler(fastapi_app)
+    register_compression(fastapi_app)
+    register_access_log(fastapi_app)  # Регистрируется последним, чтобы быть внешним middleware.
 
     return fastapi_app
 
@@ -85,6 +93,27 @@ def register_auth(app: FastAPI):
         return await call_next(request)  # Продолжение обработки запроса.
 
 
+def register_rate_limit(app: FastAPI):
+    app.middleware("http")(RateLimiter(Settings().rate_limit))
+
+
+def register_compression(app: FastAPI):
+    # Сжатие выполняется внутри access-лога, чтобы его стоимость попадала в duration_ms.
+    app.middleware("http")(ResponseCompressor(Settings().compression))
+
+
+def register_access_log(app: FastAPI):
+    # Внешний middleware: учитывает в том числе ответы, сформированные middleware авторизации.
+    app.middleware("http")(log_access)
+
+
+def add_metrics_route(fastapi_app: FastAPI):
+    # Должен быть зарегистрирован раньше универсального маршрута проксирования.
+    async def metrics(request: Request) -> Response:
+        return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
+
+    fastapi_app.add_route(path=constants.METRICS_URL, route=metrics, methods=["GET"])
+
 
 def add_routers(fastapi_app: FastAPI):
     api_methods = list(Methods)  # ["GET", "POST", "PUT", ...]
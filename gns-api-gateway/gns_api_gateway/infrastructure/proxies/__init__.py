@@ -1,4 +1,5 @@
 from .gns3 import *
 from .generic_rest_client import *
+from .upstream_limiter import *
 
-__all__ = gns3.__all__ + generic_rest_client.__all__
+__all__ = gns3.__all__ + generic_rest_client.__all__ + upstream_limiter.__all__
@@ -1,8 +1,14 @@
 from http import HTTPStatus
-from typing import Any
 
-from gns_api_gateway.async_rest_client import AbstractRestClient, AsyncRestClientError, TokenAuthProvider
+from gns_api_gateway.async_rest_client import (
+    AbstractRestClient,
+    AsyncRestClientError,
+    Methods,
+    Response,
+    TokenAuthProvider,
+)
 from gns_api_gateway.infrastructure import user
+from gns_api_gateway.log_pipeline import update_request_log_context
 
 __all__ = ["GenericRestClient"]
 
@@ -13,14 +19,18 @@ class GenericRestClient(AbstractRestClient):
     def _set_authentication(self) -> None:
         self._auth_provider = TokenAuthProvider(user)
 
-    def _check_response(self, response: dict[str, Any], url: str) -> None:
-        response_status_code = response["status_code"]
-        response_content = response["content"]
-        if response_status_code >= HTTPStatus.BAD_REQUEST:
+    def _on_response(self, method: Methods, url: str, status: int, elapsed: float) -> None:
+        # Задержка и статус апстрима попадают в access-лог текущего запроса.
+        update_request_log_context(upstream_status=status, upstream_latency_ms=round(elapsed * 1000, 2))
+
+    def _check_response(self, response: Response, url: str) -> None:
+        if response.status_code >= HTTPStatus.BAD_REQUEST:
+            # В режиме passthrough тело может быть сжато — в лог и в исключение попадает распакованный текст.
+            response_content = response.get_log_content()
             self._logger.error(
                 "Response for url `%s` with status code `%s` failed with error %s",
                 url,
-                response_status_code,
+                response.status_code,
                 response_content,
             )
 
@@ -1,7 +1,78 @@
+import re
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Optional
+
+from cachetools import TTLCache
+
+from gns_api_gateway.async_rest_client import Methods
+from gns_api_gateway.domain import UserRole
+from gns_api_gateway.infrastructure.access_management import user
+from gns_api_gateway.infrastructure.repositories import UserRepository
 from .generic_rest_client import GenericRestClient
+from .upstream_limiter import UpstreamLimiter
 
 __all__ = ["GNS3Proxy"]
 
+# Дорогие для сервера GNS3 операции, число одновременных вызовов которых ограничивается.
+OPERATION_CLASSES: tuple[tuple[Methods, re.Pattern, str], ...] = (
+    (Methods.POST, re.compile(r"^/v2/projects(/load)?$"), "project_create"),
+    (Methods.POST, re.compile(r"^/v2/projects/[^/]+/open$"), "project_open"),
+    (Methods.POST, re.compile(r"^/v2/projects/[^/]+/nodes(/[^/]+)?/start$"), "node_start"),
+)
+
+# Преподаватели обслуживаются раньше массовых операций студентов (меньше — раньше).
+ROLE_PRIORITIES = {UserRole.TEACHER: 0, UserRole.STUDENT: 1}
+LOWEST_PRIORITY = max(ROLE_PRIORITIES.values())
+
 
 class GNS3Proxy(GenericRestClient):
-    pass
+    def __init__(
+        self,
+        base_url: str,
+        *,
+        limiter: Optional[UpstreamLimiter] = None,
+        user_repository: Optional[UserRepository] = None,
+        role_cache_ttl: float = 60,
+        **kwargs,
+    ) -> None:
+        self._limiter = limiter
+        self._user_repository = user_repository
+        self._roles: TTLCache = TTLCache(maxsize=10_000, ttl=role_cache_ttl)  # Роль по токену
+        super().__init__(base_url, **kwargs)
+
+    @asynccontextmanager
+    async def _upstream_slot(self, method: Methods, url: str) -> AsyncIterator[None]:
+        operation = self._operation_class(method, url)
+        if self._limiter is None or operation is None:
+            yield
+            return
+
+        async with self._limiter.slot(operation, await self._priority()):
+            yield
+
+    @staticmethod
+    def _operation_class(method: Methods, url: str) -> Optional[str]:
+        path = url.split("?", 1)[0]
+        for operation_method, pattern, operation in OPERATION_CLASSES:
+            if method == operation_method and pattern.match(path):
+                return operation
+        return None
+
+    async def _priority(self) -> int:
+        """
+        Приоритет текущего пользователя в очереди к GNS3. Роль запрашивается из БД
+        только для ограничиваемых операций и кэшируется по токену.
+        """
+        token = user.get(None)
+        if token is None or self._user_repository is None:
+            return LOWEST_PRIORITY
+
+        if (role := self._roles.get(token)) is None:
+            try:
+                role = (await self._user_repository.get_user_by_token(token)).role
+            except Exception:  # noqa: WPS424 — неизвестный токен не должен ломать сам запрос
+                self._logger.warning("Failed to resolve user role for upstream priority", exc_info=True)
+                return LOWEST_PRIORITY
+            self._roles[token] = role
+
+        return ROLE_PRIORITIES.get(role, LOWEST_PRIORITY)
@@ -0,0 +1,123 @@
+import asyncio
+import heapq
+import itertools
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Callable
+
+from gns_api_gateway.domain.exceptions import UpstreamBusyError
+from gns_api_gateway.metrics import registry
+
+__all__ = ["UpstreamLimiter"]
+
+queue_depth = registry.gauge(
+    "gateway_upstream_queue_depth",
+    "Requests waiting for an upstream concurrency slot.",
+    labels=("operation",),
+)
+in_flight = registry.gauge(
+    "gateway_upstream_in_flight",
+    "Upstream requests currently holding a concurrency slot.",
+    labels=("operation",),
+)
+queue_wait = registry.histogram(
+    "gateway_upstream_queue_wait_seconds",
+    "Time spent waiting for an upstream concurrency slot.",
+    labels=("operation", "priority"),
+)
+queue_timeouts = registry.counter(
+    "gateway_upstream_queue_timeouts_total",
+    "Requests rejected because no upstream slot was freed in time.",
+    labels=("operation",),
+)
+
+
+class _OperationSlots:
+    def __init__(self, limit: int) -> None:
+        self.limit = limit
+        self.active = 0
+        # Очередь ожидающих: (приоритет, порядковый номер, future). Меньший приоритет обслуживается раньше,
+        # при равном — в порядке поступления.
+        self.waiters: list[tuple[int, int, asyncio.Future]] = []
+
+
+class UpstreamLimiter:
+    """
+    Ограничитель одновременных запросов к апстриму по классам операций.
+    У каждого класса (создание проекта, открытие проекта, запуск узлов...) свой лимит слотов.
+    Запросы сверх лимита ждут в очереди с приоритетом не дольше `queue_timeout` секунд,
+    после чего получают UpstreamBusyError. Освободившийся слот передаётся ожидающему напрямую,
+    поэтому новые запросы не могут обогнать очередь.
+    """
+
+    def __init__(
+        self,
+        limits: dict[str, int],
+        queue_timeout: float,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self._slots = {operation: _OperationSlots(limit) for operation, limit in limits.items()}
+        self._queue_timeout = queue_timeout
+        self._clock = clock
+        self._sequence = itertools.count()
+
+    @asynccontextmanager
+    async def slot(self, operation: str, priority: int) -> AsyncIterator[None]:
+        """
+        Занимает слот класса `operation` на время блока. Классы без лимита не ограничиваются.
+        """
+        if operation not in self._slots:
+            yield
+            return
+
+        await self._acquire(operation, priority)
+        in_flight.inc(operation=operation)
+        try:
+            yield
+        finally:
+            in_flight.dec(operation=operation)
+            self._release(operation)
+
+    async def _acquire(self, operation: str, priority: int) -> None:
+        slots = self._slots[operation]
+        started_at = self._clock()
+        if slots.active < slots.limit and not slots.waiters:
+            slots.active += 1
+            queue_wait.observe(0, operation=operation, priority=str(priority))
+            return
+
+        waiter = asyncio.get_running_loop().create_future()
+        heapq.heappush(slots.waiters, (priority, next(self._sequence), waiter))
+        queue_depth.inc(operation=operation)
+        try:
+            await asyncio.wait_for(waiter, self._queue_timeout)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as error:
+            if waiter.done() and not waiter.cancelled():
+                # Слот успели передать одновременно с отменой — возвращаем его следующему.
+                self._release(operation)
+            else:
+                self._discard(slots, waiter)
+            if isinstance(error, asyncio.TimeoutError):
+                queue_timeouts.inc(operation=operation)
+                raise UpstreamBusyError(
+                    f"Upstream is busy with `{operation}` operations, retry later",
+                    retry_after=self._queue_timeout,
+                ) from None
+            raise
+        finally:
+            queue_depth.dec(operation=operation)
+            queue_wait.observe(self._clock() - started_at, operation=operation, priority=str(priority))
+
+    def _release(self, operation: str) -> None:
+        slots = self._slots[operation]
+        while slots.waiters:
+            _, _, waiter = heapq.heappop(slots.waiters)
+            if not waiter.done():
+                waiter.set_result(None)  # Слот переходит ожидающему, счётчик занятых не меняется.
+                return
+        slots.active -= 1
+
+    @staticmethod
+    def _discard(slots: _OperationSlots, waiter: asyncio.Future) -> None:
+        slots.waiters = [entry for entry in slots.waiters if entry[2] is not waiter]
+        heapq.heapify(slots.waiters)
@@ -0,0 +1,4 @@
+# type: ignore
+from .stores import *
+
+__all__ = stores.__all__
@@ -0,0 +1,104 @@
+import abc
+import asyncio
+import sqlite3
+import threading
+import time
+from typing import Callable, Optional
+
+from cachetools import TTLCache
+
+__all__ = ["BucketStore", "InMemoryBucketStore", "SqliteBucketStore", "refill_and_take"]
+
+BucketState = tuple[float, float]  # (токены, время последнего обновления)
+
+
+def refill_and_take(
+    state: Optional[BucketState],
+    now: float,
+    rate: float,
+    capacity: float,
+) -> tuple[BucketState, float]:
+    """
+    Один шаг токен-бакета: пополняет бакет с темпом `rate` токенов/сек (не более `capacity`)
+    и пытается забрать один токен.
+    Возвращает новое состояние и время ожидания в секундах (0 — запрос разрешён).
+    """
+    tokens, updated_at = state if state is not None else (capacity, now)
+    tokens = min(capacity, tokens + max(0.0, now - updated_at) * rate)
+    if tokens >= 1:
+        return (tokens - 1, now), 0.0
+    return (tokens, now), (1 - tokens) / rate
+
+
+class BucketStore(abc.ABC):
+    @abc.abstractmethod
+    async def take(self, key: str, rate: float, capacity: float) -> float:
+        """
+        Забирает токен из бакета `key`. Возвращает 0, если запрос разрешён,
+        иначе — через сколько секунд появится следующий токен.
+        """
+
+
+class InMemoryBucketStore(BucketStore):
+    """
+    Бакеты в памяти воркера. Давно не использованные бакеты вытесняются по TTL —
+    к этому моменту они и так были бы полными, поэтому вытеснение не меняет поведения.
+    """
+
+    def __init__(self, idle_ttl: float, max_buckets: int = 100_000, clock: Callable[[], float] = time.monotonic) -> None:
+        self._buckets: TTLCache = TTLCache(maxsize=max_buckets, ttl=idle_ttl, timer=clock)
+        self._clock = clock
+
+    async def take(self, key: str, rate: float, capacity: float) -> float:
+        # Выполняется целиком в event loop без await внутри — гонок между корутинами нет.
+        self._buckets[key], retry_after = refill_and_take(self._buckets.get(key), self._clock(), rate, capacity)
+        return retry_after
+
+
+class SqliteBucketStore(BucketStore):
+    """
+    Бакеты в локальном файле SQLite, общие для всех воркеров на хосте.
+    Каждая операция — короткая транзакция BEGIN IMMEDIATE, выполняемая в пуле потоков,
+    чтобы блокировки файла не останавливали event loop.
+    """
+
+    CLEANUP_EVERY = 1000  # Раз в столько операций удаляются давно не использованные бакеты.
+
+    def __init__(self, path: str, idle_ttl: float, clock: Callable[[], float] = time.time) -> None:
+        self._idle_ttl = idle_ttl
+        self._clock = clock  # Настенные часы: монотонные часы у разных процессов несопоставимы.
+        self._lock = threading.Lock()
+        self._operations = 0
+        self._connection = sqlite3.connect(path, timeout=5, isolation_level=None, check_same_thread=False)
+        self._connection.execute("pragma journal_mode=wal")
+        self._connection.execute(
+            "create table if not exists rate_limit_buckets "
+            "(key text primary key, tokens real not null, updated_at real not null)"
+        )
+
+    async def take(self, key: str, rate: float, capacity: float) -> float:
+        return await asyncio.to_thread(self._take, key, rate, capacity)
+
+    def _take(self, key: str, rate: float, capacity: float) -> float:
+        with self._lock:
+            connection = self._connection
+            connection.execute("begin immediate")
+            try:
+                row = connection.execute(
+                    "select tokens, updated_at from rate_limit_buckets where key = ?", (key,)
+                ).fetchone()
+                now = self._clock()
+                (tokens, updated_at), retry_after = refill_and_take(row, now, rate, capacity)
+                connection.execute(
+                    "insert into rate_limit_buckets (key, tokens, updated_at) values (?, ?, ?) "
+                    "on conflict(key) do update set tokens = excluded.tokens, updated_at = excluded.updated_at",
+                    (key, tokens, updated_at),
+                )
+                self._operations += 1
+                if self._operations % self.CLEANUP_EVERY == 0:
+                    connection.execute("delete from rate_limit_buckets where updated_at < ?", (now - self._idle_ttl,))
+                connection.execute("commit")
+            except Exception:
+                connection.execute("rollback")
+                raise
+            return retry_after
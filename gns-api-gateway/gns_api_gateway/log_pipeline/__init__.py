@@ -0,0 +1,7 @@
+# type: ignore
+from .context import *
+from .filters import *
+from .formatters import *
+from .queue_handler import *
+
+__all__ = context.__all__ + filters.__all__ + formatters.__all__ + queue_handler.__all__
@@ -0,0 +1,21 @@
+import contextvars
+from typing import Any, Optional
+
+__all__ = ["request_log_context", "update_request_log_context"]
+
+# Изменяемый словарь с данными текущего запроса для access-лога (задержка апстрима, статус, id пользователя).
+# Middleware кладёт сюда пустой словарь до вызова call_next: обработчик выполняется в дочерней задаче
+# с копией контекста, поэтому новое значение переменной наружу не вернётся, а изменения словаря — вернутся.
+request_log_context: contextvars.ContextVar[Optional[dict[str, Any]]] = contextvars.ContextVar(
+    "request_log_context",
+    default=None,
+)
+
+
+def update_request_log_context(**fields: Any) -> None:
+    """
+    Дополняет данные access-лога текущего запроса.
+    Вне HTTP-запроса (например, в фоновых задачах) ничего не делает.
+    """
+    if (context := request_log_context.get()) is not None:
+        context.update(fields)
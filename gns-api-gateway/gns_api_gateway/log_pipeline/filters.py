@@ -0,0 +1,60 @@
+import logging
+import random
+import threading
+import time
+from typing import Callable
+
+__all__ = ["AccessLogSamplingFilter"]
+
+
+class AccessLogSamplingFilter(logging.Filter):
+    """
+    Фильтр access-логгера, срабатывающий до постановки записи в очередь:
+    - успешные запросы (status < 400) пропускаются с вероятностью success_sample_rate;
+    - ошибки ограничиваются токен-бакетом (error_rate_limit записей/сек, всплеск до error_burst),
+      число подавленных ошибок добавляется в следующую пропущенную запись (поле `suppressed`).
+    """
+
+    def __init__(
+        self,
+        success_sample_rate: float,
+        error_rate_limit: float,
+        error_burst: int,
+        clock: Callable[[], float] = time.monotonic,
+        rand: Callable[[], float] = random.random,
+    ) -> None:
+        super().__init__()
+        self._success_sample_rate = success_sample_rate
+        self._error_rate_limit = error_rate_limit
+        self._error_burst = error_burst
+        self._clock = clock
+        self._rand = rand
+
+        self._tokens = float(error_burst)  # Бакет стартует полным.
+        self._updated_at = clock()
+        self._suppressed = 0
+        self._lock = threading.Lock()  # Логгер могут вызывать и из потоков исполнителя.
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        status = getattr(record, "status", None)
+        if status is not None and status < 400:
+            record.sample_rate = self._success_sample_rate
+            return self._rand() < self._success_sample_rate
+
+        with self._lock:
+            self._refill()
+            if self._tokens < 1:
+                self._suppressed += 1
+                return False
+
+            self._tokens -= 1
+            record.suppressed, self._suppressed = self._suppressed, 0
+            return True
+
+    def _refill(self) -> None:
+        now = self._clock()
+        self._tokens = min(
+            float(self._error_burst),
+            self._tokens + (now - self._updated_at) * self._error_rate_limit,
+        )
+        self._updated_at = now
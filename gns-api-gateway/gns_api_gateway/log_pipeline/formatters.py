@@ -0,0 +1,35 @@
+import json
+import logging
+from datetime import datetime, timezone
+
+__all__ = ["JsonLineFormatter"]
+
+# Атрибуты, которые есть у любой LogRecord; всё остальное пришло через `extra=` и попадает в JSON.
+_STANDARD_RECORD_ATTRS = frozenset(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+
+class JsonLineFormatter(logging.Formatter):
+    """
+    Форматирует запись в одну строку JSON: время, уровень, логгер, сообщение и все поля из `extra`.
+    Вызывается в потоке фонового писателя, поэтому сериализация не нагружает event loop.
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        payload = {
+            "ts": datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        payload.update(
+            (key, value) for key, value in record.__dict__.items() if key not in _STANDARD_RECORD_ATTRS
+        )
+        # exc_text заполняет только стандартный Formatter.format — трассировку форматируем сами.
+        if record.exc_info:
+            payload["exc"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            payload["exc"] = record.exc_text
+        if record.stack_info:
+            payload["stack"] = self.formatStack(record.stack_info)
+
+        return json.dumps(payload, ensure_ascii=False, default=str)
@@ -0,0 +1,87 @@
+import atexit
+import logging
+import queue
+import sys
+from logging.handlers import QueueHandler, QueueListener
+
+from gns_api_gateway.settings import Settings
+
+from .filters import AccessLogSamplingFilter
+from .formatters import JsonLineFormatter
+
+__all__ = ["ACCESS_LOGGER_NAME", "NonBlockingQueueHandler", "configure_logging"]
+
+ACCESS_LOGGER_NAME = "gns_api_gateway.access"  # Логгер структурированного access-лога.
+
+PLAIN_LOG_FORMAT = "[%(asctime)s] [%(name)s: %(levelname)s]  %(message)s"
+PLAIN_LOG_DATEFMT = "%Y-%m-%d %I:%M:%S"
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    """
+    QueueHandler, который никогда не блокирует вызывающий код:
+    - в очередь кладётся запись без форматирования (только подстановка аргументов),
+      форматирование и запись в поток выполняет фоновый QueueListener;
+    - при переполнении очереди запись отбрасывается и учитывается в счётчике `dropped`.
+    """
+
+    def __init__(self, log_queue: queue.Queue) -> None:
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Очередь внутрипроцессная (без pickle), поэтому exc_info можно оставить как есть —
+        # трассировка будет отформатирована уже в потоке писателя.
+        record = logging.makeLogRecord(record.__dict__)
+        record.message = record.getMessage()
+        record.msg = record.message
+        record.args = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+def configure_logging(settings: Settings) -> None:
+    """
+    Настраивает асинхронно-безопасное логирование процесса:
+    - корневой логгер и access-логгер пишут в ограниченные очереди;
+    - фоновые QueueListener'ы форматируют записи и выводят их в stdout/stderr;
+    - access-лог пишется JSON-строками с семплированием успешных запросов и ограничением частоты ошибок.
+    Слушатели останавливаются при завершении процесса, дописывая оставшиеся в очереди записи.
+    """
+    access_settings = settings.access_log
+
+    plain_handler = logging.StreamHandler(sys.stderr)
+    plain_handler.setFormatter(logging.Formatter(PLAIN_LOG_FORMAT, datefmt=PLAIN_LOG_DATEFMT))
+    plain_queue: queue.Queue = queue.Queue(maxsize=access_settings.queue_size)
+
+    root_logger = logging.getLogger()
+    root_logger.setLevel(settings.logger_level.upper())
+    root_logger.handlers = [NonBlockingQueueHandler(plain_queue)]
+
+    json_handler = logging.StreamHandler(sys.stdout)
+    json_handler.setFormatter(JsonLineFormatter())
+    access_queue: queue.Queue = queue.Queue(maxsize=access_settings.queue_size)
+
+    access_logger = logging.getLogger(ACCESS_LOGGER_NAME)
+    access_logger.setLevel(logging.INFO if access_settings.enabled else logging.CRITICAL + 1)
+    access_logger.propagate = False  # Access-лог не дублируется в обычный текстовый лог.
+    access_logger.handlers = [NonBlockingQueueHandler(access_queue)]
+    access_logger.filters = [
+        AccessLogSamplingFilter(
+            success_sample_rate=access_settings.success_sample_rate,
+            error_rate_limit=access_settings.error_rate_limit,
+            error_burst=access_settings.error_burst,
+        ),
+    ]
+
+    for listener in (
+        QueueListener(plain_queue, plain_handler),
+        QueueListener(access_queue, json_handler),
+    ):
+        listener.start()
+        atexit.register(listener.stop)
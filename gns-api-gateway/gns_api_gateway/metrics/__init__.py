@@ -0,0 +1,4 @@
+# type: ignore
+from .collectors import *
+
+__all__ = collectors.__all__
@@ -1,3 +1,5 @@
+from typing import Optional
+
 from pydantic import BaseSettings, Field
 # BaseSettings — специальный класс pydantic для загрузки настроек из переменных окружения (.env, system env).
 # Field — позволяет указывать значения по умолчанию, алиасы, описание и источник значения.
@@ -15,6 +17,60 @@ class DatabaseSettings(BaseSettings):
 
 
 
+class AccessLogSettings(BaseSettings):
+    enabled: bool = True  # ACCESS_LOG_ENABLED — писать ли структурированный access-лог.
+    success_sample_rate: float = 0.1  # Доля успешных запросов (< 400), попадающих в лог (0..1).
+    error_rate_limit: float = 5.0  # Сколько записей об ошибках в секунду допускается в среднем.
+    error_burst: int = 20  # Допустимый всплеск записей об ошибках сверх среднего темпа.
+    queue_size: int = 10000  # Размер очереди фонового писателя; при переполнении записи отбрасываются.
+
+    class Config:
+        env_prefix = "ACCESS_LOG_"
+
+
+
+class CompressionSettings(BaseSettings):
+    enabled: bool = True  # COMPRESSION_ENABLED — сжимать ли ответы шлюза.
+    passthrough: bool = True  # Отдавать уже сжатые апстримом тела как есть, без распаковки и повторного сжатия.
+    min_size: int = 1024  # Тела меньше этого размера (байт) не сжимаются — выигрыш меньше накладных расходов.
+    max_size: int = 8 * 1024 * 1024  # Тела больше этого размера отдаются без сжатия.
+    offload_size: int = 256 * 1024  # Тела больше этого размера сжимаются в пуле потоков, а не в event loop.
+    gzip_level: int = 6  # Уровень сжатия gzip/deflate (1..9).
+    brotli_quality: int = 4  # Качество brotli (0..11); высокие значения слишком дороги для онлайн-сжатия.
+    cpu_budget_bytes: int = 64 * 1024 * 1024  # Сколько байт в секунду процесс может сжать; сверх бюджета — без сжатия.
+
+    class Config:
+        env_prefix = "COMPRESSION_"
+
+
+
+class RateLimitSettings(BaseSettings):
+    enabled: bool = True  # RATE_LIMIT_ENABLED — ограничивать ли частоту запросов пользователя.
+    # Темпы строго положительны: из них считаются Retry-After и время жизни простаивающих бакетов.
+    read_rate: float = Field(10.0, gt=0)  # Чтение (GET/HEAD/OPTIONS): средний темп, запросов в секунду на пользователя.
+    read_burst: int = Field(60, ge=1)  # Чтение: допустимый всплеск запросов.
+    write_rate: float = Field(1.0, gt=0)  # Изменяющие методы (POST/PUT/PATCH/DELETE): средний темп, запросов в секунду.
+    write_burst: int = Field(20, ge=1)  # Изменяющие методы: допустимый всплеск запросов.
+    shared_store_path: Optional[str] = None  # Путь к файлу SQLite для бакетов, общих для всех воркеров хоста.
+
+    class Config:
+        env_prefix = "RATE_LIMIT_"
+
+
+
+class UpstreamLimitSettings(BaseSettings):
+    enabled: bool = True  # UPSTREAM_LIMIT_ENABLED — ограничивать ли одновременные тяжёлые запросы к GNS3.
+    project_create: int = 2  # Одновременных созданий (и загрузок) проектов.
+    project_open: int = 4  # Одновременных открытий проектов.
+    node_start: int = 8  # Одновременных запусков узлов.
+    queue_timeout: float = 30.0  # Сколько секунд запрос ждёт слота, прежде чем получить 503.
+    role_cache_ttl: float = 60.0  # Сколько секунд кэшируется роль пользователя для приоритета в очереди.
+
+    class Config:
+        env_prefix = "UPSTREAM_LIMIT_"
+
+
+
 class Settings(BaseSettings):
     env: str = "development"  # Среда выполнения (development / production).
     version: str = "1.0"  # Версия приложения.
@@ -23,6 +79,10 @@ class Settings(BaseSettings):
 
     gns3_url: str  # URL до GNS3-сервера (например, http://localhost:3080/api)
     database: DatabaseSettings = DatabaseSettings()  # Вложенные настройки базы данных.
+    access_log: AccessLogSettings = AccessLogSettings()  # Настройки структурированного access-лога.
+    compression: CompressionSettings = CompressionSettings()  # Настройки сжатия ответов.
+    rate_limit: RateLimitSettings = RateLimitSettings()  # Настройки ограничения частоты запросов.
+    upstream_limit: UpstreamLimitSettings = UpstreamLimitSettings()  # Лимиты одновременных запросов к GNS3.
 
     gns3_server_url: str  # Дополнительный адрес сервера GNS3 (может быть для отдельной цели).
 
@@ -0,0 +1,13 @@
+import os
+
+# Настройки шлюза читаются из окружения при импорте пакета; для тестов достаточно заглушек.
+for name, value in {
+    "POSTGRES_USER": "test",
+    "POSTGRES_PASSWORD": "test",
+    "POSTGRES_HOST": "localhost",
+    "POSTGRES_PORT": "5432",
+    "POSTGRES_DB": "test",
+    "GNS3_URL": "http://gns3-server:3080",
+    "GNS3_SERVER_URL": "http://gns3-server:3080",
+}.items():
+    os.environ.setdefault(name, value)
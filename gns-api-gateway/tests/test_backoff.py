@@ -0,0 +1,170 @@
+import asyncio
+import random
+
+import pytest
+
+from gns_api_gateway.datasource.backoff import RetryBudget, RetryPolicy, async_backoff, retries_total
+
+
+class FakeClock:
+    """
+    Часы, которые двигает только fake-sleep: повторы проверяются без реального ожидания.
+    """
+
+    def __init__(self) -> None:
+        self.now = 0.0
+        self.sleeps: list[float] = []
+
+    def __call__(self) -> float:
+        return self.now
+
+    async def sleep(self, delay: float) -> None:
+        self.sleeps.append(delay)
+        self.now += delay
+
+
+class Flaky:
+    """
+    Корутина, падающая первые `failures` вызовов.
+    """
+
+    def __init__(self, failures: int, error: type[Exception] = ConnectionError) -> None:
+        self.failures = failures
+        self.error = error
+        self.calls = 0
+
+    async def __call__(self) -> str:
+        self.calls += 1
+        if self.calls <= self.failures:
+            raise self.error(f"failure #{self.calls}")
+        return "ok"
+
+
+def make_policy(clock: FakeClock, seed: int = 42, **kwargs) -> RetryPolicy:
+    return RetryPolicy(clock=clock, sleep=clock.sleep, uniform=random.Random(seed).uniform, **kwargs)
+
+
+def test_full_jitter_stays_within_bounds():
+    policy = make_policy(FakeClock(), base_delay=0.1, max_delay=100.0)
+
+    for retry in range(6):
+        upper = 0.1 * 2 ** retry
+        delays = [policy.delay(retry) for _ in range(500)]
+        assert all(0 <= delay <= upper for delay in delays)
+        # Джиттер полный: задержки покрывают весь интервал, а не жмутся к верхней границе
+        assert min(delays) < upper * 0.1
+        assert max(delays) > upper * 0.9
+
+
+def test_delay_is_capped_by_max_delay():
+    policy = make_policy(FakeClock(), base_delay=0.1, max_delay=1.5)
+
+    delays = [policy.delay(retry) for retry in range(10, 20) for _ in range(100)]
+
+    assert max(delays) <= 1.5
+    assert max(delays) > 1.4
+
+
+def test_seeded_policy_is_deterministic():
+    first, second = FakeClock(), FakeClock()
+    func_first, func_second = Flaky(3), Flaky(3)
+
+    asyncio.run(make_policy(first, seed=7).call("op", func_first))
+    asyncio.run(make_policy(second, seed=7).call("op", func_second))
+
+    assert first.sleeps == second.sleeps
+    assert len(first.sleeps) == 3
+
+
+def test_retries_until_success():
+    clock = FakeClock()
+    func = Flaky(2)
+
+    assert asyncio.run(make_policy(clock, max_attempts=4).call("op", func)) == "ok"
+    assert func.calls == 3
+    assert len(clock.sleeps) == 2
+
+
+def test_gives_up_after_max_attempts():
+    clock = FakeClock()
+    func = Flaky(10)
+
+    with pytest.raises(ConnectionError, match="failure #4"):
+        asyncio.run(make_policy(clock, max_attempts=4).call("op", func))
+    assert func.calls == 4
+
+
+def test_gives_up_at_deadline():
+    clock = FakeClock()
+    func = Flaky(10)
+    # Первая задержка всегда равна верхней границе: дедлайн наступает до второго повтора
+    policy = RetryPolicy(
+        base_delay=4.0, max_delay=4.0, max_attempts=10, max_elapsed=5.0,
+        clock=clock, sleep=clock.sleep, uniform=lambda low, high: high,
+    )
+
+    with pytest.raises(ConnectionError):
+        asyncio.run(policy.call("op", func))
+    assert func.calls == 2
+    assert clock.sleeps == [4.0]
+
+
+def test_non_retryable_error_is_raised_immediately():
+    clock = FakeClock()
+    func = Flaky(1, error=PermissionError)
+    budget = RetryBudget(ratio=0, min_per_second=0, capacity=5, clock=clock)
+    before = retries_total.value(operation="non_retryable", outcome="not_retryable")
+
+    with pytest.raises(PermissionError):
+        asyncio.run(make_policy(clock, budget=budget, retry_on=(ConnectionError,)).call("non_retryable", func))
+
+    assert func.calls == 1
+    assert clock.sleeps == []
+    assert budget.try_withdraw()  # Токены на неповторяемую ошибку не тратятся
+    assert retries_total.value(operation="non_retryable", outcome="not_retryable") == before + 1
+
+
+def test_budget_exhaustion_stops_retries():
+    clock = FakeClock()
+    budget = RetryBudget(ratio=0, min_per_second=0, capacity=2, clock=clock)
+    policy = make_policy(clock, max_attempts=10, max_elapsed=1000, budget=budget)
+    func = Flaky(10)
+
+    with pytest.raises(ConnectionError):
+        asyncio.run(policy.call("op", func))
+
+    # Две попытки оплачены бюджетом, третья отклонена
+    assert func.calls == 3
+    assert not budget.try_withdraw()
+
+
+def test_budget_refills_over_time_and_on_calls():
+    clock = FakeClock()
+    budget = RetryBudget(ratio=0.5, min_per_second=1.0, capacity=3, clock=clock)
+    for _ in range(3):
+        assert budget.try_withdraw()
+    assert not budget.try_withdraw()
+
+    clock.now += 1.0  # Секунда — один токен
+    assert budget.try_withdraw()
+    assert not budget.try_withdraw()
+
+    budget.deposit()  # Два первых вызова — ещё один токен
+    budget.deposit()
+    assert budget.try_withdraw()
+    assert not budget.try_withdraw()
+
+    clock.now += 100.0  # Пополнение не превышает ёмкость
+    assert [budget.try_withdraw() for _ in range(4)] == [True, True, True, False]
+
+
+def test_decorator_uses_policy():
+    clock = FakeClock()
+    func = Flaky(1)
+
+    @async_backoff(make_policy(clock))
+    async def operation():
+        return await func()
+
+    assert asyncio.run(operation()) == "ok"
+    assert func.calls == 2
@@ -0,0 +1,74 @@
+import asyncio
+import zlib
+
+from fastapi import Request
+from fastapi.responses import Response as FastAPIResponse, StreamingResponse
+
+from gns_api_gateway.api.compression import ResponseCompressor
+from gns_api_gateway.async_rest_client import Response, decode_content, is_supported_encoding
+from gns_api_gateway.settings import CompressionSettings
+
+
+def make_request(accept_encoding: str) -> Request:
+    return Request({
+        "type": "http",
+        "method": "GET",
+        "path": "/",
+        "headers": [(b"accept-encoding", accept_encoding.encode())],
+    })
+
+
+def streamed(body: bytes, headers: dict) -> StreamingResponse:
+    # call_next в middleware возвращает потоковый ответ
+    async def chunks():
+        yield body
+
+    return StreamingResponse(chunks(), headers=headers)
+
+
+def run_compressor(upstream: StreamingResponse, accept_encoding: str) -> FastAPIResponse:
+    async def call_next(request: Request) -> FastAPIResponse:
+        return upstream
+
+    compressor = ResponseCompressor(CompressionSettings(min_size=1))
+    return asyncio.run(compressor(make_request(accept_encoding), call_next))
+
+
+def test_unknown_upstream_encoding_is_passed_through():
+    upstream = streamed(b"\x28\xb5\x2f\xfd", {"content-encoding": "zstd"})
+
+    response = run_compressor(upstream, "gzip")
+
+    assert response is upstream
+    assert response.headers["content-encoding"] == "zstd"
+
+
+def test_known_encoding_is_decoded_for_client_that_does_not_accept_it():
+    body = b'{"status": "ok"}' * 10
+    upstream = streamed(zlib.compress(body), {"content-encoding": "deflate", "content-type": "application/json"})
+
+    response = run_compressor(upstream, "identity")
+
+    assert response.body == body
+    assert "content-encoding" not in response.headers
+
+
+def test_log_content_is_decoded():
+    response = Response(
+        content=zlib.compress(b'{"message": "not found"}'), status_code=404, headers={"Content-Encoding": "deflate"},
+    )
+
+    assert response.get_log_content() == '{"message": "not found"}'
+
+
+def test_log_content_of_unknown_encoding_is_not_dumped():
+    response = Response(content=b"\x00\x01\x02", status_code=500, headers={"Content-Encoding": "zstd"})
+
+    assert not is_supported_encoding("zstd")
+    assert response.get_log_content() == "<3 bytes, Content-Encoding: zstd>"
+
+
+def test_identity_is_supported():
+    assert is_supported_encoding(None)
+    assert is_supported_encoding(" Identity ")
+    assert decode_content(b"raw", None) == b"raw"
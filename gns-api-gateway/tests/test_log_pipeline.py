@@ -0,0 +1,90 @@
+import json
+import logging
+import queue
+
+from gns_api_gateway.log_pipeline import AccessLogSamplingFilter, JsonLineFormatter, NonBlockingQueueHandler
+
+
+class FakeClock:
+    """
+    Часы, которые двигает только тест: пополнение бакета ошибок проверяется без реального ожидания.
+    """
+
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def make_record(status: int = 200, exc_info=None) -> logging.LogRecord:
+    record = logging.LogRecord("gns_api_gateway.access", logging.INFO, __file__, 1, "request", (), exc_info)
+    record.status = status
+    return record
+
+
+def make_filter(clock: FakeClock, rand=lambda: 0.5, **kwargs) -> AccessLogSamplingFilter:
+    options = {"success_sample_rate": 0.1, "error_rate_limit": 1.0, "error_burst": 2, **kwargs}
+    return AccessLogSamplingFilter(clock=clock, rand=rand, **options)
+
+
+def test_success_records_are_sampled():
+    values = iter([0.05, 0.5, 0.09999, 0.1])
+    log_filter = make_filter(FakeClock(), rand=lambda: next(values))
+
+    records = [make_record() for _ in range(4)]
+    assert [log_filter.filter(record) for record in records] == [True, False, True, False]
+    assert records[0].sample_rate == 0.1  # Доля выборки попадает в запись для пересчёта статистики
+
+
+def test_errors_are_rate_limited_and_suppressed_count_is_reported():
+    clock = FakeClock()
+    log_filter = make_filter(clock)
+
+    records = [make_record(status=500) for _ in range(5)]
+    assert [log_filter.filter(record) for record in records] == [True, True, False, False, False]
+    assert records[0].suppressed == 0
+
+    clock.now += 1  # За секунду бакет пополнился на один токен
+    record = make_record(status=502)
+    assert log_filter.filter(record)
+    assert record.suppressed == 3
+    assert not log_filter.filter(make_record(status=502))
+
+
+def test_error_bucket_does_not_grow_beyond_burst():
+    clock = FakeClock()
+    log_filter = make_filter(clock)
+
+    clock.now += 100
+    assert [log_filter.filter(make_record(status=404)) for _ in range(3)] == [True, True, False]
+
+
+def test_records_without_status_are_treated_as_errors():
+    log_filter = make_filter(FakeClock(), error_burst=1)
+    record = logging.LogRecord("gns_api_gateway.access", logging.ERROR, __file__, 1, "failure", (), None)
+
+    assert log_filter.filter(record)
+    assert not log_filter.filter(logging.makeLogRecord(record.__dict__))
+
+
+def test_json_line_contains_extra_fields_and_traceback():
+    try:
+        raise ValueError("broken upstream")
+    except ValueError as error:
+        record = make_record(status=500, exc_info=(type(error), error, error.__traceback__))
+    record.path = "/v2/projects"
+
+    # Запись проходит через очередь, как в configure_logging: трассировка форматируется в потоке писателя
+    handler = NonBlockingQueueHandler(queue.Queue())
+    line = json.loads(JsonLineFormatter().format(handler.prepare(record)))
+
+    assert line["msg"] == "request"
+    assert (line["status"], line["path"]) == (500, "/v2/projects")
+    assert line["exc"].startswith("Traceback")
+    assert "ValueError: broken upstream" in line["exc"]
+
+
+def test_json_line_without_exception_has_no_exc_field():
+    line = json.loads(JsonLineFormatter().format(make_record()))
+    assert "exc" not in line
@@ -0,0 +1,119 @@
+import asyncio
+
+import pytest
+from pydantic import ValidationError
+from starlette.requests import Request
+from starlette.responses import Response
+
+from gns_api_gateway.api.rate_limit import RateLimiter
+from gns_api_gateway.infrastructure import user
+from gns_api_gateway.infrastructure.rate_limiting import InMemoryBucketStore, SqliteBucketStore, refill_and_take
+from gns_api_gateway.settings import RateLimitSettings
+
+
+class FakeClock:
+    """
+    Часы, которые двигает только тест: пополнение бакетов проверяется без реального ожидания.
+    """
+
+    def __init__(self, now: float = 1000.0) -> None:
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def make_request(method: str = "GET") -> Request:
+    return Request({"type": "http", "method": method, "path": "/v2/projects", "headers": []})
+
+
+async def call_next(request: Request) -> Response:
+    return Response("ok")
+
+
+def test_bucket_refills_with_rate_up_to_capacity():
+    state, retry_after = refill_and_take(None, now=0.0, rate=2.0, capacity=3)
+    assert retry_after == 0 and state == (2, 0.0)  # Новый бакет полон
+
+    for _ in range(2):
+        state, retry_after = refill_and_take(state, now=0.0, rate=2.0, capacity=3)
+        assert retry_after == 0
+    state, retry_after = refill_and_take(state, now=0.0, rate=2.0, capacity=3)
+    assert retry_after == pytest.approx(0.5)  # Следующий токен появится через 1 / rate
+
+    state, retry_after = refill_and_take(state, now=0.5, rate=2.0, capacity=3)
+    assert retry_after == 0 and state[0] == pytest.approx(0)
+    # Долгий простой не накапливает больше capacity токенов
+    state, _ = refill_and_take(state, now=100.0, rate=2.0, capacity=3)
+    assert state[0] == pytest.approx(2)
+
+
+def test_in_memory_store_refills_by_clock():
+    clock = FakeClock()
+    store = InMemoryBucketStore(idle_ttl=10, clock=clock)
+
+    assert asyncio.run(store.take("a", rate=1.0, capacity=1)) == 0
+    assert asyncio.run(store.take("a", rate=1.0, capacity=1)) == pytest.approx(1)
+    assert asyncio.run(store.take("b", rate=1.0, capacity=1)) == 0  # Бакеты разных ключей независимы
+
+    clock.now += 1
+    assert asyncio.run(store.take("a", rate=1.0, capacity=1)) == 0
+
+
+def test_sqlite_store_is_shared_between_workers(tmp_path):
+    clock = FakeClock()
+    path = str(tmp_path / "buckets.sqlite3")
+    first = SqliteBucketStore(path, idle_ttl=10, clock=clock)
+    second = SqliteBucketStore(path, idle_ttl=10, clock=clock)
+
+    assert asyncio.run(first.take("a", rate=1.0, capacity=2)) == 0
+    assert asyncio.run(second.take("a", rate=1.0, capacity=2)) == 0
+    # Бюджет общий: третий запрос отклоняется, через какой бы воркер он ни пришёл
+    assert asyncio.run(first.take("a", rate=1.0, capacity=2)) == pytest.approx(1)
+
+    clock.now += 1
+    assert asyncio.run(second.take("a", rate=1.0, capacity=2)) == 0
+
+
+def test_sqlite_store_forgets_idle_buckets(tmp_path, monkeypatch):
+    clock = FakeClock()
+    store = SqliteBucketStore(str(tmp_path / "buckets.sqlite3"), idle_ttl=10, clock=clock)
+    monkeypatch.setattr(SqliteBucketStore, "CLEANUP_EVERY", 2)
+
+    def keys() -> list[str]:
+        return [key for key, in store._connection.execute("select key from rate_limit_buckets order by key")]
+
+    asyncio.run(store.take("idle", rate=1.0, capacity=1))
+    clock.now += 11
+    asyncio.run(store.take("active", rate=1.0, capacity=1))  # Вторая операция запускает очистку
+    assert keys() == ["active"]
+
+
+def test_exhausted_budget_returns_429_with_retry_after():
+    limiter = RateLimiter(RateLimitSettings(read_rate=0.5, read_burst=1, write_rate=1.0, write_burst=1))
+
+    async def scenario() -> list[Response]:
+        user.set("token")
+        return [await limiter(make_request(method), call_next) for method in ("GET", "GET", "POST")]
+
+    allowed, rejected, write = asyncio.run(scenario())
+    assert allowed.status_code == 200
+    assert rejected.status_code == 429
+    assert rejected.headers["Retry-After"] == "2"  # 1 / read_rate, округлённое вверх
+    assert b"rate_limit_exceeded" in rejected.body
+    assert write.status_code == 200  # У изменяющих методов свой бюджет
+
+
+def test_anonymous_requests_are_not_limited():
+    limiter = RateLimiter(RateLimitSettings(read_rate=1.0, read_burst=1))
+
+    async def scenario() -> list[int]:
+        return [(await limiter(make_request(), call_next)).status_code for _ in range(3)]
+
+    assert asyncio.run(scenario()) == [200, 200, 200]
+
+
+@pytest.mark.parametrize("field", ["read_rate", "write_rate"])
+def test_rates_must_be_positive(field):
+    with pytest.raises(ValidationError):
+        RateLimitSettings(**{field: 0})
@@ -0,0 +1,151 @@
+import asyncio
+
+import pytest
+from fastapi import FastAPI
+from starlette.testclient import TestClient
+
+from gns_api_gateway.api.error_handlers import register_error_handler
+from gns_api_gateway.domain.exceptions import UpstreamBusyError
+from gns_api_gateway.infrastructure.proxies import UpstreamLimiter
+
+
+class FakeClock:
+    """
+    Часы для метрик ожидания: время в очереди не зависит от скорости машины, на которой идут тесты.
+    """
+
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def make_limiter(limit: int = 1, queue_timeout: float = 5.0) -> UpstreamLimiter:
+    return UpstreamLimiter({"project_open": limit}, queue_timeout=queue_timeout, clock=FakeClock())
+
+
+def slots(limiter: UpstreamLimiter):
+    return limiter._slots["project_open"]
+
+
+async def hold(limiter: UpstreamLimiter, released: asyncio.Event, priority: int = 1) -> None:
+    async with limiter.slot("project_open", priority):
+        await released.wait()
+
+
+async def settle() -> None:
+    # Даёт запущенным задачам дойти до очереди ограничителя
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+def test_waiters_are_served_by_priority_then_arrival():
+    async def scenario() -> list[str]:
+        limiter = make_limiter()
+        served: list[str] = []
+
+        async def request(name: str, priority: int) -> None:
+            async with limiter.slot("project_open", priority):
+                served.append(name)
+
+        released = asyncio.Event()
+        holder = asyncio.create_task(hold(limiter, released))
+        await settle()
+        waiters = [
+            asyncio.create_task(request(name, priority))
+            for name, priority in (("student", 2), ("teacher-1", 1), ("teacher-2", 1))
+        ]
+        await settle()
+        assert served == []  # Все ждут единственный слот
+
+        released.set()
+        await asyncio.gather(holder, *waiters)
+        assert slots(limiter).active == 0
+        return served
+
+    assert asyncio.run(scenario()) == ["teacher-1", "teacher-2", "student"]
+
+
+def test_operations_without_limit_are_not_queued():
+    async def scenario() -> None:
+        limiter = make_limiter(limit=0, queue_timeout=0.01)
+        async with limiter.slot("node_start", 1):
+            pass
+
+    asyncio.run(scenario())
+
+
+def test_cancelled_waiter_leaves_queue_and_does_not_take_slot():
+    async def scenario() -> None:
+        limiter = make_limiter()
+        released = asyncio.Event()
+        holder = asyncio.create_task(hold(limiter, released))
+        await settle()
+        waiter = asyncio.create_task(hold(limiter, asyncio.Event()))
+        await settle()
+        assert len(slots(limiter).waiters) == 1
+
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        assert slots(limiter).waiters == []
+
+        released.set()
+        await holder
+        assert slots(limiter).active == 0
+
+    asyncio.run(scenario())
+
+
+def test_slot_is_released_when_block_fails():
+    async def scenario() -> None:
+        limiter = make_limiter()
+        with pytest.raises(RuntimeError):
+            async with limiter.slot("project_open", 1):
+                raise RuntimeError("upstream failed")
+        assert slots(limiter).active == 0
+
+    asyncio.run(scenario())
+
+
+def test_waiter_times_out_with_upstream_busy_error():
+    async def scenario() -> None:
+        limiter = make_limiter(queue_timeout=0.01)
+        released = asyncio.Event()
+        holder = asyncio.create_task(hold(limiter, released))
+        await settle()
+
+        with pytest.raises(UpstreamBusyError) as error:
+            async with limiter.slot("project_open", 1):
+                pass
+        assert error.value.retry_after == 0.01
+        assert slots(limiter).waiters == []
+
+        released.set()
+        await holder
+        assert slots(limiter).active == 0  # Слот не достался ушедшему по таймауту
+
+        async with limiter.slot("project_open", 1):
+            assert slots(limiter).active == 1
+
+    asyncio.run(scenario())
+
+
+def test_busy_upstream_returns_503_with_retry_after():
+    limiter = make_limiter(queue_timeout=0.01)
+    app = FastAPI()
+    register_error_handler(app)
+
+    @app.post("/v2/projects/{project_id}/open")
+    async def open_project(project_id: str) -> dict:
+        async with limiter.slot("project_open", 1):
+            # Второй слот при лимите 1 не освободится — запрос ждёт и получает отказ
+            async with limiter.slot("project_open", 1):
+                return {"project_id": project_id}
+
+    response = TestClient(app).post("/v2/projects/1/open")
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
+    assert response.json()["code"] == "upstream_busy"
+    assert slots(limiter).active == 0